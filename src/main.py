@@ -1,21 +1,15 @@
-from scraper import events, fighters, fights, fightstats, get_urls, normalise_tables
+from scraper.config import configure
 
 
-def main():
+def main(argv: list[str] | None = None) -> None:
+    args = configure(argv)
+    # Constants read settings once imported, so scraper is imported after them
+    from scraper import run
 
-    print('Scrapes all urls from ufcstats.com')
-    event_urls = get_urls.get_event_urls()
-    get_urls.get_fight_urls(event_urls)
-    get_urls.get_fighter_urls()
-
-    print('Iterates through urls and scrapes key data into csv files')
-    events.scrape_events()
-    fights.scrape_fights()
-    fightstats.scrape_fightstats()
-    fighters.scrape_fighters()
-
-    print('Normalises tables for clean final output')
-    normalise_tables.normalise_tables()
+    if args.stages == ['watch']:
+        run.watch_fight_night()
+    else:
+        run.scrape(args.stages, args.force)
 
 
 if __name__ == '__main__':
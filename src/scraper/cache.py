@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from scraper.constants import CACHE_MAX_AGE, CACHE_MAX_BYTES, CACHE_PATH
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes
+    encoding: str | None
+    fetched_at: float
+    etag: str | None
+    last_modified: str | None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers to revalidate the entry with the server"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Gzipped raw pages on disk, stored by sha256 of url"""
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        max_age: float = CACHE_MAX_AGE,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        folder = self.path / key[:2]
+        return folder / f'{key}.html.gz', folder / f'{key}.json'
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        """Writes file through temporary one, so readers never see half a file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Fetch threads of one process may write the same url at once
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f'{path.name}.', suffix='.tmp', delete=False
+        ) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def get(self, url: str) -> CacheEntry | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_bytes())
+            body = gzip.decompress(body_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(body=body, **meta)
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: str | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        body_path, meta_path = self._paths(url)
+        self._write(body_path, gzip.compress(body))
+        self._write_meta(
+            meta_path,
+            {
+                'url': url,
+                'encoding': encoding,
+                'fetched_at': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+            },
+        )
+
+    def touch(self, url: str) -> None:
+        """Marks entry as fetched now after successful revalidation"""
+        _, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return
+        meta['fetched_at'] = time.time()
+        self._write_meta(meta_path, meta)
+
+    def _write_meta(self, meta_path: Path, meta: dict) -> None:
+        self._write(meta_path, json.dumps(meta).encode())
+
+    def evict(self) -> int:
+        """
+        Removes entries older than max_age, then the oldest entries
+        until cache fits max_bytes. Returns number of removed entries
+        """
+        entries = []
+        for meta_path in self.path.glob('*/*.json'):
+            body_path = meta_path.with_suffix('.html.gz')
+            try:
+                fetched_at = json.loads(meta_path.read_bytes())['fetched_at']
+                size = meta_path.stat().st_size + body_path.stat().st_size
+            except (FileNotFoundError, ValueError, KeyError):
+                fetched_at, size = 0.0, 0
+            entries.append((fetched_at, size, meta_path, body_path))
+
+        entries.sort(key=lambda entry: entry[0])
+        total_size = sum(entry[1] for entry in entries)
+        expired = time.time() - self.max_age
+        removed = 0
+        for fetched_at, size, meta_path, body_path in entries:
+            if fetched_at >= expired and total_size <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            total_size -= size
+            removed += 1
+        return removed
@@ -0,0 +1,146 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from scraper.cache import CacheEntry, PageCache
+from scraper.constants import (
+    ACCEPT_ENCODING,
+    CONCURRENCY,
+    POOL_CONNECTIONS,
+    REQUEST_TIMEOUT,
+    USER_AGENT_HEADERS,
+)
+from scraper.ratelimit import RateLimiter, parse_retry_after
+from scraper.utils import HttpException
+
+
+class CacheMiss(HttpException):
+    """Page is not cached in offline mode"""
+
+
+def cached_response(entry: CacheEntry) -> requests.Response:
+    """Builds response from cache entry"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = entry.url
+    response.encoding = entry.encoding
+    response._content = entry.body
+    return response
+
+
+class HttpClient:
+    """Pooled keep-alive http session shared by all scraping stages"""
+
+    def __init__(
+        self,
+        pool_size: int = CONCURRENCY,
+        timeout: float = REQUEST_TIMEOUT,
+        headers: dict[str, str] | None = None,
+        limiter: RateLimiter | None = None,
+        cache: PageCache | None = None,
+        offline: bool = False,
+    ) -> None:
+        self.timeout = timeout
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.cache = cache
+        self.offline = offline
+        self.cache_stats = {'hit': 0, 'revalidated': 0, 'stored': 0}
+        # Blocks threads over pool_size instead of opening throwaway connections
+        self.adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=pool_size,
+            max_retries=0,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update(
+            {
+                'User-agent': USER_AGENT_HEADERS,
+                'Accept-Encoding': ACCEPT_ENCODING,
+                'Connection': 'keep-alive',
+            }
+        )
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+    ) -> requests.Response:
+        """
+        Sends GET request through the pooled session under the host rate limit.
+        Cached page is revalidated with the server, or returned as is offline
+        """
+        entry = self.cache.get(url) if self.cache is not None else None
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(url)
+            self.cache_stats['hit'] += 1
+            return cached_response(entry)
+
+        if entry is not None:
+            headers = {**entry.conditional_headers(), **(headers or {})}
+
+        self.limiter.acquire(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 429:
+            self.limiter.on_throttle(
+                url, parse_retry_after(response.headers.get('Retry-After'))
+            )
+        elif response.ok or response.status_code == 304:
+            self.limiter.on_success(url)
+
+        if self.cache is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            self.cache_stats['revalidated'] += 1
+            return cached_response(entry)
+        if response.status_code == 200:
+            self.cache.put(
+                url,
+                response.content,
+                response.encoding,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+            )
+            self.cache_stats['stored'] += 1
+        return response
+
+    def stats(self) -> dict[str, int]:
+        """Counts requests and opened connections of all alive pools"""
+        pools = self.adapter.poolmanager.pools
+        stats = {'requests': 0, 'connections': 0}
+        for key in pools.keys():
+            pool = pools[key]
+            stats['requests'] += pool.num_requests
+            stats['connections'] += pool.num_connections
+        stats['reused'] = max(stats['requests'] - stats['connections'], 0)
+        return stats
+
+    def report(self) -> None:
+        """Prints connection reuse stats"""
+        stats = self.stats()
+        ratio = stats['reused'] / stats['requests'] if stats['requests'] else 0
+        print(
+            f'{stats["requests"]} requests over {stats["connections"]} connections'
+            f' ({ratio:.1%} reused)'
+        )
+        if self.cache is not None:
+            print(
+                f'Cache: {self.cache_stats["hit"]} hits,'
+                f' {self.cache_stats["revalidated"]} revalidated,'
+                f' {self.cache_stats["stored"]} stored'
+            )
+        self.limiter.report()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'HttpClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,139 @@
+from pathlib import Path
+
+import pandas as pd
+
+from scraper.constants import CATEGORY_COLUMNS, COLUMNAR_FILES_PATH
+from scraper.rows import Row, get_schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+# Formats of pyarrow datasets by format of normalised tables
+DATASET_FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+# Appended tables are partitioned by year of event of their rows
+PARTITION_COLUMN = 'event_year'
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError(
+            'pyarrow is required for parquet and arrow formats, '
+            'install it with pip install pyarrow'
+        )
+
+
+def get_arrow_type(column: str, dtype: str) -> 'pa.DataType':
+    """Arrow type of column of normalised table by its pandas dtype"""
+    if column in CATEGORY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if column == PARTITION_COLUMN:
+        return pa.int16()
+    arrow_types = {
+        'Int64': pa.int64(),
+        'Float64': pa.float64(),
+        'datetime64[ns]': pa.date32(),
+    }
+    return arrow_types.get(dtype, pa.string())
+
+
+def get_arrow_schema(columns: list[str], row_class: type[Row]) -> 'pa.Schema':
+    """
+    Arrow schema of normalised table made of rows of row class, keys
+    added by normalisation are strings
+    """
+    schema = get_schema(row_class)
+    return pa.schema(
+        [
+            (column, get_arrow_type(column, schema.get(column, 'string')))
+            for column in columns
+        ]
+    )
+
+
+def to_arrow(
+    table: pd.DataFrame,
+    columns: list[str],
+    row_class: type[Row],
+) -> 'pa.Table':
+    arrow_table = pa.Table.from_pandas(table[columns], preserve_index=False)
+    # Batches of one table share dictionaries, as arrow files allow one per column
+    return (
+        arrow_table.cast(get_arrow_schema(columns, row_class))
+        .unify_dictionaries()
+        .combine_chunks()
+    )
+
+
+def get_table_path(name: str, fmt: str) -> Path:
+    return COLUMNAR_FILES_PATH / fmt / name
+
+
+def write_table(
+    table: pd.DataFrame,
+    columns: list[str],
+    row_class: type[Row],
+    name: str,
+    fmt: str,
+    part: int | None = None,
+) -> None:
+    """
+    Writes normalised table as parquet or arrow dataset. Table with part is
+    appended to dataset partitioned by event year in files named by part,
+    so repeated part overwrites its files. Table without part replaces dataset
+    """
+    if part is None:
+        arrow_table = to_arrow(table, columns, row_class)
+        partitioning, flavor, existing = None, None, 'delete_matching'
+    else:
+        if table.empty:
+            return
+        arrow_table = to_arrow(table, columns + [PARTITION_COLUMN], row_class)
+        partitioning, flavor, existing = (
+            [PARTITION_COLUMN],
+            'hive',
+            'overwrite_or_ignore',
+        )
+
+    ds.write_dataset(
+        arrow_table,
+        str(get_table_path(name, fmt)),
+        format=DATASET_FORMATS[fmt],
+        partitioning=partitioning,
+        partitioning_flavor=flavor,
+        basename_template=f'part-{part or 0}-{{i}}.{fmt}',
+        existing_data_behavior=existing,
+    )
+
+
+def read_table(
+    name: str,
+    fmt: str = 'parquet',
+    columns: list[str] | None = None,
+    years: list[int] | None = None,
+) -> 'pa.Table':
+    """
+    Reads columns of normalised table, only partitions of given event years
+    are read. Arrow files are memory mapped, so their columns are not copied
+    """
+    require_pyarrow()
+    path = get_table_path(name, fmt)
+    partitioned = any(child.is_dir() for child in path.iterdir())
+    dataset = ds.dataset(
+        str(path),
+        format=DATASET_FORMATS[fmt],
+        partitioning=(
+            ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int16())]), flavor='hive')
+            if partitioned
+            else None
+        ),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    if years is None:
+        return dataset.to_table(columns=columns)
+    return dataset.to_table(
+        columns=columns, filter=ds.field(PARTITION_COLUMN).isin(years)
+    )
@@ -0,0 +1,154 @@
+import argparse
+import os
+import tomllib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+
+def one_of(*choices: str, separated: bool = False) -> Callable[[str], str]:
+    """Converter of setting taking one of choices, or several comma separated"""
+
+    def convert(value: str) -> str:
+        for item in value.split(',') if separated else [value]:
+            if item not in choices:
+                raise argparse.ArgumentTypeError(
+                    f'{item!r} is not one of {", ".join(choices)}'
+                )
+        return value
+
+    return convert
+
+
+# Settings by name of flag and key of config file: environment variable
+# read by constants, type and help. Flags override environment variables,
+# which override config file
+SETTINGS: dict[str, tuple[str, Callable[[str], Any], str]] = {
+    'data_dir': ('UFC_DIST_PATH', Path, 'data folder of scraped and normalised files'),
+    'cache_dir': ('UFC_CACHE_PATH', Path, 'folder of raw pages cache'),
+    'base_url': ('UFC_BASE_URL', str, 'ufcstats.com or its mirror'),
+    'concurrency': ('UFC_CONCURRENCY', int, 'pages fetched at once'),
+    'rate': ('UFC_RATE', float, 'requests per second per host at start'),
+    'max_rate': ('UFC_MAX_RATE', float, 'requests per second per host at most'),
+    'timeout': ('UFC_TIMEOUT', float, 'seconds to wait for response'),
+    'retries': ('UFC_RETRIES', int, 'tries of lost or throttled request'),
+    'throttle_wait': (
+        'UFC_THROTTLE_WAIT',
+        float,
+        'seconds at most to back off 429 without Retry-After',
+    ),
+    'connection_wait': (
+        'UFC_CONNECTION_WAIT',
+        float,
+        'seconds at most to back off lost connection or server error',
+    ),
+    'parse_workers': ('UFC_PARSE_WORKERS', int, 'processes parsing pages'),
+    'parser': ('UFC_PARSER', one_of('lxml', 'bs4'), 'parser backend, lxml or bs4'),
+    'storage': (
+        'UFC_STORAGE',
+        one_of('csv', 'sqlite'),
+        'storage of scraped tables, csv or sqlite',
+    ),
+    'formats': (
+        'UFC_NORMALISED_FORMATS',
+        one_of('csv', 'parquet', 'arrow', separated=True),
+        'csv,parquet,arrow',
+    ),
+}
+# Switches set to 1 in environment
+SWITCHES = {
+    'offline': ('UFC_OFFLINE', 'reparse cached pages without network'),
+    'delta': ('UFC_DELTA', 'scrape only events since the last run'),
+}
+STAGES = ['events', 'fight_pages', 'fighters', 'export', 'normalise']
+# Config file is in the project root wherever scraper is run from
+CONFIG_PATH = Path(__file__).resolve().parents[2] / 'ufc.toml'
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Scrapes ufcstats.com into csv files and normalises them',
+    )
+    parser.add_argument(
+        'stages',
+        nargs='*',
+        choices=[*STAGES, 'watch'],
+        metavar='stage',
+        help=f'stages to run, all by default: {", ".join(STAGES)}; '
+        'or watch to poll events in progress',
+    )
+    parser.add_argument(
+        '--config',
+        type=Path,
+        default=None,
+        help=f'toml file of settings, {CONFIG_PATH} if it exists',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='run stages even if their outputs are up to date',
+    )
+    for name, (_, convert, help_text) in SETTINGS.items():
+        parser.add_argument(f'--{name.replace("_", "-")}', type=convert, help=help_text)
+    for name, (_, help_text) in SWITCHES.items():
+        parser.add_argument(
+            f'--{name}', action='store_true', default=None, help=help_text
+        )
+    return parser
+
+
+def load_config(path: Path | None) -> dict[str, Any]:
+    """Settings of toml file, given file must exist"""
+    if path is None:
+        if not CONFIG_PATH.exists():
+            return {}
+        path = CONFIG_PATH
+    with open(path, 'rb') as f:
+        config = tomllib.load(f)
+    unknown = set(config) - set(SETTINGS) - set(SWITCHES)
+    if unknown:
+        raise ValueError(f'Unknown settings in {path}: {", ".join(sorted(unknown))}')
+    # Values are checked as flags are
+    for name, value in config.items():
+        if name in SWITCHES and not isinstance(value, bool):
+            raise ValueError(
+                f'Invalid {name} in {path}: {value!r} is not true or false'
+            )
+        if name in SETTINGS:
+            try:
+                SETTINGS[name][1](to_env(value))
+            except (argparse.ArgumentTypeError, TypeError, ValueError) as e:
+                raise ValueError(f'Invalid {name} in {path}: {e}') from e
+    return config
+
+
+def to_env(value: Any) -> str:
+    if isinstance(value, bool):
+        return '1' if value else ''
+    if isinstance(value, list):
+        return ','.join(str(item) for item in value)
+    return str(value)
+
+
+def configure(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses flags and config file into environment variables of settings.
+    Must run before scraper modules are imported, as constants are read once
+    """
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if 'watch' in args.stages and len(args.stages) > 1:
+        parser.error('watch runs alone')
+
+    config = load_config(args.config)
+    for name, env in [
+        *((name, setting[0]) for name, setting in SETTINGS.items()),
+        *((name, switch[0]) for name, switch in SWITCHES.items()),
+    ]:
+        value = getattr(args, name)
+        if value is not None:
+            os.environ[env] = to_env(value)
+        elif env not in os.environ and name in config:
+            os.environ[env] = to_env(config[name])
+    return args
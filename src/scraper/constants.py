@@ -1,9 +1,16 @@
 import os
 from pathlib import Path
 
-DIST_PATH = Path(os.getcwd()).parent / 'dist'
+# Environment overrides point scraper at other data folder or mirror of site,
+# they are set by flags and config file of main.py too. Data folder is in the
+# project root wherever scraper is run from
+DIST_PATH = Path(
+    os.environ.get('UFC_DIST_PATH', Path(__file__).resolve().parents[2] / 'dist')
+)
+BASE_URL = os.environ.get('UFC_BASE_URL', 'http://ufcstats.com')
 SCRAPED_FILES_PATH = DIST_PATH / 'scraped_files'
 URL_PATH = DIST_PATH / 'urls'
+CACHE_PATH = Path(os.environ.get('UFC_CACHE_PATH', DIST_PATH / 'cache'))
 EVENT_TABLE_ROWS = [
     'event_name',
     'event_date',
@@ -15,6 +22,8 @@ EVENT_TABLE_ROWS = [
 EVENT_FIELD = 'event_url'
 EVENT_DATA_PATH = SCRAPED_FILES_PATH / 'ufc_event_data.csv'
 EVENT_URLS = URL_PATH / 'event_urls.csv'
+EVENTS_LISTING_URL = f'{BASE_URL}/statistics/events/completed?page=all'
+EVENTS_UPCOMING_URL = f'{BASE_URL}/statistics/events/upcoming?page=all'
 FIGHTER_TABLE_ROWS = [
     'fighter_f_name',
     'fighter_l_name',
@@ -33,6 +42,9 @@ FIGHTER_TABLE_ROWS = [
 FIGHTER_FIELD = 'fighter_url'
 FIGHTER_DATA_PATH = SCRAPED_FILES_PATH / 'ufc_fighter_data.csv'
 FIGHTER_URLS = URL_PATH / 'fighter_urls.csv'
+# Fighters which profile pages failed to be scraped, fetched again next run
+FIGHTER_FAILED_URLS = URL_PATH / 'fighter_failed_urls.csv'
+FIGHTER_LISTING_URL = BASE_URL + '/statistics/fighters?char={letter}&page=all'
 FIGHT_TABLE_ROWS = [
     'event_name',
     'referee',
@@ -46,12 +58,17 @@ FIGHT_TABLE_ROWS = [
     'result',
     'result_details',
     'finish_round',
-    'finish_time',
+    'finish_time_sec',
+    'f_1_url',
+    'f_2_url',
+    'winner_url',
     'fight_url',
 ]
 FIGHT_FIELD = 'fight_url'
 FIGHT_DATA_PATH = SCRAPED_FILES_PATH / 'ufc_fight_data.csv'
 FIGHT_URLS = URL_PATH / 'fight_urls.csv'
+EVENT_FIGHT_TABLE_ROWS = ['event_url', 'fight_url']
+EVENT_FIGHT_URLS = URL_PATH / 'event_fight_urls.csv'
 FIGHTSTATS_TABLE_ROWS = [
     'fighter_id',
     'knockdowns',
@@ -63,12 +80,34 @@ FIGHTSTATS_TABLE_ROWS = [
     'takedown_succ',
     'submission_att',
     'reversals',
-    'ctrl_time',
+    'ctrl_time_sec',
+    'fighter_url',
     'fight_url',
 ]
 FIGHTSTATS_FIELD = 'fightstats_url'
 FIGHTSTATS_DATA_PATH = SCRAPED_FILES_PATH / 'ufc_fight_stat_data.csv'
 FIGHTSTATS_URLS = URL_PATH / 'fight_urls.csv'
+# Normalised tables are written apart from scraped ones, offsets in bytes
+# of scraped rows already normalised let next run take only appended rows
+NORMALISED_FILES_PATH = DIST_PATH / 'normalised_files'
+NORMALISED_EVENT_PATH = NORMALISED_FILES_PATH / 'ufc_event_data.csv'
+NORMALISED_FIGHT_PATH = NORMALISED_FILES_PATH / 'ufc_fight_data.csv'
+NORMALISED_FIGHTSTATS_PATH = NORMALISED_FILES_PATH / 'ufc_fight_stat_data.csv'
+NORMALISED_FIGHTER_PATH = NORMALISED_FILES_PATH / 'ufc_fighter_data.csv'
+NORMALISED_OFFSETS = NORMALISED_FILES_PATH / 'offsets.json'
+# Storage of scraped tables: 'csv' files appended by scrapers, or 'sqlite'
+# database exported to the same csv files before tables are normalised
+STORAGE = os.environ.get('UFC_STORAGE', 'csv')
+DATABASE_PATH = SCRAPED_FILES_PATH / 'ufc_data.sqlite'
+# Urls written to database in one transaction, and wait for its lock in seconds
+STORAGE_BATCH_SIZE = 64
+STORAGE_TIMEOUT = 30
+# Formats of normalised tables: 'csv', and 'parquet' and 'arrow' (IPC) datasets
+# partitioned by event year, which need pyarrow
+NORMALISED_FORMATS = os.environ.get('UFC_NORMALISED_FORMATS', 'csv').split(',')
+COLUMNAR_FILES_PATH = NORMALISED_FILES_PATH / 'columnar'
+# Columns of few repeated values, dictionary encoded in columnar formats
+CATEGORY_COLUMNS = ['referee', 'weight_class', 'result', 'fighter_stance']
 
 # Define columns for final output
 EVENT_COLUMNS = [
@@ -94,7 +133,7 @@ FIGHT_COLUMNS = [
     'result',
     'result_details',
     'finish_round',
-    'finish_time',
+    'finish_time_sec',
     'fight_url',
 ]
 FIGHTSTATS_COLUMNS = [
@@ -110,7 +149,7 @@ FIGHTSTATS_COLUMNS = [
     'takedown_succ',
     'submission_att',
     'reversals',
-    'ctrl_time',
+    'ctrl_time_sec',
     'fight_url',
 ]
 FIGHTER_COLUMNS = [
@@ -134,8 +173,40 @@ USER_AGENT_HEADERS = (
     'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)'
     ' Chrome/135.0.0.0 Safari/537.36'
 )
-CONNECTION_LOST_TRYING = 3
-CONNECTION_LOST_TIMOUT = 60
-TO_MANY_REQUESTS_TRYING = 1
-TO_MANY_REQUESTS_TIMOUT = 30
-SHORT_TIMOUT = 1
+CONNECTION_LOST_TRYING = int(os.environ.get('UFC_RETRIES', 6))
+CONNECTION_LOST_TIMOUT = float(os.environ.get('UFC_CONNECTION_WAIT', 60))
+TO_MANY_REQUESTS_TRYING = int(os.environ.get('UFC_RETRIES', 6))
+TO_MANY_REQUESTS_TIMOUT = float(os.environ.get('UFC_THROTTLE_WAIT', 30))
+BACKOFF_BASE = 2
+# Adaptive rate limit per host, requests per second
+RATE_START = float(os.environ.get('UFC_RATE', 1.0))
+RATE_MIN = 0.2
+RATE_MAX = float(os.environ.get('UFC_MAX_RATE', 20.0))
+RATE_BURST = 2.0
+RATE_INCREASE = 0.05
+RATE_DECREASE = 0.5
+CONCURRENCY = int(os.environ.get('UFC_CONCURRENCY', 8))
+POOL_CONNECTIONS = 4
+REQUEST_TIMEOUT = float(os.environ.get('UFC_TIMEOUT', 30))
+ACCEPT_ENCODING = 'gzip, deflate'
+# Parse stage processes and capacity of queues between pipeline stages
+PARSE_WORKERS = int(os.environ.get('UFC_PARSE_WORKERS', os.cpu_count() or 1))
+QUEUE_SIZE = 64
+# Parser backend of pages: 'lxml' trees or 'bs4' soups
+PARSER_BACKEND = os.environ.get('UFC_PARSER', 'lxml')
+# Raw pages cache, offline mode reparses cached pages without network
+OFFLINE = os.environ.get('UFC_OFFLINE') == '1'
+CACHE_MAX_AGE = 365 * 24 * 60 * 60
+CACHE_MAX_BYTES = 2 * 1024**3
+# Delta crawl walks events listing only down to date of newest event with
+# fights scraped, and refreshes only fighters of fights of new events
+DELTA = os.environ.get('UFC_DELTA') == '1'
+# Watch mode polls pages of events from yesterday on every seconds
+WATCH_INTERVAL = 10
+WATCH_DAYS = 1
+# Events listing is polled every seconds for events started since
+WATCH_REFRESH = 600
+# Finish times of stages of run. Stage finished after its inputs changed is
+# skipped, and stage scraping the site only within max age in seconds
+STAGES_PATH = DIST_PATH / 'stages.json'
+STAGE_MAX_AGE = 60 * 60
@@ -1,101 +1,278 @@
-import csv
-import time
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import date, datetime
 
 import bs4
-import requests
 
+from scraper.client import HttpClient
 from scraper.constants import (
-    EVENT_DATA_PATH,
-    EVENT_FIELD,
-    EVENT_TABLE_ROWS,
+    CONCURRENCY,
+    DELTA,
     EVENT_URLS,
-    SHORT_TIMOUT,
+    EVENTS_LISTING_URL,
+    FIGHT_URLS,
+    PARSER_BACKEND,
 )
-from scraper.utils import (
-    HttpException,
-    HttpSolver,
-    create_csv_file,
-    filter_duplicate_urls,
-    get_urls,
+from scraper.fetch import fetch_page
+from scraper.pipeline import scrape_pages
+from scraper.rows import EventFightRow, EventRow
+from scraper.storage import Table, open_table
+from scraper.tree import Selectors, parse_tree, text
+from scraper.utils import write_urls_to_csv
+
+EVENT_PAGE = Selectors(
+    {
+        'event_name': ('h2', None),
+        'items': ('li', None),
+        'fight_links': ('a', 'b-flag b-flag_style_green'),
+    }
 )
 
 
-def scrape_events() -> None:  # noqa: C901
-    """Scrapes details of each UFC event appends to CSV file 'ufc_event_data'"""
-
-    urls = get_urls(EVENT_URLS)
-    urls = filter_duplicate_urls(EVENT_DATA_PATH, urls, EVENT_FIELD)
-
-    if len(urls) == 0:
-        print('Event data already scraped or empty event urls file')
-        return
-
-    create_csv_file(EVENT_DATA_PATH, EVENT_TABLE_ROWS)
-
-    print(f'Scraping {len(urls)} event URLs...')
-    urls_scraped = 0
-
-    with open(EVENT_DATA_PATH, 'a+') as f:
-        writer = csv.writer(f)
-
-        for url in urls:
-
-            solver = HttpSolver()
-            print(f'Scrapes {url}')
-
-            while True:
-                try:
-                    response = requests.get(url)
-                    if response.status_code == 429:
-                        if solver.is_completely_429():
-                            raise HttpException('429')
-
-                    event_soup = bs4.BeautifulSoup(response.text, 'lxml')
-                    event_full_location = (
-                        event_soup.select('li')[4].text.split(':')[1].strip().split(',')
-                    )
-
-                    event_name = event_soup.select('h2')[0].text
-                    event_date = str(
-                        datetime.strptime(
-                            event_soup.select('li')[3].text.split(':')[-1].strip(),
-                            '%B %d, %Y',
-                        )
-                    )
-                    event_city = event_full_location[0]
-                    event_country = event_full_location[-1]
-
-                    # Check event location contains state details
-                    if len(event_full_location) > 2:
-                        event_state = event_full_location[1]
-                    else:
-                        event_state = 'NULL'
-                    urls_scraped += 1
-
-                    # Adds new row to csv file
-                    writer.writerow(
-                        [
-                            event_name.strip(),
-                            event_date[0:10],
-                            event_city.strip(),
-                            event_state.strip(),
-                            event_country.strip(),
-                            url,
-                        ]
-                    )
-
-                    time.sleep(SHORT_TIMOUT)
-                    break
-
-                except IndexError as e:
-                    print(f'Error scraping events page: {url}')
-                    print(f'Error details: {e}')
-                    break
-
-                except ConnectionError:
-                    if solver.is_completely_connection_lost():
-                        raise HttpException('Connection lost')
-                    continue
-
-    print(f'{urls_scraped}/{len(urls)} events successfully scraped')
+def get_event_row(
+    url: str,
+    event_name: str,
+    date_text: str,
+    location_text: str,
+) -> EventRow:
+    """Builds a row of 'ufc_event_data' from event name, date and location"""
+    event_full_location = location_text.strip().split(',')
+    event_date = datetime.strptime(date_text.strip(), '%B %d, %Y').date()
+    event_city = event_full_location[0]
+    event_country = event_full_location[-1]
+
+    # Check event location contains state details
+    if len(event_full_location) > 2:
+        event_state = event_full_location[1]
+    else:
+        event_state = 'NULL'
+
+    return EventRow.from_values(
+        [
+            event_name.strip(),
+            event_date,
+            event_city.strip(),
+            event_state.strip(),
+            event_country.strip(),
+            url,
+        ]
+    )
+
+
+def parse_event_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> EventRow | None:
+    """Parses event page into a row of 'ufc_event_data'"""
+    if backend == 'lxml':
+        return parse_event_elements(url, EVENT_PAGE(parse_tree(html)))
+    return parse_event_soup(url, bs4.BeautifulSoup(html, 'lxml'))
+
+
+def parse_event_soup(url: str, event_soup: bs4.BeautifulSoup) -> EventRow | None:
+    """Parses event page soup into a row of 'ufc_event_data'"""
+    try:
+        return get_event_row(
+            url,
+            event_soup.select('h2')[0].text,
+            event_soup.select('li')[3].text.split(':')[-1],
+            event_soup.select('li')[4].text.split(':')[1],
+        )
+    except IndexError as e:
+        print(f'Error scraping events page: {url}')
+        print(f'Error details: {e}')
+        return None
+
+
+def parse_event_elements(url: str, elements: dict[str, list]) -> EventRow | None:
+    """Parses event page elements into a row of 'ufc_event_data'"""
+    try:
+        return get_event_row(
+            url,
+            text(elements['event_name'][0]),
+            text(elements['items'][3]).split(':')[-1],
+            text(elements['items'][4]).split(':')[1],
+        )
+    except IndexError as e:
+        print(f'Error scraping events page: {url}')
+        print(f'Error details: {e}')
+        return None
+
+
+def parse_event_fights_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> tuple[str, EventRow | None, list[str]]:
+    """
+    Parses event page once into event url, a row of 'ufc_event_data'
+    and urls of event fights
+    """
+    if backend == 'lxml':
+        elements = EVENT_PAGE(parse_tree(html))
+        fight_urls = [item.get('href') for item in elements['fight_links']]
+        return url, parse_event_elements(url, elements), fight_urls
+
+    event_soup = bs4.BeautifulSoup(html, 'lxml')
+    fight_urls = [
+        item.get('href')
+        for item in event_soup.find_all('a', class_='b-flag b-flag_style_green')
+    ]
+    return url, parse_event_soup(url, event_soup), fight_urls
+
+
+def parse_event_listing(
+    html: str,
+    since: date | None = None,
+) -> tuple[list[str], dict[str, EventRow]]:
+    """
+    Parses completed events listing into all event urls and rows of
+    'ufc_event_data' by event url. Rows failed to parse are missed.
+    Listing goes from newest event, with since date it is walked only
+    down to events of that date
+    """
+    listing_soup = bs4.BeautifulSoup(html, 'lxml')
+
+    # Adds href to list if href contains a link with keyword 'event-details'
+    urls = [
+        href
+        for item in listing_soup.find_all('a')
+        if isinstance(href := item.get('href'), str) and 'event-details' in href
+    ]
+
+    rows = {}
+    for content in listing_soup.select('i.b-statistics__table-content'):
+        link = content.select_one('a')
+        url = link.get('href') if link is not None else None
+        if link is None or not isinstance(url, str):
+            continue
+        date_span = content.select_one('span.b-statistics__date')
+        name_col = content.find_parent('td')
+        location_col = (
+            name_col.find_next_sibling('td') if name_col is not None else None
+        )
+        if date_span is None or location_col is None:
+            print(f'Error parsing events listing row: {url}')
+            continue
+        try:
+            row = get_event_row(url, link.text, date_span.text, location_col.text)
+        except (IndexError, ValueError) as e:
+            print(f'Error parsing events listing row: {url}')
+            print(f'Error details: {e}')
+            continue
+        # Row without date doesn't tell where the walk ends
+        if since is not None and row.event_date is not None and row.event_date < since:
+            if url in urls:
+                urls = urls[: urls.index(url)]
+            break
+        rows[url] = row
+
+    return urls, rows
+
+
+def get_event_fights(scraped: Table[EventFightRow]) -> dict[str, list[str]]:
+    """Fight urls of events already discovered in previous runs"""
+    event_fights: dict[str, list[str]] = {}
+    for row in scraped.rows():
+        event_fights.setdefault(row.event_url, []).append(row.fight_url)
+    return event_fights
+
+
+def get_watermark(
+    rows: Iterable[EventRow],
+    event_fights: dict[str, list[str]],
+) -> date | None:
+    """Date of newest event which fights are discovered"""
+    return max(
+        (
+            row.event_date
+            for row in rows
+            if row.event_url in event_fights and row.event_date is not None
+        ),
+        default=None,
+    )
+
+
+def scrape_events(
+    client: HttpClient,
+    concurrency: int = CONCURRENCY,
+    delta: bool = DELTA,
+) -> list[str]:
+    """
+    Scrapes completed events listing and each event page once. Appends
+    details of new UFC events to CSV file 'ufc_event_data' and event to fight
+    relations to 'event_fight_urls' as each event page is scraped, so broken
+    run resumes from not discovered events. Details of events are taken from
+    listing and from event page only if listing row failed to parse.
+    Delta run takes only events from date of newest event with fights.
+    Returns fight urls of events discovered by this run
+    """
+
+    with (
+        open_table('events') as scraped,
+        open_table('event_fights') as event_fights_scraped,
+    ):
+        event_fights = get_event_fights(event_fights_scraped)
+        since = None
+        if delta:
+            known_rows = list(scraped.rows())
+            since = get_watermark(known_rows, event_fights)
+
+        print('Scraping events listing from ufcstats.com')
+        html = fetch_page(client, EVENTS_LISTING_URL)
+        urls, rows = parse_event_listing(html, since)
+        all_urls = urls
+        if since is not None:
+            print(f'{len(urls)} event links since {since}')
+            # Url files keep events scraped by previous runs
+            listed = set(urls)
+            all_urls = urls + [
+                row.event_url for row in known_rows if row.event_url not in listed
+            ]
+        write_urls_to_csv(EVENT_URLS, all_urls)
+        print(len(all_urls), 'event links successfully scraped')
+
+        new_urls = scraped.filter(urls)
+        missed_rows = {url for url in new_urls if url not in rows}
+        # Events without fights yet (upcoming) are scraped again next run
+        urls_to_scrape = [
+            url for url in urls if url not in event_fights or url in missed_rows
+        ]
+
+        # Rows keep listing order
+        for url in new_urls:
+            if url in rows:
+                scraped.write_rows([rows[url]], url)
+
+        discovered: list[str] = []
+
+        def write(page: tuple[str, EventRow | None, list[str]]) -> None:
+            url, row, fight_urls = page
+            if url in missed_rows and row is not None:
+                scraped.write_rows([row], url)
+            if url not in event_fights and fight_urls:
+                event_fights_scraped.write_rows(
+                    [EventFightRow(url, fight_url) for fight_url in fight_urls], url
+                )
+                event_fights[url] = fight_urls
+                discovered.extend(fight_urls)
+
+        print(f'Scraping {len(urls_to_scrape)} event pages...')
+        scrape_pages(
+            client,
+            urls_to_scrape,
+            parse_event_fights_page,
+            write,
+            concurrency,
+            ordered=False,
+        )
+
+        events_scraped = len([url for url in new_urls if url in scraped])
+
+    fight_urls = [
+        fight_url for url in all_urls for fight_url in event_fights.get(url, [])
+    ]
+    write_urls_to_csv(FIGHT_URLS, fight_urls)
+    print(len(fight_urls), 'fight links successfully scraped')
+    print(f'{events_scraped}/{len(new_urls)} events successfully scraped')
+    return discovered
@@ -0,0 +1,47 @@
+from requests.exceptions import ConnectionError, Timeout
+
+from scraper.client import HttpClient
+from scraper.ratelimit import parse_retry_after
+from scraper.utils import HttpException, HttpSolver
+
+
+class PageError(HttpException):
+    """Server answered page request with client error status"""
+
+    def __init__(self, url: str, status_code: int) -> None:
+        super().__init__(f'{status_code} {url}')
+        self.url = url
+        self.status_code = status_code
+
+
+def fetch_page(client: HttpClient, url: str) -> str:
+    """
+    Fetches page text, waits out 429, server errors and connection lost
+    with HttpSolver. Other error statuses raise PageError, so error pages
+    are never parsed
+    """
+    solver = HttpSolver()
+    while True:
+        try:
+            response = client.get(url)
+        except (ConnectionError, Timeout):
+            if solver.is_completely_connection_lost():
+                raise HttpException('Connection lost')
+            continue
+
+        if response.status_code == 429:
+            # Client has blocked the host until Retry-After already
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if solver.is_completely_429(wait=retry_after is None):
+                raise HttpException('429')
+            continue
+
+        if response.status_code >= 500:
+            if solver.is_completely_server_error():
+                raise HttpException(str(response.status_code))
+            continue
+
+        if response.status_code >= 400:
+            raise PageError(url, response.status_code)
+
+        return response.text
@@ -1,27 +1,37 @@
-import csv
-import time
+from collections.abc import Iterable
+from dataclasses import replace
 from datetime import datetime
+from string import ascii_lowercase
 
 import bs4
-import requests
 
+from scraper.client import HttpClient
 from scraper.constants import (
-    FIGHTER_DATA_PATH,
-    FIGHTER_FIELD,
-    FIGHTER_TABLE_ROWS,
+    CONCURRENCY,
+    FIGHTER_FAILED_URLS,
+    FIGHTER_LISTING_URL,
     FIGHTER_URLS,
-    SHORT_TIMOUT,
+    PARSER_BACKEND,
 )
-from scraper.utils import (
-    HttpException,
-    HttpSolver,
-    create_csv_file,
-    filter_duplicate_urls,
-    get_urls,
+from scraper.pipeline import scrape_pages
+from scraper.rows import FighterRow
+from scraper.storage import open_table
+from scraper.tree import Selectors, parse_tree, text
+from scraper.utils import get_urls, write_urls_to_csv
+
+FIGHTER_PAGE = Selectors(
+    {
+        'name': ('span', None),
+        'nickname': ('p', 'b-content__Nickname'),
+        'details': ('li', 'b-list__box-list-item'),
+        'record': ('span', 'b-content__title-record'),
+    }
 )
+LISTING_PAGE = Selectors({'rows': ('tr', 'b-statistics__table-row')})
+LISTING_ROW = Selectors({'cols': ('td', 'b-statistics__table-col')})
 
 
-def parse_l_name(name: str) -> str:
+def parse_l_name(name: list[str]) -> str:
     """Parse fighter last name depending on length of name"""
     if len(name) == 2:
         return name[-1]
@@ -34,15 +44,14 @@ def parse_l_name(name: str) -> str:
     return 'NULL'
 
 
-def parse_nickname(nickname) -> str:
-    if nickname.text == '\n':
+def parse_nickname(nickname_text: str) -> str:
+    if nickname_text == '\n':
         return 'NULL'
-    return nickname.text.strip()
+    return nickname_text.strip()
 
 
-def parse_height(height) -> float | str:
+def convert_height(height_text: str) -> float | str:
     """Converts height in feet/inches to height in cm"""
-    height_text = height.text.split(':')[1].strip()
     if '--' in height_text.split("'"):
         return 'NULL'
     height_ft = height_text[0]
@@ -50,123 +59,420 @@ def parse_height(height) -> float | str:
     return ((int(height_ft) * 12.0) * 2.54) + (int(height_in) * 2.54)
 
 
-def parse_reach(reach) -> float | str:
+def parse_height(height_text: str) -> float | str:
+    """Converts height in feet/inches to height in cm"""
+    return convert_height(height_text.split(':')[1].strip())
+
+
+def convert_reach(reach_text: str) -> float | str:
     """Converts reach in inches to reach in cm"""
-    reach_text = reach.text.split(':')[1]
     if '--' in reach_text:
         return 'NULL'
-    return round(int(reach_text.strip().strip('"')) * 2.54, 2)
+    return round(float(reach_text.strip().strip('"')) * 2.54, 2)
+
+
+def parse_reach(reach_text: str) -> float | str:
+    """Converts reach in inches to reach in cm"""
+    return convert_reach(reach_text.split(':')[1])
 
 
-def parse_weight(weight_element) -> str:
-    weight_text = weight_element.text.split(':')[1]
+def convert_weight(weight_text: str) -> str:
     if '--' in weight_text:
         return 'NULL'
     return weight_text.split()[0].strip()
 
 
-def parse_stance(stance) -> str:
-    stance_text = stance.text.split(':')[1]
+def parse_weight(weight_text: str) -> str:
+    return convert_weight(weight_text.split(':')[1])
+
+
+def parse_stance(stance_text: str) -> str:
+    stance_text = stance_text.split(':')[1]
     if stance_text == '':
         return 'NULL'
     return stance_text.strip()
 
 
-def parse_dob(dob) -> str:
+def parse_dob(dob_text: str) -> str:
     """Converts string containing date of birth to datetime object"""
-    dob_text = dob.text.split(':')[1].strip()
+    dob_text = dob_text.split(':')[1].strip()
     if dob_text == '--':
         return 'NULL'
     return str(datetime.strptime(dob_text, '%b %d, %Y'))[0:10]
 
 
-def scrape_fighters():
-    """Scrapes details of each UFC fighter appends to CSV file 'ufc_fighter_data'"""
-
-    urls = get_urls(FIGHTER_URLS)
-    urls = filter_duplicate_urls(FIGHTER_DATA_PATH, urls, FIGHTER_FIELD)
+def get_fighter_row(
+    url: str,
+    name_text: str,
+    nickname_text: str,
+    details: list[str],
+    record_text: str,
+) -> FighterRow:
+    """Builds a row of 'ufc_fighter_data' from texts of fighter page"""
+    name = name_text.split()
+    record = record_text.split(':')[1].strip().split('-')
+
+    fighter_f_name = name[0]
+    fighter_l_name = parse_l_name(name)
+    fighter_nickname = parse_nickname(nickname_text)
+    fighter_height_cm = parse_height(details[0])
+    fighter_weight_lbs = parse_weight(details[1])
+    fighter_reach_cm = parse_reach(details[2])
+    fighter_stance = parse_stance(details[3])
+    fighter_dob = parse_dob(details[4])
+    fighter_w = record[0]
+    fighter_l = record[1]
+    fighter_d = record[-1][0] if len(record[-1]) > 1 else record[-1]
+    fighter_nc_dq = record[-1].split('(')[-1][0] if len(record[-1]) > 1 else 'NULL'
+
+    return FighterRow.from_values(
+        [
+            fighter_f_name.strip(),
+            fighter_l_name.strip(),
+            fighter_nickname,
+            fighter_height_cm,
+            fighter_weight_lbs,
+            fighter_reach_cm,
+            fighter_stance,
+            fighter_dob[0:10],
+            fighter_w,
+            fighter_l,
+            fighter_d,
+            fighter_nc_dq,
+            url,
+        ]
+    )
+
+
+def parse_fighter_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> FighterRow | None:
+    """Parses fighter page into a row of 'ufc_fighter_data'"""
+    try:
+        if backend == 'lxml':
+            page = FIGHTER_PAGE.texts(parse_tree(html))
+            return get_fighter_row(
+                url,
+                page['name'][0],
+                page['nickname'][0],
+                page['details'],
+                page['record'][0],
+            )
+
+        fighter_soup = bs4.BeautifulSoup(html, 'lxml')
+        return get_fighter_row(
+            url,
+            fighter_soup.select('span')[0].text,
+            fighter_soup.select('p.b-content__Nickname')[0].text,
+            [item.text for item in fighter_soup.select('li.b-list__box-list-item')],
+            fighter_soup.select('span.b-content__title-record')[0].text,
+        )
+
+    except IndexError as e:
+        print(f'Error scraping fighter page: {url}')
+        print(f'Error details: {e}')
+        return None
+
+
+def parse_listing_row(
+    cols: list[str],
+    fighter_url: str | None,
+) -> FighterRow | None:
+    """
+    Parses texts of fighters listing row into a row of 'ufc_fighter_data'.
+    DOB and NC are not in listing and left None
+    """
+    if fighter_url is None:
+        return None
+    first, last, nickname = (col.strip() for col in cols[:3])
+    stance = cols[6].strip()
+    return FighterRow.from_values(
+        [
+            first,
+            last or 'NULL',
+            nickname or 'NULL',
+            convert_height(cols[3].strip()),
+            convert_weight(cols[4]),
+            convert_reach(cols[5]),
+            stance or 'NULL',
+            'NULL',
+            cols[7].strip(),
+            cols[8].strip(),
+            cols[9].strip(),
+            'NULL',
+            fighter_url,
+        ]
+    )
+
+
+def get_listing_soup_rows(html: str) -> list[tuple[list[str], str | None]]:
+    """Texts of columns and fighter url of each fighters listing row"""
+    listing_soup = bs4.BeautifulSoup(html, 'lxml')
+    rows = []
+    for table_row in listing_soup.select('tr.b-statistics__table-row'):
+        cols = table_row.select('td.b-statistics__table-col')
+        link = cols[0].select_one('a') if cols else None
+        href = link.get('href') if link is not None else None
+        fighter_url = href if isinstance(href, str) else None
+        rows.append(([col.text for col in cols], fighter_url))
+    return rows
+
+
+def get_listing_tree_rows(html: str) -> list[tuple[list[str], str | None]]:
+    """Texts of columns and fighter url of each fighters listing row"""
+    rows = []
+    for table_row in LISTING_PAGE(parse_tree(html))['rows']:
+        cols = LISTING_ROW(table_row)['cols']
+        link = cols[0].find('.//a') if cols else None
+        fighter_url = link.get('href') if link is not None else None
+        rows.append(([text(col) for col in cols], fighter_url))
+    return rows
+
+
+def parse_fighter_listing(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> list[FighterRow] | None:
+    """Parses fighters listing page of one letter into rows of 'ufc_fighter_data'"""
+    if backend == 'lxml':
+        listing_rows = get_listing_tree_rows(html)
+    else:
+        listing_rows = get_listing_soup_rows(html)
+
+    rows = []
+    for cols, fighter_url in listing_rows:
+        if len(cols) < 10:
+            continue
+        try:
+            row = parse_listing_row(cols, fighter_url)
+        except (IndexError, ValueError) as e:
+            print(f'Error scraping fighters listing row: {url}')
+            print(f'Error details: {e}')
+            continue
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def scrape_listing_pages(
+    client: HttpClient,
+    letters: Iterable[str],
+    concurrency: int = CONCURRENCY,
+) -> list[FighterRow]:
+    """Scrapes fighter rows from listing pages of given letters"""
+    rows: list[FighterRow] = []
+    listing_urls = [FIGHTER_LISTING_URL.format(letter=letter) for letter in letters]
+    scrape_pages(client, listing_urls, parse_fighter_listing, rows.extend, concurrency)
+    return rows
+
+
+def get_fighter_listing(
+    client: HttpClient,
+    concurrency: int = CONCURRENCY,
+) -> list[FighterRow]:
+    """Scrapes fighter rows from alphabetical fighter listing pages"""
+    print('Scraping fighters listing from ufcstats.com')
+    rows = scrape_listing_pages(client, ascii_lowercase, concurrency)
+    write_urls_to_csv(FIGHTER_URLS, [row.fighter_url for row in rows])
+    print(len(rows), 'fighters found in listing')
+    return rows
+
+
+def is_record_changed(row: FighterRow, scraped_row: FighterRow) -> bool:
+    """Checks W/L/D record of fighter changed since last scraping"""
+    return (row.fighter_w, row.fighter_l, row.fighter_d) != (
+        scraped_row.fighter_w,
+        scraped_row.fighter_l,
+        scraped_row.fighter_d,
+    )
+
+
+def get_failed_urls() -> set[str]:
+    """Urls of fighters which profile pages failed to be scraped before"""
+    if not FIGHTER_FAILED_URLS.exists():
+        return set()
+    return set(get_urls(FIGHTER_FAILED_URLS))
+
+
+def save_failed_urls(failed: set[str], urls: list[str], scraped: set[str]) -> None:
+    """Keeps urls of profiles failed to be scraped again, fetched ones are dropped"""
+    failed = (failed - set(urls)) | (set(urls) - scraped)
+    write_urls_to_csv(FIGHTER_FAILED_URLS, sorted(failed))
+
+
+def get_fight_fighter_urls(fight_urls: list[str], scraped: set[str]) -> list[str]:
+    """
+    Urls of fighters of given fights, and of any scraped fight whose fighter
+    is not scraped yet
+    """
+    fight_urls_set = set(fight_urls)
+    urls: dict[str, None] = {}
+    with open_table('fights') as fights:
+        for row in fights.rows():
+            for url in (row.f_1_url, row.f_2_url):
+                if url is not None and (
+                    row.fight_url in fight_urls_set or url not in scraped
+                ):
+                    urls[url] = None
+    return list(urls)
+
+
+def get_listing_letters(profile: FighterRow) -> set[str]:
+    """
+    Letters of listing pages fighter may be listed on. Listing is by the
+    first letter of last name, which profile name doesn't tell apart from
+    middle names, so each name but the first one gives a letter
+    """
+    words = f'{profile.fighter_f_name or ""} {profile.fighter_l_name or ""}'.split()
+    return {word[0].lower() for word in words[1:] or words} & set(ascii_lowercase)
+
+
+def get_listing_rows(
+    client: HttpClient,
+    profiles: dict[str, FighterRow],
+    concurrency: int = CONCURRENCY,
+) -> dict[str, FighterRow]:
+    """
+    Listing rows of fighters of profiles by their urls. Pages of letters
+    of their names are scraped first, the rest only if some fighter is missed
+    """
+    letters = sorted(
+        {
+            letter
+            for profile in profiles.values()
+            for letter in get_listing_letters(profile)
+        }
+    )
+    rest = sorted(set(ascii_lowercase) - set(letters))
+    rows: dict[str, FighterRow] = {}
+    for page_letters in (letters, rest):
+        if not page_letters or set(profiles) <= set(rows):
+            continue
+        print(f'Scraping fighters listing of {", ".join(page_letters)}')
+        for row in scrape_listing_pages(client, page_letters, concurrency):
+            if row.fighter_url in profiles:
+                rows[row.fighter_url] = row
+    return rows
+
+
+def refresh_fighters(
+    client: HttpClient,
+    fight_urls: list[str],
+    concurrency: int = CONCURRENCY,
+) -> None:
+    """
+    Refreshes in 'ufc_fighter_data' only fighters of given fights from
+    their profile pages. Listing pages are scraped only for rows of new
+    fighters, so their rows are the same as rows of full run
+    """
+    with open_table('fighters') as table:
+        scraped = {row.fighter_url: row for row in table.rows()}
+    failed = get_failed_urls()
+    urls = get_fight_fighter_urls(fight_urls, set(scraped))
+    urls += [url for url in sorted(failed) if url in scraped and url not in urls]
+
+    print(f'Scraping {len(urls)} fighter profiles...')
+    profiles: dict[str, FighterRow] = {}
+    urls_scraped = scrape_pages(
+        client,
+        urls,
+        parse_fighter_page,
+        lambda profile: profiles.update({profile.fighter_url: profile}),
+        concurrency,
+    )
+    save_failed_urls(failed, urls, set(profiles))
+
+    new_profiles = {
+        url: profile for url, profile in profiles.items() if url not in scraped
+    }
+    listing_rows = (
+        get_listing_rows(client, new_profiles, concurrency) if new_profiles else {}
+    )
+    for url, profile in profiles.items():
+        if url in listing_rows:
+            row = listing_rows[url]
+            row.fighter_dob = profile.fighter_dob
+            row.fighter_nc_dq = profile.fighter_nc_dq
+        elif url in scraped:
+            # Names of fighter are kept as listing gave them
+            row = replace(
+                profile,
+                fighter_f_name=scraped[url].fighter_f_name,
+                fighter_l_name=scraped[url].fighter_l_name,
+                fighter_nickname=scraped[url].fighter_nickname,
+            )
+        else:
+            print(f'Fighter is not in listing, saved from profile: {url}')
+            row = profile
+        scraped[url] = row
+
+    # Refreshed fighters keep their place, new ones are appended
+    rows = list(scraped.values())
+    with open_table('fighters') as table:
+        table.replace_rows(rows)
+    write_urls_to_csv(FIGHTER_URLS, list(scraped))
+    print(f'{urls_scraped}/{len(urls)} fighter profiles scraped successfully')
+    print(f'{len(rows)} fighters saved')
+
+
+def scrape_fighters(
+    client: HttpClient,
+    concurrency: int = CONCURRENCY,
+    fight_urls: list[str] | None = None,
+) -> None:
+    """
+    Scrapes fighters table from listing pages into 'ufc_fighter_data'.
+    Profile pages are fetched only for DOB and NC of new or changed fighters.
+    With fight urls of delta run only fighters of those fights are refreshed
+    """
+    if fight_urls is not None:
+        refresh_fighters(client, fight_urls, concurrency)
+        return
 
-    if len(urls) == 0:
-        print('Fighter data already scraped.')
+    rows = get_fighter_listing(client, concurrency)
+    if len(rows) == 0:
+        print('Empty fighters listing')
         return
 
-    create_csv_file(FIGHTER_DATA_PATH, FIGHTER_TABLE_ROWS)
-    urls_scraped = 0
-    print(f'Scraping {len(urls)} fighters...')
-
-    with open(FIGHTER_DATA_PATH, 'a+') as f:
-        writer = csv.writer(f)
-
-        for url in urls:
-
-            solver = HttpSolver()
-            print(f'Scrapes {url}')
-
-            while True:
-                try:
-                    response = requests.get(url)
-                    if response.status_code == 429:
-                        if solver.is_completely_429():
-                            raise HttpException('429')
-
-                    fighter_soup = bs4.BeautifulSoup(response.text, 'lxml')
-
-                    name = fighter_soup.select('span')[0].text.split()
-                    nickname = fighter_soup.select('p.b-content__Nickname')[0]
-                    details = fighter_soup.select('li.b-list__box-list-item')
-                    record = (
-                        fighter_soup.select('span.b-content__title-record')[0]
-                        .text.split(':')[1]
-                        .strip()
-                        .split('-')
-                    )
-
-                    fighter_f_name = name[0]
-                    fighter_l_name = parse_l_name(name)
-                    fighter_nickname = parse_nickname(nickname)
-                    fighter_height_cm = parse_height(details[0])
-                    fighter_weight_lbs = parse_weight(details[1])
-                    fighter_reach_cm = parse_reach(details[2])
-                    fighter_stance = parse_stance(details[3])
-                    fighter_dob = parse_dob(details[4])
-                    fighter_w = record[0]
-                    fighter_l = record[1]
-                    fighter_d = record[-1][0] if len(record[-1]) > 1 else record[-1]
-                    fighter_nc_dq = (
-                        record[-1].split('(')[-1][0] if len(record[-1]) > 1 else 'NULL'
-                    )
-
-                    # Adds new row to csv file
-                    writer.writerow(
-                        [
-                            fighter_f_name.strip(),
-                            fighter_l_name.strip(),
-                            fighter_nickname,
-                            fighter_height_cm,
-                            fighter_weight_lbs,
-                            fighter_reach_cm,
-                            fighter_stance,
-                            fighter_dob[0:10],
-                            fighter_w,
-                            fighter_l,
-                            fighter_d,
-                            fighter_nc_dq,
-                            url,
-                        ]
-                    )
-
-                    urls_scraped += 1
-                    time.sleep(SHORT_TIMOUT)
-                    break
-
-                except IndexError as e:
-                    print(f'Error scraping fighter page: {url}')
-                    print(f'Error details: {e}')
-                    break
-
-                except ConnectionError:
-                    if solver.is_completely_connection_lost():
-                        raise HttpException('Connection lost')
-                    continue
-
-    print(f'{urls_scraped}/{len(urls)} fighters scraped successfully')
+    with open_table('fighters') as table:
+        scraped = {row.fighter_url: row for row in table.rows()}
+    failed = get_failed_urls()
+    urls = []
+    for row in rows:
+        scraped_row = scraped.pop(row.fighter_url, None)
+        # Fighter keeps scraped DOB and NC until its profile is scraped again
+        if scraped_row is not None:
+            row.fighter_dob = scraped_row.fighter_dob
+            row.fighter_nc_dq = scraped_row.fighter_nc_dq
+        if (
+            scraped_row is None
+            or row.fighter_url in failed
+            or is_record_changed(row, scraped_row)
+        ):
+            urls.append(row.fighter_url)
+
+    print(f'Scraping {len(urls)} fighter profiles...')
+    profiles: dict[str, FighterRow] = {}
+    urls_scraped = scrape_pages(
+        client,
+        urls,
+        parse_fighter_page,
+        lambda profile: profiles.update({profile.fighter_url: profile}),
+        concurrency,
+    )
+    save_failed_urls(failed, urls, set(profiles))
+    for row in rows:
+        profile = profiles.get(row.fighter_url)
+        if profile is not None:
+            row.fighter_dob = profile.fighter_dob
+            row.fighter_nc_dq = profile.fighter_nc_dq
+
+    # Keeps fighters which are gone from listing
+    rows.extend(scraped.values())
+    with open_table('fighters') as table:
+        table.replace_rows(rows)
+    print(f'{urls_scraped}/{len(urls)} fighter profiles scraped successfully')
+    print(f'{len(rows)} fighters saved')
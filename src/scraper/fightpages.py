@@ -0,0 +1,115 @@
+from collections.abc import Callable
+
+import bs4
+
+from scraper.client import HttpClient
+from scraper.constants import (
+    CONCURRENCY,
+    FIGHT_URLS,
+    PARSER_BACKEND,
+)
+from scraper.fights import FIGHT_PAGE, parse_fight_soup, parse_fight_texts
+from scraper.fightstats import parse_fightstats_soup, parse_fightstats_texts
+from scraper.pipeline import scrape_pages
+from scraper.rows import FightRow, FightStatRow
+from scraper.storage import Table, open_table
+from scraper.tree import parse_tree
+from scraper.utils import get_urls
+
+
+def parse_fight_row(
+    url: str,
+    parse: Callable[[], FightRow | None],
+) -> FightRow | None:
+    """Fight row of page, page missing its details gives None"""
+    try:
+        return parse()
+    except (AttributeError, IndexError, TypeError, ValueError):
+        # Backends fail on different elements, so error is not printed
+        print(f'Error scraping fight: {url}')
+        return None
+
+
+def parse_fight_and_stats_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> tuple[FightRow | None, list[FightStatRow] | None] | None:
+    """
+    Parses fight page once into fight row and fightstats rows. Rows of
+    one table are kept if rows of other fail, page without any gives None
+    """
+    if backend == 'lxml':
+        # Fight page selectors take fightstats elements too
+        page = FIGHT_PAGE.texts(parse_tree(html))
+        fight_row = parse_fight_row(url, lambda: parse_fight_texts(url, page))
+        fightstats_rows = parse_fightstats_texts(url, page)
+    else:
+        fight_soup = bs4.BeautifulSoup(html, 'lxml')
+        fight_row = parse_fight_row(url, lambda: parse_fight_soup(url, fight_soup))
+        fightstats_rows = parse_fightstats_soup(url, fight_soup)
+    if fight_row is None and fightstats_rows is None:
+        return None
+    return fight_row, fightstats_rows
+
+
+def scrape_fight_urls(
+    client: HttpClient,
+    urls: list[str],
+    fights_scraped: Table[FightRow],
+    fightstats_scraped: Table[FightStatRow],
+    concurrency: int = CONCURRENCY,
+    parse: Callable[
+        [str, str], tuple[FightRow | None, list[FightStatRow] | None] | None
+    ] = parse_fight_and_stats_page,
+) -> tuple[int, int]:
+    """
+    Scrapes fight pages of urls into fights and fightstats tables, rows
+    already present in one of tables are not written twice. Returns numbers
+    of written fights and fightstats
+    """
+    counts = {'fights': 0, 'fightstats': 0}
+
+    def write(rows: tuple[FightRow | None, list[FightStatRow] | None]) -> None:
+        fight_row, fightstats_rows = rows
+        if fight_row is not None and fight_row.fight_url not in fights_scraped:
+            fights_scraped.write_rows([fight_row], fight_row.fight_url)
+            counts['fights'] += 1
+        if fightstats_rows is not None:
+            url = fightstats_rows[0].fight_url
+            if url not in fightstats_scraped:
+                fightstats_scraped.write_rows(fightstats_rows, url)
+                counts['fightstats'] += 1
+
+    scrape_pages(client, urls, parse, write, concurrency)
+    return counts['fights'], counts['fightstats']
+
+
+def scrape_fight_pages(client: HttpClient, concurrency: int = CONCURRENCY) -> None:
+    """
+    Scrapes each fight page once and appends to both 'ufc_fight_data.csv'
+    and 'ufc_fight_stat_data.csv'. Rows already present in one of files
+    are not written twice, so files behind each other are resumed correctly
+    """
+
+    with (
+        open_table('fights') as fights_scraped,
+        open_table('fightstats') as fightstats_scraped,
+    ):
+        urls = [
+            url
+            for url in get_urls(FIGHT_URLS)
+            if url not in fights_scraped or url not in fightstats_scraped
+        ]
+
+        if len(urls) == 0:
+            print('Fight and fightstats data already scraped.')
+            return
+
+        print(f'Scraping {len(urls)} fight pages...')
+        fights, fightstats = scrape_fight_urls(
+            client, urls, fights_scraped, fightstats_scraped, concurrency
+        )
+
+    print(f'{fights}/{len(urls)} fights scraped successfully')
+    print(f'{fightstats}/{len(urls)} fightstats scraped successfully')
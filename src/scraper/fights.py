@@ -1,24 +1,35 @@
-import csv
 import re
-import time
 
 import bs4
-import requests
-from requests.exceptions import ConnectionError
 
+from scraper.client import HttpClient
 from scraper.constants import (
-    FIGHT_DATA_PATH,
-    FIGHT_FIELD,
-    FIGHT_TABLE_ROWS,
+    CONCURRENCY,
     FIGHT_URLS,
-    SHORT_TIMOUT,
+    PARSER_BACKEND,
 )
-from scraper.utils import (
-    HttpException,
-    HttpSolver,
-    create_csv_file,
-    filter_duplicate_urls,
-    get_urls,
+from scraper.pipeline import scrape_pages
+from scraper.rows import FightRow
+from scraper.storage import open_table
+from scraper.tree import Selectors, parse_tree
+from scraper.utils import get_urls
+
+WEIGHT_CLASS = re.compile(r'\w*weight')
+FINISH_TIME = re.compile(r'\d:\d\d')
+
+# Elements of fight page for fight and fightstats rows
+FIGHT_PAGE = Selectors(
+    {
+        'event_name': ('h2', None),
+        'overview': ('i', 'b-fight-details__text-item'),
+        'result': ('i', 'b-fight-details__text-item_first'),
+        'result_details': ('p', 'b-fight-details__text'),
+        'fight_details': ('p', 'b-fight-details__table-text'),
+        'fight_type': ('i', 'b-fight-details__fight-title'),
+        'win_lose': ('i', 'b-fight-details__person-status'),
+        'person_links': ('a', 'b-fight-details__person-link'),
+        'person_urls': ('a', 'b-fight-details__person-link', 'href'),
+    }
 )
 
 
@@ -41,29 +52,40 @@ def get_fighters(fight_details, fight_soup):
         )
 
 
+def get_fighter_urls(person_urls: list[str]) -> tuple[str, str]:
+    """Urls of both fighters from fighter links of fight page"""
+    urls = [url or 'NULL' for url in person_urls[:2]]
+    urls += ['NULL'] * (2 - len(urls))
+    return urls[0], urls[1]
+
+
 def get_title_fight(fight_type) -> str:
     """Checks if fight is title fight"""
     return 'T' if 'Title' in fight_type[0].text else 'F'
 
 
-def get_weight_class(fight_type) -> str:
-    """Scrapes weight class of fight"""
-    if 'Light Heavyweight' in fight_type[0].text.strip():
+def convert_weight_class(fight_title: str) -> str:
+    """Converts fight title to weight class of fight"""
+    fight_title = fight_title.strip()
+    if 'Light Heavyweight' in fight_title:
         return 'Light Heavyweight'
 
-    if 'Women' in fight_type[0].text.strip():
-        return "Women's " + re.findall(r'\w*weight', fight_type[0].text.strip())[0]
+    weight_classes = WEIGHT_CLASS.findall(fight_title)
+    if 'Women' in fight_title:
+        return "Women's " + weight_classes[0]
 
-    if 'Catch Weight' in fight_type[0].text.strip():
+    if 'Catch Weight' in fight_title:
         return 'Catch Weight'
 
-    if 'Open Weight' in fight_type[0].text.strip():
+    if 'Open Weight' in fight_title:
         return 'Open Weight'
 
-    try:
-        return re.findall(r'\w*weight', fight_type[0].text.strip())[0]
-    except Exception:
-        return 'NULL'
+    return weight_classes[0] if weight_classes else 'NULL'
+
+
+def get_weight_class(fight_type) -> str:
+    """Scrapes weight class of fight"""
+    return convert_weight_class(fight_type[0].text)
 
 
 def get_gender(fight_type) -> str:
@@ -86,102 +108,153 @@ def get_result(select_result, select_result_details):
     )
 
 
-def scrape_fights() -> None:  # noqa: C901
+def parse_fight_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> FightRow | None:
+    """Parses fight page into a row of 'ufc_fight_data'"""
+    if backend == 'lxml':
+        return parse_fight_texts(url, FIGHT_PAGE.texts(parse_tree(html)))
+    return parse_fight_soup(url, bs4.BeautifulSoup(html, 'lxml'))
+
+
+def parse_fight_soup(url: str, fight_soup: bs4.BeautifulSoup) -> FightRow | None:
+    """Parses fight page soup into a row of 'ufc_fight_data'"""
+    # Define key select statements
+    overview = fight_soup.select('i.b-fight-details__text-item')
+    select_result = fight_soup.select('i.b-fight-details__text-item_first')
+    select_result_details = fight_soup.select('p.b-fight-details__text')
+    fight_details = fight_soup.select('p.b-fight-details__table-text')
+    fight_type = fight_soup.select('i.b-fight-details__fight-title')
+    win_lose = fight_soup.select('i.b-fight-details__person-status')
+    f_1_url, f_2_url = get_fighter_urls(
+        [
+            href if isinstance(href := link.get('href'), str) else ''
+            for link in fight_soup.select('a.b-fight-details__person-link')
+        ]
+    )
+
+    # Scrape fight details
+    event_name = fight_soup.h2.text
+    try:
+        referee = get_referee(overview)
+        f_1, f_2 = get_fighters(fight_details, fight_soup)
+    except AttributeError as e:
+        print(f'Skip this fight and move to the next one: {e}')
+        return None
+    num_rounds = overview[2].text.split(':')[1].strip()[0]
+    title_fight = get_title_fight(fight_type)
+    weight_class = get_weight_class(fight_type)
+    gender = get_gender(fight_type)
+    result, result_details = get_result(select_result, select_result_details)
+    finish_round = overview[0].text.split(':')[1]
+    finish_time = re.findall(r'\d:\d\d', overview[1].text)[0]
+    if (win_lose[0].text.strip() == 'W') | (win_lose[1].text.strip() == 'W'):
+        if win_lose[0].text.strip() == 'W':
+            winner, winner_url = f_1, f_1_url
+        else:
+            winner, winner_url = f_2, f_2_url
+    else:
+        winner, winner_url = 'NULL', 'NULL'
+
+    return FightRow.from_values(
+        [
+            event_name.strip(),
+            referee.strip(),
+            f_1.strip(),
+            f_2.strip(),
+            winner.strip(),
+            num_rounds.strip(),
+            title_fight,
+            weight_class,
+            gender,
+            result.strip(),
+            result_details.strip(),
+            finish_round.strip(),
+            finish_time.strip(),
+            f_1_url,
+            f_2_url,
+            winner_url,
+            url,
+        ]
+    )
+
+
+def parse_fight_texts(url: str, page: dict[str, list[str]]) -> FightRow | None:
+    """
+    Parses texts of fight page elements into a row of 'ufc_fight_data',
+    gives the same row as parse_fight_soup
+    """
+    overview = page['overview']
+    event_name = page['event_name'][0]
+    try:
+        referee = overview[3].split(':')[1]
+    except IndexError:
+        referee = 'NULL'
+    names = page['fight_details']
+    if len(names) < 2:
+        names = page['person_links']
+    f_1, f_2 = names[0], names[1]
+    num_rounds = overview[2].split(':')[1].strip()[0]
+    fight_title = page['fight_type'][0]
+    method = page['result'][0].split(':')[1]
+    if 'Decision' in method:
+        result, result_details = method.split()[0], method.split()[-1]
+    else:
+        result, result_details = method, page['result_details'][1].split(':')[-1]
+    finish_round = overview[0].split(':')[1]
+    finish_time = FINISH_TIME.findall(overview[1])[0]
+    f_1_url, f_2_url = get_fighter_urls(page['person_urls'])
+    win_lose = [page['win_lose'][0].strip(), page['win_lose'][1].strip()]
+    if win_lose[0] == 'W':
+        winner, winner_url = f_1, f_1_url
+    elif win_lose[1] == 'W':
+        winner, winner_url = f_2, f_2_url
+    else:
+        winner, winner_url = 'NULL', 'NULL'
+
+    return FightRow.from_values(
+        [
+            event_name.strip(),
+            referee.strip(),
+            f_1.strip(),
+            f_2.strip(),
+            winner.strip(),
+            num_rounds.strip(),
+            'T' if 'Title' in fight_title else 'F',
+            convert_weight_class(fight_title),
+            'F' if 'Women' in fight_title else 'M',
+            result.strip(),
+            result_details.strip(),
+            finish_round.strip(),
+            finish_time.strip(),
+            f_1_url,
+            f_2_url,
+            winner_url,
+            url,
+        ]
+    )
+
+
+def scrape_fights(client: HttpClient, concurrency: int = CONCURRENCY) -> None:
     """Scrapes details of each UFC fight and appends to file 'ufc_fight_data.csv'"""
 
-    urls = get_urls(FIGHT_URLS)
-    urls = filter_duplicate_urls(FIGHT_DATA_PATH, urls, FIGHT_FIELD)
-
-    if len(urls) == 0:
-        print('Fight data already scraped.')
-        return
-
-    create_csv_file(FIGHT_DATA_PATH, FIGHT_TABLE_ROWS)
-
-    print(f'Scraping {len(urls)} fights...')
-    urls_scraped = 0
-
-    with open(FIGHT_DATA_PATH, 'a+') as f:
-        writer = csv.writer(f)
-
-        for url in urls:
-
-            solver = HttpSolver()
-            print(f'Scrapes {url}')
-
-            while True:
-                try:
-                    response = requests.get(url)
-                    if response.status_code == 429:
-                        if solver.is_completely_429():
-                            raise HttpException('429')
-
-                    fight_soup = bs4.BeautifulSoup(response.text, 'lxml')
-
-                    # Define key select statements
-                    overview = fight_soup.select('i.b-fight-details__text-item')
-                    select_result = fight_soup.select(
-                        'i.b-fight-details__text-item_first'
-                    )
-                    select_result_details = fight_soup.select('p.b-fight-details__text')
-                    fight_details = fight_soup.select('p.b-fight-details__table-text')
-                    fight_type = fight_soup.select('i.b-fight-details__fight-title')
-                    win_lose = fight_soup.select('i.b-fight-details__person-status')
-
-                    # Scrape fight details
-                    event_name = fight_soup.h2.text
-                    try:
-                        referee = get_referee(overview)
-                        f_1, f_2 = get_fighters(fight_details, fight_soup)
-                    except AttributeError as e:
-                        print(f'Skip this fight and move to the next one: {e}')
-                        break
-                    num_rounds = overview[2].text.split(':')[1].strip()[0]
-                    title_fight = get_title_fight(fight_type)
-                    weight_class = get_weight_class(fight_type)
-                    gender = get_gender(fight_type)
-                    result, result_details = get_result(
-                        select_result, select_result_details
-                    )
-                    finish_round = overview[0].text.split(':')[1]
-                    finish_time = re.findall(r'\d:\d\d', overview[1].text)[0]
-                    if (win_lose[0].text.strip() == 'W') | (
-                        win_lose[1].text.strip() == 'W'
-                    ):
-                        if win_lose[0].text.strip() == 'W':
-                            winner = f_1
-                        else:
-                            winner = f_2
-                    else:
-                        winner = 'NULL'
-
-                    # Adds row containing scraped fight details to csv file
-                    writer.writerow(
-                        [
-                            event_name.strip(),
-                            referee.strip(),
-                            f_1.strip(),
-                            f_2.strip(),
-                            winner.strip(),
-                            num_rounds.strip(),
-                            title_fight,
-                            weight_class,
-                            gender,
-                            result.strip(),
-                            result_details.strip(),
-                            finish_round.strip(),
-                            finish_time.strip(),
-                            url,
-                        ]
-                    )
-
-                    urls_scraped += 1
-                    time.sleep(SHORT_TIMOUT)
-                    break
-
-                except ConnectionError:
-                    if solver.is_completely_connection_lost():
-                        raise HttpException('Connection lost')
-                    continue
+    with open_table('fights') as scraped:
+        urls = scraped.filter(get_urls(FIGHT_URLS))
+
+        if len(urls) == 0:
+            print('Fight data already scraped.')
+            return
+
+        print(f'Scraping {len(urls)} fights...')
+
+        urls_scraped = scrape_pages(
+            client,
+            urls,
+            parse_fight_page,
+            lambda row: scraped.write_rows([row], row.fight_url),
+            concurrency,
+        )
 
     print(f'{urls_scraped}/{len(urls)} links scraped successfully')
@@ -1,22 +1,25 @@
-import csv
-import time
-
 import bs4
-import requests
 
+from scraper.client import HttpClient
 from scraper.constants import (
-    FIGHT_FIELD,
-    FIGHTSTATS_DATA_PATH,
-    FIGHTSTATS_TABLE_ROWS,
+    CONCURRENCY,
     FIGHTSTATS_URLS,
-    SHORT_TIMOUT,
+    PARSER_BACKEND,
 )
-from scraper.utils import (
-    HttpException,
-    HttpSolver,
-    create_csv_file,
-    filter_duplicate_urls,
-    get_urls,
+from scraper.fights import get_fighter_urls
+from scraper.pipeline import scrape_pages
+from scraper.rows import FightStatRow
+from scraper.storage import open_table
+from scraper.tree import Selectors, parse_tree
+from scraper.utils import get_urls
+
+# Elements of fight page for fightstats rows
+FIGHTSTATS_PAGE = Selectors(
+    {
+        'fight_details': ('p', 'b-fight-details__table-text'),
+        'person_links': ('a', 'b-fight-details__person-link'),
+        'person_urls': ('a', 'b-fight-details__person-link', 'href'),
+    }
 )
 
 
@@ -105,7 +108,6 @@ def get_grappling_stats(
 ) -> tuple[str, str, str, str, str] | None:
     """Scrapes grappling stats for specified fighter"""
     if fighter == 1:
-
         try:
             return (  # Takedowns attempted
                 fight_stats[10].text.split(' of ')[1],
@@ -133,7 +135,6 @@ def get_grappling_stats(
             )
 
     if fighter == 2:
-
         try:
             return (  # Takedowns attempted
                 fight_stats[11].text.split(' of ')[1],
@@ -163,120 +164,166 @@ def get_grappling_stats(
     return None
 
 
-def scrape_fightstats() -> None:
+def get_fighter_row(
+    fight_soup,
+    fight_stats,
+    fighter: int,
+    url: str,
+) -> FightStatRow:
+    """Scrapes fight stats row for specified fighter"""
+    fighter_name = get_fighter_id(fight_soup, fight_stats, fighter)
+    (
+        knockdowns,
+        total_strikes_att,
+        total_strikes_succ,
+        sig_strikes_att,
+        sig_strikes_succ,
+    ) = get_striking_stats(fight_stats, fighter)
+    (
+        takedown_att,
+        takedown_succ,
+        submission_att,
+        reversals,
+        ctrl_time,
+    ) = get_grappling_stats(fight_stats, fighter)
+    fighter_url = get_fighter_urls(
+        [
+            link.get('href', '')
+            for link in fight_soup.select('a.b-fight-details__person-link')
+        ]
+    )[fighter - 1]
+
+    return FightStatRow.from_values(
+        [
+            fighter_name.strip(),
+            knockdowns.strip(),
+            total_strikes_att.strip(),
+            total_strikes_succ.strip(),
+            sig_strikes_att.strip(),
+            sig_strikes_succ.strip(),
+            takedown_att.strip(),
+            takedown_succ.strip(),
+            submission_att.strip(),
+            reversals.strip(),
+            ctrl_time.strip(),
+            fighter_url,
+            url,
+        ]
+    )
+
+
+def parse_fightstats_page(
+    url: str,
+    html: str,
+    backend: str = PARSER_BACKEND,
+) -> list[FightStatRow] | None:
+    """Parses fight page into rows of 'ufc_fight_stat_data' for both fighters"""
+    if backend == 'lxml':
+        return parse_fightstats_texts(url, FIGHTSTATS_PAGE.texts(parse_tree(html)))
+    return parse_fightstats_soup(url, bs4.BeautifulSoup(html, 'lxml'))
+
+
+def parse_fightstats_soup(
+    url: str,
+    fight_soup: bs4.BeautifulSoup,
+) -> list[FightStatRow] | None:
+    """Parses fight page soup into rows of 'ufc_fight_stat_data'"""
+    try:
+        fight_stats = fight_soup.select('p.b-fight-details__table-text')
+        return [
+            get_fighter_row(fight_soup, fight_stats, 1, url),
+            get_fighter_row(fight_soup, fight_stats, 2, url),
+        ]
+    except IndexError as e:
+        print(f'Error scraping fightstate: {url}')
+        print(f'Error details: {e}')
+        return None
+
+
+def get_fighter_texts_row(
+    page: dict[str, list[str]],
+    fighter: int,
+    url: str,
+) -> FightStatRow:
+    """Builds fight stats row of fighter 0 or 1 from texts of fight page"""
+    fight_stats = page['fight_details']
+    if len(fight_stats) > fighter:
+        fighter_name = fight_stats[fighter]
+    else:
+        fighter_name = page['person_links'][fighter]
+
+    try:
+        total_strikes = fight_stats[8 + fighter].split(' of ')
+        sig_strikes = fight_stats[4 + fighter].split(' of ')
+        striking = [
+            fight_stats[2 + fighter],
+            total_strikes[1],
+            total_strikes[0],
+            sig_strikes[1],
+            sig_strikes[0],
+        ]
+    except IndexError:
+        striking = ['NULL'] * 5
+
+    try:
+        takedowns = fight_stats[10 + fighter].split(' of ')
+        grappling = [
+            takedowns[1],
+            takedowns[0],
+            fight_stats[14 + fighter],
+            fight_stats[16 + fighter],
+            fight_stats[18 + fighter],
+        ]
+    except IndexError:
+        grappling = ['NULL'] * 5
+
+    return FightStatRow.from_values(
+        [
+            fighter_name.strip(),
+            *(stat.strip() for stat in striking + grappling),
+            get_fighter_urls(page['person_urls'])[fighter],
+            url,
+        ]
+    )
+
+
+def parse_fightstats_texts(
+    url: str,
+    page: dict[str, list[str]],
+) -> list[FightStatRow] | None:
+    """
+    Parses texts of fight page elements into rows of 'ufc_fight_stat_data',
+    gives the same rows as parse_fightstats_soup
+    """
+    try:
+        return [
+            get_fighter_texts_row(page, 0, url),
+            get_fighter_texts_row(page, 1, url),
+        ]
+    except IndexError as e:
+        print(f'Error scraping fightstate: {url}')
+        print(f'Error details: {e}')
+        return None
+
+
+def scrape_fightstats(client: HttpClient, concurrency: int = CONCURRENCY) -> None:
     """Scrapes details of each UFC fight and appends to file 'ufc_fight_data.csv'"""
 
-    urls = get_urls(FIGHTSTATS_URLS)
-    urls = filter_duplicate_urls(FIGHTSTATS_DATA_PATH, urls, FIGHT_FIELD)
-
-    if len(urls) == 0:
-        print('Fightstats data already scraped.')
-        return
-
-    create_csv_file(FIGHTSTATS_DATA_PATH, FIGHTSTATS_TABLE_ROWS)
-
-    print(f'Scraping {len(urls)} fightstats...')
-    urls_scraped = 0
-
-    with open(FIGHTSTATS_DATA_PATH, 'a+') as f:
-        writer = csv.writer(f)
-
-        for url in urls:
-
-            solver = HttpSolver()
-            print(f'Scrapes {url}')
-
-            while True:
-                try:
-                    response = requests.get(url)
-                    if response.status_code == 429:
-                        if solver.is_completely_429():
-                            raise HttpException('429')
-
-                    fight_soup = bs4.BeautifulSoup(response.text, 'lxml')
-                    fight_stats = fight_soup.select('p.b-fight-details__table-text')
-
-                    # Scrape fight stats for first fighter
-                    fighter_name = get_fighter_id(fight_soup, fight_stats, 1)
-                    (
-                        knockdowns,
-                        total_strikes_att,
-                        total_strikes_succ,
-                        sig_strikes_att,
-                        sig_strikes_succ,
-                    ) = get_striking_stats(fight_stats, 1)
-                    (
-                        takedown_att,
-                        takedown_succ,
-                        submission_att,
-                        reversals,
-                        ctrl_time,
-                    ) = get_grappling_stats(fight_stats, 1)
-
-                    # Add fight stats for first fighter to csv
-                    writer.writerow(
-                        [
-                            fighter_name.strip(),
-                            knockdowns.strip(),
-                            total_strikes_att.strip(),
-                            total_strikes_succ.strip(),
-                            sig_strikes_att.strip(),
-                            sig_strikes_succ.strip(),
-                            takedown_att.strip(),
-                            takedown_succ.strip(),
-                            submission_att.strip(),
-                            reversals.strip(),
-                            ctrl_time.strip(),
-                            url,
-                        ]
-                    )
-
-                    # Scrape fight stats for second fighter
-                    fighter_name = get_fighter_id(fight_soup, fight_stats, 2)
-                    (
-                        knockdowns,
-                        total_strikes_att,
-                        total_strikes_succ,
-                        sig_strikes_att,
-                        sig_strikes_succ,
-                    ) = get_striking_stats(fight_stats, 2)
-                    (
-                        takedown_att,
-                        takedown_succ,
-                        submission_att,
-                        reversals,
-                        ctrl_time,
-                    ) = get_grappling_stats(fight_stats, 2)
-
-                    # Add fight stats for second fighter to csv
-                    writer.writerow(
-                        [
-                            fighter_name.strip(),
-                            knockdowns.strip(),
-                            total_strikes_att.strip(),
-                            total_strikes_succ.strip(),
-                            sig_strikes_att.strip(),
-                            sig_strikes_succ.strip(),
-                            takedown_att.strip(),
-                            takedown_succ.strip(),
-                            submission_att.strip(),
-                            reversals.strip(),
-                            ctrl_time.strip(),
-                            url,
-                        ]
-                    )
-
-                    urls_scraped += 1
-                    time.sleep(SHORT_TIMOUT)
-                    break
-                except IndexError as e:
-                    print(f'Error scraping fightstate: {url}')
-                    print(f'Error details: {e}')
-                    break
-
-                except ConnectionError:
-                    if solver.is_completely_connection_lost():
-                        raise HttpException('Connection lost')
-                    continue
+    with open_table('fightstats') as scraped:
+        urls = scraped.filter(get_urls(FIGHTSTATS_URLS))
+
+        if len(urls) == 0:
+            print('Fightstats data already scraped.')
+            return
+
+        print(f'Scraping {len(urls)} fightstats...')
+
+        urls_scraped = scrape_pages(
+            client,
+            urls,
+            parse_fightstats_page,
+            lambda rows: scraped.write_rows(rows, rows[0].fight_url),
+            concurrency,
+        )
 
     print(f'{urls_scraped}/{len(urls)} links successfully scraped')
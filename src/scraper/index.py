@@ -0,0 +1,74 @@
+import csv
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TextIO
+
+from scraper.rows import Row, to_csv_row
+from scraper.utils import get_scraped_urls
+
+
+class ScrapedIndex:
+    """
+    Persistent set of urls already scraped into csv file. Urls are kept in
+    append-only key file next to csv file, so start-up doesn't read csv file
+    """
+
+    def __init__(self, file_path: Path, fieldname: str) -> None:
+        self.file_path = file_path
+        self.fieldname = fieldname
+        self.index_path = file_path.with_suffix('.idx')
+        self.urls: set[str] = set()
+        self.index_file: TextIO | None = None
+
+    def load(self) -> set[str]:
+        if not self.file_path.exists():
+            # Index of removed csv file is stale
+            self.index_path.unlink(missing_ok=True)
+            return set()
+
+        if not self.index_path.exists():
+            # Builds index once for csv file scraped before index existed
+            urls = get_scraped_urls(self.file_path, self.fieldname)
+            with open(self.index_path, 'w') as f:
+                f.writelines(f'{url}\n' for url in urls)
+            return urls
+
+        with open(self.index_path, 'r') as f:
+            return set(f.read().splitlines())
+
+    def __enter__(self) -> 'ScrapedIndex':
+        self.urls = self.load()
+        self.index_file = open(self.index_path, 'a')
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.urls
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def filter(self, urls: list[str]) -> list[str]:
+        """Ensure each url is only scraped once when script is run multiple times"""
+        return [url for url in urls if url not in self.urls]
+
+    def add(self, url: str) -> None:
+        """
+        Marks url as scraped. Must be called after its rows are flushed
+        to csv file, so broken run may only repeat the url, never lose it
+        """
+        if url in self.urls or self.index_file is None:
+            return
+        self.urls.add(url)
+        self.index_file.write(f'{url}\n')
+        self.index_file.flush()
+
+    def write_rows(self, f: TextIO, rows: Sequence[Row], url: str) -> None:
+        """Appends rows of scraped url to csv file and marks url as scraped"""
+        csv.writer(f).writerows(map(to_csv_row, rows))
+        f.flush()
+        self.add(url)
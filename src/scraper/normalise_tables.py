@@ -1,15 +1,92 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+from collections.abc import Sequence
+from pathlib import Path
+from typing import IO
+
 import pandas as pd
 
+from scraper import columnar
 from scraper.constants import (
     EVENT_COLUMNS,
     EVENT_DATA_PATH,
+    EVENT_FIGHT_URLS,
     FIGHT_COLUMNS,
     FIGHT_DATA_PATH,
     FIGHTER_COLUMNS,
     FIGHTER_DATA_PATH,
     FIGHTSTATS_COLUMNS,
     FIGHTSTATS_DATA_PATH,
+    NORMALISED_EVENT_PATH,
+    NORMALISED_FIGHT_PATH,
+    NORMALISED_FIGHTER_PATH,
+    NORMALISED_FIGHTSTATS_PATH,
+    NORMALISED_FILES_PATH,
+    NORMALISED_FORMATS,
+    NORMALISED_OFFSETS,
 )
+from scraper.rows import EventRow, FighterRow, FightRow, FightStatRow, Row, get_schema
+from scraper.storage import get_output_paths
+
+# Scraped files appended by scraper with their normalised files
+APPENDED_FILES = [
+    (EVENT_DATA_PATH, EventRow, NORMALISED_EVENT_PATH),
+    (FIGHT_DATA_PATH, FightRow, NORMALISED_FIGHT_PATH),
+    (FIGHTSTATS_DATA_PATH, FightStatRow, NORMALISED_FIGHTSTATS_PATH),
+]
+
+
+def read_scraped(
+    file: Path | IO[bytes],
+    row_class: type[Row],
+    names: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Reads scraped csv file with fixed dtypes of its rows, so types of
+    columns don't depend on values pandas infers them from
+    """
+    schema = get_schema(row_class)
+    dates = [column for column, dtype in schema.items() if dtype.startswith('datetime')]
+    table = pd.read_csv(
+        file,
+        header=None if names else 'infer',
+        names=names,
+        dtype={column: schema[column] for column in schema if column not in dates},
+        parse_dates=[column for column in dates if not names or column in names],
+    )
+    # Files of older scraper versions miss newer columns
+    return table.reindex(columns=list(schema)).astype(schema)
+
+
+def get_url_id(urls: pd.Series) -> pd.Series:
+    """Stable id of ufcstats.com page, the hash at the end of its url"""
+    return urls.astype('string').str.rsplit('/', n=1).str[-1].astype('string')
+
+
+def get_fighter_num(
+    ufc_fight_stats: pd.DataFrame,
+    scraped_fights: pd.DataFrame | None,
+) -> pd.Series:
+    """
+    Number of fighter of stats row on its fight page, 1 or 2 by fighter
+    urls of its fight. Rows without them are numbered in order of rows
+    """
+    fighter_num = ufc_fight_stats.groupby('fight_url').cumcount() + 1
+    if scraped_fights is None:
+        return fighter_num.astype('Int64')
+    fighters = scraped_fights.drop_duplicates('fight_url', keep='last').set_index(
+        'fight_url'
+    )
+    num = pd.Series(pd.NA, index=ufc_fight_stats.index, dtype='Int64')
+    for fighter, column in enumerate(['f_1_url', 'f_2_url'], 1):
+        fight_fighter_urls = ufc_fight_stats['fight_url'].map(fighters[column])
+        is_fighter = ufc_fight_stats['fighter_url'].eq(fight_fighter_urls)
+        num = num.mask(is_fighter.fillna(False).astype(bool), fighter)
+    return num.fillna(fighter_num)
 
 
 def add_primary_keys(
@@ -17,109 +94,276 @@ def add_primary_keys(
     ufc_fights: pd.DataFrame,
     ufc_fight_stats: pd.DataFrame,
     ufc_fighters: pd.DataFrame,
+    scraped_fights: pd.DataFrame | None = None,
 ) -> None:
-    """Create primary keys"""
+    """
+    Create primary keys from urls of rows, so keys of rows don't depend
+    on rows scraped before or after them. Stats of fight are numbered by
+    its fighter urls of scraped fights, as they may be appended apart
+    """
+    ufc_events['event_id'] = get_url_id(ufc_events['event_url'])
+    ufc_fights['fight_id'] = get_url_id(ufc_fights['fight_url'])
+    ufc_fighters['fighter_id'] = get_url_id(ufc_fighters['fighter_url'])
 
-    # Creates unique keys for each row in table
-    event_id = [num for num in range(1, len(ufc_events) + 1)]
-    fight_id = [num for num in range(1, len(ufc_fights) + 1)]
-    fight_stat_id = [num for num in range(1, len(ufc_fight_stats) + 1)]
-    fighter_id = [num for num in range(1, len(ufc_fighters) + 1)]
+    fighter_num = get_fighter_num(ufc_fight_stats, scraped_fights)
+    ufc_fight_stats['fight_stat_id'] = (
+        get_url_id(ufc_fight_stats['fight_url']) + '-' + fighter_num.astype('string')
+    )
 
-    # Check if primary key is already present in table
-    # If not present, adds primary key to each table
-    # (reversed so that new data will retain same primary key order)
-    if 'event_id' not in ufc_events.columns:
-        ufc_events['event_id'] = event_id[::-1]
 
-    if 'fight_id' not in ufc_fights.columns:
-        ufc_fights['fight_id'] = fight_id[::-1]
+def get_key_index(table: pd.DataFrame, column: str, key: str) -> pd.Series:
+    """Primary key of table indexed by column, the last of duplicates wins"""
+    return table.drop_duplicates(column, keep='last').set_index(column)[key]
 
-    if 'fight_stat_id' not in ufc_fight_stats.columns:
-        ufc_fight_stats['fight_stat_id'] = fight_stat_id[::-1]
 
-    if 'fighter_id' not in ufc_fighters.columns:
-        ufc_fighters['fighter_id'] = fighter_id[::-1]
+def resolve_key(
+    values: pd.Series,
+    key_index: pd.Series,
+    name: str,
+    unresolved: dict[str, int],
+) -> pd.Series:
+    """Maps values to primary keys and counts values without key"""
+    keys = values.map(key_index)
+    unresolved[name] = int((values.notna() & keys.isna()).sum())
+    return keys
 
 
-def add_foreign_key(  # noqa: C901
+def resolve_fighter(
+    urls: pd.Series,
+    names: pd.Series,
+    fighter_ids: pd.Index,
+    fighter_name_id: pd.Series,
+    name: str,
+    unresolved: dict[str, int],
+) -> pd.Series:
+    """
+    Fighter ids of fighter urls. Names are matched only for rows scraped
+    before fighter urls were, as namesakes and cut names match wrong fighter.
+    Ids of fighters missing in fighters table are kept, so rows appended
+    before their fighters are scraped get them, but are counted unresolved
+    """
+    keys = get_url_id(urls).where(urls.notna(), names.map(fighter_name_id))
+    dangling = keys.isna() | ~keys.isin(fighter_ids)
+    unresolved[name] = int(((urls.notna() | names.notna()) & dangling).sum())
+    return keys
+
+
+def add_foreign_key(
     ufc_events: pd.DataFrame,
     ufc_fights: pd.DataFrame,
     ufc_fight_stats: pd.DataFrame,
     ufc_fighters: pd.DataFrame,
-) -> None:
+    event_fights: pd.DataFrame | None = None,
+) -> dict[str, int]:
     """
-    Create dictionaries of primary keys and column in primary
-    table to match with foreign table
+    Replaces names and urls in foreign tables with primary keys of
+    primary tables. Returns number of unresolved keys by column
     """
+    unresolved: dict[str, int] = {}
 
     # Add fighter name column to ufc_fighters match with fighter names
     # in ufc_fights/ufc_fight_stats
     ufc_fighters['fighter_name'] = (
         ufc_fighters['fighter_f_name'] + ' ' + ufc_fighters['fighter_l_name']
     )
+    fighter_name_id = get_key_index(ufc_fighters, 'fighter_name', 'fighter_id')
+    fighter_ids = pd.Index(ufc_fighters['fighter_id'].dropna().unique())
 
-    # Dictionary of all event names and their corresponding ID
-    event_id_dict = {}
-    for num in range(len(ufc_events)):
-        event_id_dict[ufc_events.loc[num, 'event_name']] = ufc_events.loc[
-            num, 'event_id'
-        ]
-
-    # Dictionary of all fight urls and their corresponding ID
-    fight_url_dict = {}
-    for num in range(len(ufc_fights)):
-        fight_url_dict[ufc_fights.loc[num, 'fight_url']] = ufc_fights.loc[
-            num, 'fight_id'
-        ]
-
-    # Dictionary of all fighter names and their corresponding ID
-    fighter_id_dict = {}
-    for num in range(len(ufc_fighters)):
-        fighter_id_dict[ufc_fighters.loc[num, 'fighter_name']] = ufc_fighters.loc[
-            num, 'fighter_id'
-        ]
-
-    # Add event_id to ufc_fights if not already present
-    if 'event_id' not in ufc_fights.columns:
-        ufc_fights['event_id'] = ufc_events['event_name'].map(event_id_dict)
-
-    # Replace fighter names in ufc_fights with their fighter_id if not already changed
-    try:
-        if isinstance(ufc_fights['f_1'][0], str):
-            ufc_fights['f_1'] = ufc_fights['f_1'].map(fighter_id_dict)
-    except KeyError:
-        print(f'KeyError: "f_1", {ufc_fights.keys()}')
-
-    try:
-        if isinstance(ufc_fights['f_2'][0], str):
-            ufc_fights['f_2'] = ufc_fights['f_2'].map(fighter_id_dict)
-    except KeyError:
-        print(f'KeyError: "f_2", {ufc_fights.keys()}')
-
-    try:
-        if isinstance(ufc_fights['winner'][0], str):
-            ufc_fights['winner'] = ufc_fights['winner'].map(fighter_id_dict)
-    except KeyError:
-        print(f'KeyError: "winner", {ufc_fights.keys()}')
-
-    # Replace fighter names in ufc_fight_stats with their fighter_id
-    try:
-        if isinstance(ufc_fight_stats['fighter_id'], str):
-            ufc_fight_stats['fighter_id'] = ufc_fight_stats['fighter_id'].map(
-                fighter_id_dict
-            )
-    except KeyError:
-        print(f'KeyError: "fighter_id", {ufc_fights.keys()}')
-
-    # Add fight_id to ufc_fight_stats
-    try:
-        if 'fight_id' not in ufc_fight_stats.columns:
-            ufc_fight_stats['fight_id'] = ufc_fight_stats['fight_url'].map(
-                fight_url_dict
-            )
-    except KeyError:
-        print(f'KeyError: "fight_id", {ufc_fights.keys()}')
+    # Event of fight is known from event to fight relations scraped from event pages,
+    # fights missed in relations are matched by event name
+    event_id = ufc_fights['event_name'].map(
+        get_key_index(ufc_events, 'event_name', 'event_id')
+    )
+    if event_fights is not None:
+        fight_event_url = event_fights.drop_duplicates('fight_url').set_index(
+            'fight_url'
+        )['event_url']
+        event_id = get_url_id(ufc_fights['fight_url'].map(fight_event_url)).fillna(
+            event_id
+        )
+    ufc_fights['event_id'] = event_id
+    unresolved['fights.event_id'] = int(event_id.isna().sum())
+
+    # Replace fighter names with fighter_id of fighter urls
+    for column in ['f_1', 'f_2', 'winner']:
+        ufc_fights[column] = resolve_fighter(
+            ufc_fights[f'{column}_url'],
+            ufc_fights[column],
+            fighter_ids,
+            fighter_name_id,
+            f'fights.{column}',
+            unresolved,
+        )
+    ufc_fight_stats['fighter_id'] = resolve_fighter(
+        ufc_fight_stats['fighter_url'],
+        ufc_fight_stats['fighter_id'],
+        fighter_ids,
+        fighter_name_id,
+        'fight_stats.fighter_id',
+        unresolved,
+    )
+
+    ufc_fight_stats['fight_id'] = get_url_id(ufc_fight_stats['fight_url'])
+
+    return unresolved
+
+
+def read_appended(
+    file_path: Path,
+    row_class: type[Row],
+    offset: int,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Rows appended to scraped csv file after offset in bytes, and offset of
+    the last complete row. Offset 0 reads all rows
+    """
+    with open(file_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode()]))
+        if offset > 0:
+            f.seek(offset)
+        start = f.tell()
+        data = f.read()
+
+    # Row being appended by running scraper is left for next run
+    data = data[: data.rfind(b'\n') + 1]
+    if not data:
+        schema = get_schema(row_class)
+        return pd.DataFrame(columns=list(schema)).astype(schema), start
+    return read_scraped(io.BytesIO(data), row_class, header), start + len(data)
+
+
+def add_event_year(
+    ufc_events: pd.DataFrame,
+    ufc_fights: pd.DataFrame,
+    ufc_fight_stats: pd.DataFrame,
+    scraped_events: pd.DataFrame,
+    event_fights: pd.DataFrame | None,
+) -> None:
+    """Adds year of event of rows, columnar tables are partitioned by it"""
+    event_year = get_key_index(scraped_events, 'event_id', 'event_date').dt.year
+    ufc_events['event_year'] = ufc_events['event_date'].dt.year
+    ufc_fights['event_year'] = ufc_fights['event_id'].map(event_year)
+
+    # Stats may be appended apart from their fights
+    years = ufc_fight_stats['fight_id'].map(
+        get_key_index(ufc_fights, 'fight_id', 'event_year')
+    )
+    if event_fights is not None:
+        fight_event_id = pd.Series(
+            get_url_id(event_fights['event_url']).values,
+            index=get_url_id(event_fights['fight_url']),
+        )
+        fight_event_id = fight_event_id[~fight_event_id.index.duplicated()]
+        years = years.fillna(
+            ufc_fight_stats['fight_id'].map(fight_event_id).map(event_year)
+        )
+    ufc_fight_stats['event_year'] = years
+
+
+def get_fingerprint(file_path: Path, offset: int) -> str:
+    """Sha256 of scraped file up to offset, tells rows normalised before apart"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        left = offset
+        while left > 0 and (chunk := f.read(min(left, 1024 * 1024))):
+            digest.update(chunk)
+            left -= len(chunk)
+    return digest.hexdigest()
+
+
+def is_offset_valid(file_path: Path, offset: int, fingerprint: str | None) -> bool:
+    """
+    Checks offset is at the end of a row of the same file it was saved for.
+    File scraped again from scratch may be longer than offset, but its
+    rows before offset differ
+    """
+    if offset > os.path.getsize(file_path):
+        return False
+    if offset > 0:
+        with open(file_path, 'rb') as f:
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                return False
+    return fingerprint == get_fingerprint(file_path, offset)
+
+
+def get_offsets(
+    incremental: bool,
+    formats: Sequence[str],
+) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Offsets of scraped rows already normalised by scraped file name, and
+    sizes of normalised csv files with these rows. Tables missing in them
+    are normalised from scratch
+    """
+    if not incremental or not NORMALISED_OFFSETS.exists():
+        return {}, {}
+    saved = json.loads(NORMALISED_OFFSETS.read_text())
+    # Offsets of older versions are saved without fingerprints of scraped files
+    if 'fingerprints' not in saved:
+        return {}, {}
+    # Format added since the last run needs rows normalised before
+    if not all(path.exists() for path in get_output_paths(formats)):
+        return {}, {}
+
+    offsets, sizes = {}, {}
+    for file_path, _, path in APPENDED_FILES:
+        offset = saved['scraped'].get(file_path.name)
+        size = saved['normalised'].get(path.name)
+        if offset is None or size is None:
+            continue
+        if not is_offset_valid(
+            file_path, offset, saved['fingerprints'].get(file_path.name)
+        ):
+            print(f'{file_path.name} was scraped again, normalising it from scratch')
+            continue
+        if 'csv' in formats and (
+            not path.exists() or size > os.path.getsize(path)
+        ):
+            continue
+        offsets[file_path.name], sizes[path.name] = offset, size
+    return offsets, sizes
+
+
+def reset_normalised(offsets: dict[str, int], sizes: dict[str, int]) -> None:
+    """
+    Removes normalised tables without offsets, and cuts rows appended to
+    normalised csv files by a run broken before its offsets were saved, so
+    next run doesn't append them twice. Columnar parts are named by
+    offsets, so repeated parts overwrite themselves
+    """
+    for file_path, _, path in APPENDED_FILES:
+        if file_path.name not in offsets:
+            path.unlink(missing_ok=True)
+            for fmt in columnar.DATASET_FORMATS:
+                shutil.rmtree(
+                    columnar.get_table_path(path.stem, fmt), ignore_errors=True
+                )
+        elif path.exists() and os.path.getsize(path) > sizes[path.name]:
+            with open(path, 'r+b') as f:
+                f.truncate(sizes[path.name])
+
+
+def save_offsets(offsets: dict[str, int]) -> None:
+    """
+    Saves offsets with fingerprints of scraped files and sizes of
+    normalised csv files in one replaced file
+    """
+    fingerprints = {
+        file_path.name: get_fingerprint(file_path, offsets[file_path.name])
+        for file_path, _, _ in APPENDED_FILES
+    }
+    sizes = {
+        path.name: os.path.getsize(path) if path.exists() else 0
+        for _, _, path in APPENDED_FILES
+    }
+    tmp_path = NORMALISED_OFFSETS.with_name(f'{NORMALISED_OFFSETS.name}.tmp')
+    tmp_path.write_text(
+        json.dumps(
+            {'scraped': offsets, 'fingerprints': fingerprints, 'normalised': sizes}
+        )
+    )
+    tmp_path.replace(NORMALISED_OFFSETS)
 
 
 def save_to_file(
@@ -127,39 +371,103 @@ def save_to_file(
     ufc_fights: pd.DataFrame,
     ufc_fight_stats: pd.DataFrame,
     ufc_fighters: pd.DataFrame,
+    formats: Sequence[str] = ('csv',),
+    parts: dict[str, int] | None = None,
 ) -> None:
-    """Save to files"""
-
-    # Set columns for final output
-    ufc_events = ufc_events[EVENT_COLUMNS]
-    ufc_fights = ufc_fights[FIGHT_COLUMNS]
-    ufc_fight_stats = ufc_fight_stats[FIGHTSTATS_COLUMNS]
-    ufc_fighters = ufc_fighters[FIGHTER_COLUMNS]
+    """
+    Save to files. Rows of appended tables are appended to normalised files,
+    columnar parts are named by offsets of their rows in scraped files
+    """
+    parts = parts or {}
+    columnar_formats = [fmt for fmt in formats if fmt != 'csv']
+    for table, columns, (file_path, row_class, path) in zip(
+        [ufc_events, ufc_fights, ufc_fight_stats],
+        [EVENT_COLUMNS, FIGHT_COLUMNS, FIGHTSTATS_COLUMNS],
+        APPENDED_FILES,
+        strict=True,
+    ):
+        if 'csv' in formats:
+            table[columns].to_csv(path, mode='a', header=not path.exists(), index=False)
+        for fmt in columnar_formats:
+            columnar.write_table(
+                table,
+                columns,
+                row_class,
+                path.stem,
+                fmt,
+                parts.get(file_path.name, 0),
+            )
 
-    # Set primary key as index
-    ufc_events.set_index('event_id', inplace=True)
-    ufc_fights.set_index('fight_id', inplace=True)
-    ufc_fight_stats.set_index('fight_stat_id', inplace=True)
-    ufc_fighters.set_index('fighter_id', inplace=True)
+    if 'csv' in formats:
+        ufc_fighters[FIGHTER_COLUMNS].to_csv(NORMALISED_FIGHTER_PATH, index=False)
+    for fmt in columnar_formats:
+        columnar.write_table(
+            ufc_fighters,
+            FIGHTER_COLUMNS,
+            FighterRow,
+            NORMALISED_FIGHTER_PATH.stem,
+            fmt,
+        )
 
-    ufc_events.to_csv(EVENT_DATA_PATH)
-    ufc_fights.to_csv(FIGHT_DATA_PATH)
-    ufc_fight_stats.to_csv(FIGHTSTATS_DATA_PATH)
-    ufc_fighters.to_csv(FIGHTER_DATA_PATH)
 
+def normalise_tables(
+    incremental: bool = True,
+    formats: Sequence[str] = NORMALISED_FORMATS,
+) -> None:
+    """
+    Normalises scraped tables into separate files. Incremental run takes
+    only rows appended to scraped files since the last run, fighters are
+    normalised whole as scraper rewrites their file
+    """
+    for fmt in formats:
+        if fmt != 'csv' and fmt not in columnar.DATASET_FORMATS:
+            raise ValueError(f'Unknown format of normalised tables: {fmt}')
+    if any(fmt != 'csv' for fmt in formats):
+        columnar.require_pyarrow()
 
-def normalise_tables():
+    NORMALISED_FILES_PATH.mkdir(parents=True, exist_ok=True)
+    offsets, sizes = get_offsets(incremental, formats)
+    reset_normalised(offsets, sizes)
+    parts = dict(offsets)
 
-    ufc_events = pd.read_csv(EVENT_DATA_PATH)
-    ufc_fights = pd.read_csv(FIGHT_DATA_PATH)
-    ufc_fight_stats = pd.read_csv(FIGHTSTATS_DATA_PATH)
-    ufc_fighters = pd.read_csv(FIGHTER_DATA_PATH)
+    tables = []
+    for file_path, row_class, _ in APPENDED_FILES:
+        table, offsets[file_path.name] = read_appended(
+            file_path, row_class, offsets.get(file_path.name, 0)
+        )
+        tables.append(table)
+    ufc_events, ufc_fights, ufc_fight_stats = tables
+    ufc_fighters = read_scraped(FIGHTER_DATA_PATH, FighterRow)
+    event_fights = pd.read_csv(EVENT_FIGHT_URLS) if EVENT_FIGHT_URLS.exists() else None
 
     print('Adding primary keys')
-    add_primary_keys(ufc_events, ufc_fights, ufc_fight_stats, ufc_fighters)
+    # Files of older scraper versions miss fighter urls
+    fight_fighters = ['fight_url', 'f_1_url', 'f_2_url']
+    scraped_fights = pd.read_csv(
+        FIGHT_DATA_PATH, usecols=lambda column: column in fight_fighters, dtype='string'
+    ).reindex(columns=fight_fighters)
+    add_primary_keys(
+        ufc_events, ufc_fights, ufc_fight_stats, ufc_fighters, scraped_fights
+    )
 
     print('Adding foreign keys')
-    add_foreign_key(ufc_events, ufc_fights, ufc_fight_stats, ufc_fighters)
+    # Appended fights may be of events normalised by previous runs
+    scraped_events = read_scraped(EVENT_DATA_PATH, EventRow)
+    scraped_events['event_id'] = get_url_id(scraped_events['event_url'])
+    unresolved = add_foreign_key(
+        scraped_events, ufc_fights, ufc_fight_stats, ufc_fighters, event_fights
+    )
+    for column, count in unresolved.items():
+        if count:
+            print(f'{count} unresolved keys of {column}')
+    add_event_year(
+        ufc_events, ufc_fights, ufc_fight_stats, scraped_events, event_fights
+    )
 
-    save_to_file(ufc_events, ufc_fights, ufc_fight_stats, ufc_fighters)
-    print('Tables normalised')
+    save_to_file(ufc_events, ufc_fights, ufc_fight_stats, ufc_fighters, formats, parts)
+    # Rows appended after saved sizes are cut by next run if this one breaks
+    save_offsets(offsets)
+    print(
+        f'Tables normalised: {len(ufc_events)} events, {len(ufc_fights)} fights, '
+        f'{len(ufc_fight_stats)} fight stats appended'
+    )
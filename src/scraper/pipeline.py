@@ -0,0 +1,317 @@
+import multiprocessing
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Generic, TypeVar
+
+from scraper.client import CacheMiss, HttpClient
+from scraper.constants import CONCURRENCY, PARSE_WORKERS, QUEUE_SIZE
+from scraper.fetch import PageError, fetch_page
+
+T = TypeVar('T')
+
+# Marks the end of a queue
+DONE = object()
+
+# Parse pools by number of workers, shared by all stages of run
+PARSE_POOLS: dict[int, ProcessPoolExecutor] = {}
+PARSE_POOLS_LOCK = threading.Lock()
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool shared by pipelines, so workers are spawned and import
+    parsers once per run instead of once per stage
+    """
+    # Stages running concurrently share one pool too
+    with PARSE_POOLS_LOCK:
+        if workers not in PARSE_POOLS:
+            # Spawned workers start lazily and don't inherit pipeline threads
+            PARSE_POOLS[workers] = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return PARSE_POOLS[workers]
+
+
+class StageStats:
+    """Items passed through a stage and depth of its input queue"""
+
+    def __init__(self, name: str, source: queue.Queue) -> None:
+        self.name = name
+        self.source = source
+        self.count = 0
+        self.depth_sum = 0
+        self.depth_max = 0
+        self.samples = 0
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.lock = threading.Lock()
+
+    def sample(self) -> None:
+        """Records depth of input queue before an item is taken"""
+        depth = self.source.qsize()
+        with self.lock:
+            if self.started is None:
+                self.started = time.monotonic()
+            self.depth_sum += depth
+            self.depth_max = max(self.depth_max, depth)
+            self.samples += 1
+
+    def done(self) -> None:
+        with self.lock:
+            self.count += 1
+            self.finished = time.monotonic()
+
+    def state(self) -> dict[str, Any]:
+        with self.lock:
+            elapsed = (
+                self.finished - self.started
+                if self.started is not None and self.finished is not None
+                else 0.0
+            )
+            return {
+                'count': self.count,
+                'per_second': round(self.count / elapsed, 2) if elapsed else 0.0,
+                'queue_depth': self.source.qsize(),
+                'queue_avg': (
+                    round(self.depth_sum / self.samples, 2) if self.samples else 0.0
+                ),
+                'queue_max': self.depth_max,
+            }
+
+
+class Pipeline(Generic[T]):
+    """
+    Fetch, parse and write stages connected by bounded queues. Fetch threads
+    share the pooled client, pages are parsed in a process pool sized to
+    the cores and a single writer calls write in the caller's thread.
+    Full queues block the stage before, so fetching never runs far ahead
+    of parsing and writing. Ordered results wait for the next one within
+    a window of queue size, urls past it are not fetched until window moves
+    """
+
+    def __init__(
+        self,
+        client: HttpClient,
+        parse: Callable[[str, str], T | None],
+        write: Callable[[T], None],
+        concurrency: int = CONCURRENCY,
+        parse_workers: int = PARSE_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+    ) -> None:
+        self.client = client
+        self.parse = parse
+        self.write = write
+        self.concurrency = concurrency
+        self.parse_workers = parse_workers
+        self.window = queue_size
+        self.urls: queue.Queue = queue.Queue()
+        self.pages: queue.Queue = queue.Queue(queue_size)
+        self.results: queue.Queue = queue.Queue(queue_size)
+        self.stats = {
+            'fetch': StageStats('fetch', self.urls),
+            'parse': StageStats('parse', self.pages),
+            'write': StageStats('write', self.results),
+        }
+        self.stop = threading.Event()
+        self.errors: list[Exception] = []
+        # Index of the next result to write in urls order, None if not ordered
+        self.next_index: int | None = None
+        self.window_moved = threading.Condition()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Waits for a free slot in queue, gives up once pipeline stops"""
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _get(self, q: queue.Queue, stats: StageStats) -> Any:
+        stats.sample()
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return DONE
+
+    def _wait_window(self, index: int) -> bool:
+        """
+        Waits until url is within reorder window of writer, gives up once
+        pipeline stops. A stalled url keeps later results out of memory
+        """
+        with self.window_moved:
+            while (
+                self.next_index is not None
+                and index >= self.next_index + self.window
+            ):
+                if self.stop.is_set():
+                    return False
+                self.window_moved.wait(0.1)
+        return True
+
+    def _move_window(self, next_index: int) -> None:
+        with self.window_moved:
+            self.next_index = next_index
+            self.window_moved.notify_all()
+
+    def _fail(self, error: Exception) -> None:
+        self.errors.append(error)
+        self.stop.set()
+
+    def _fetch_stage(self) -> None:
+        stats = self.stats['fetch']
+        try:
+            while (item := self._get(self.urls, stats)) is not DONE:
+                index, url = item
+                if not self._wait_window(index):
+                    return
+                print(f'Scrapes {url}')
+                try:
+                    text = fetch_page(self.client, url)
+                except CacheMiss:
+                    print(f'Missing in cache {url}')
+                    text = None
+                except PageError as e:
+                    print(f'Page is not available: {e}')
+                    text = None
+                stats.done()
+                if not self._put(self.pages, (index, url, text)):
+                    return
+        except Exception as e:
+            self._fail(e)
+
+    def _parse_stage(self, pool: Executor | None) -> None:
+        stats = self.stats['parse']
+        try:
+            while (item := self._get(self.pages, stats)) is not DONE:
+                index, url, text = item
+                if text is None:
+                    result = None
+                elif pool is None:
+                    result = self.parse(url, text)
+                else:
+                    result = pool.submit(self.parse, url, text).result()
+                stats.done()
+                if not self._put(self.results, (index, result)):
+                    return
+        except Exception as e:
+            self._fail(e)
+
+    def run(self, urls: list[str], ordered: bool = True) -> int:
+        """
+        Scrapes urls through the pipeline. Ordered results are written in
+        urls order, otherwise as soon as parsed. Returns number of written results
+        """
+        for index, url in enumerate(urls):
+            self.urls.put((index, url))
+        self.next_index = 0 if ordered else None
+
+        pool = get_parse_pool(self.parse_workers) if self.parse_workers > 0 else None
+        fetchers = [
+            threading.Thread(target=self._fetch_stage, daemon=True)
+            for _ in range(min(self.concurrency, len(urls)))
+        ]
+        parsers = [
+            threading.Thread(target=self._parse_stage, args=(pool,), daemon=True)
+            for _ in range(max(self.parse_workers, 1))
+        ]
+        for _ in fetchers:
+            self.urls.put(DONE)
+        stages = [
+            threading.Thread(
+                target=self._close_stage, args=(fetchers, self.pages, len(parsers))
+            ),
+            threading.Thread(
+                target=self._close_stage, args=(parsers, self.results, 1)
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            return self._write_stage(ordered)
+        finally:
+            self.stop.set()
+            for stage in stages:
+                stage.join()
+
+    def _close_stage(
+        self,
+        threads: list[threading.Thread],
+        output: queue.Queue,
+        readers: int,
+    ) -> None:
+        """Runs threads of a stage, then ends its output queue for each reader"""
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for _ in range(readers):
+            if not self._put(output, DONE):
+                return
+
+    def _write_stage(self, ordered: bool) -> int:
+        stats = self.stats['write']
+        written = 0
+        # Results parsed ahead of the next one in urls order
+        pending: dict[int, T | None] = {}
+        next_index = 0
+        while (item := self._get(self.results, stats)) is not DONE:
+            index, result = item
+            if ordered:
+                pending[index] = result
+                ready = []
+                while next_index in pending:
+                    ready.append(pending.pop(next_index))
+                    next_index += 1
+                if ready:
+                    self._move_window(next_index)
+            else:
+                ready = [result]
+            for result in ready:
+                if result is not None:
+                    self.write(result)
+                    written += 1
+            stats.done()
+
+        if self.errors:
+            raise self.errors[0]
+        return written
+
+    def report(self) -> None:
+        """Prints throughput and input queue depth of each stage"""
+        for name, stats in self.stats.items():
+            state = stats.state()
+            print(
+                f'{name}: {state["count"]} pages, {state["per_second"]}/s,'
+                f' queue avg {state["queue_avg"]} max {state["queue_max"]}'
+            )
+
+
+def scrape_pages(
+    client: HttpClient,
+    urls: list[str],
+    parse: Callable[[str, str], T | None],
+    write: Callable[[T], None],
+    concurrency: int = CONCURRENCY,
+    ordered: bool = True,
+    parse_workers: int = PARSE_WORKERS,
+) -> int:
+    """
+    Fetches urls concurrently, parses each page with parse(url, text)
+    in a process pool and passes not None results to write in urls order,
+    or as soon as page is parsed if not ordered. Parse must be a module
+    level function. Returns number of successfully parsed pages
+    """
+    pipeline: Pipeline[T] = Pipeline(client, parse, write, concurrency, parse_workers)
+    try:
+        return pipeline.run(urls, ordered)
+    finally:
+        pipeline.report()
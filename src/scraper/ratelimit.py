@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from scraper.constants import (
+    RATE_BURST,
+    RATE_DECREASE,
+    RATE_INCREASE,
+    RATE_MAX,
+    RATE_MIN,
+    RATE_START,
+)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Converts Retry-After header (seconds or http date) to seconds"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    Token bucket of a single host. Rate grows additively on each
+    successful response and shrinks multiplicatively on each 429
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_START,
+        burst: float = RATE_BURST,
+        min_rate: float = RATE_MIN,
+        max_rate: float = RATE_MAX,
+        increase: float = RATE_INCREASE,
+        decrease: float = RATE_DECREASE,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.granted = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> None:
+        """Blocks until a request to the host is allowed"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.granted += 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        with self.lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0
+            if retry_after:
+                self.blocked_until = max(
+                    self.blocked_until, time.monotonic() + retry_after
+                )
+
+    def state(self) -> dict[str, float]:
+        with self.lock:
+            return {
+                'rate': round(self.rate, 3),
+                'tokens': round(self.tokens, 3),
+                'blocked_for': round(max(self.blocked_until - time.monotonic(), 0), 3),
+                'granted': self.granted,
+                'throttled': self.throttled,
+            }
+
+
+class RateLimiter:
+    """Adaptive per-host rate limiter"""
+
+    def __init__(self, **bucket_params: float) -> None:
+        self.bucket_params = bucket_params
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(**self.bucket_params)
+            return self.buckets[host]
+
+    def acquire(self, url: str) -> None:
+        self.bucket(url).acquire()
+
+    def on_success(self, url: str) -> None:
+        self.bucket(url).on_success()
+
+    def on_throttle(self, url: str, retry_after: float | None = None) -> None:
+        self.bucket(url).on_throttle(retry_after)
+
+    def state(self) -> dict[str, dict[str, float]]:
+        """Current rate, tokens and counters of each host"""
+        with self.lock:
+            buckets = dict(self.buckets)
+        return {host: bucket.state() for host, bucket in buckets.items()}
+
+    def report(self) -> None:
+        for host, state in self.state().items():
+            print(
+                f'{host}: {state["rate"]} req/s, {state["granted"]} requests,'
+                f' {state["throttled"]} throttled'
+            )
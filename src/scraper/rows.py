@@ -0,0 +1,187 @@
+from collections.abc import Callable
+from dataclasses import Field, dataclass, fields
+from datetime import date
+from typing import Any, ClassVar, NewType, Self
+
+# Duration in seconds, parsed from 'm:ss' of fight pages
+Seconds = NewType('Seconds', int)
+
+NULL = 'NULL'
+# Texts of missed values on ufcstats.com pages
+NULL_TEXTS = {'', NULL, '--', '---'}
+
+
+def to_str(value: Any) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in NULL_TEXTS else value
+
+
+def to_int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_seconds(value: Any) -> int | None:
+    """Seconds of 'm:ss' time, or of seconds already converted"""
+    if isinstance(value, str) and ':' in value:
+        minutes, _, seconds = value.strip().partition(':')
+        minutes_int, seconds_int = to_int(minutes), to_int(seconds)
+        if minutes_int is None or seconds_int is None:
+            return None
+        return minutes_int * 60 + seconds_int
+    return to_int(value)
+
+
+def to_date(value: Any) -> date | None:
+    """Date of date or of its iso format text"""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[0:10])
+    except ValueError:
+        return None
+
+
+# Converters and pandas dtypes of field types
+CONVERTERS: dict[Any, Callable[[Any], Any]] = {
+    str: lambda value: str(value).strip(),
+    str | None: to_str,
+    int | None: to_int,
+    float | None: to_float,
+    Seconds | None: to_seconds,
+    date | None: to_date,
+}
+DTYPES: dict[Any, str] = {
+    str: 'string',
+    str | None: 'string',
+    int | None: 'Int64',
+    float | None: 'Float64',
+    Seconds | None: 'Int64',
+    date | None: 'datetime64[ns]',
+}
+
+
+class Row:
+    """
+    Typed row of scraped table. Values are converted by types of fields
+    when row is built, so missed values are None and never 'NULL' texts
+    """
+
+    __slots__ = ()
+    # Set by dataclass decorator of each row class, so fields() takes rows
+    __dataclass_fields__: ClassVar[dict[str, Field[Any]]]
+
+    @classmethod
+    def from_values(cls, values: list[Any]) -> Self:
+        """Row of parsed texts or of values read from csv file"""
+        return cls(
+            *(
+                CONVERTERS[field.type](value)
+                for field, value in zip(fields(cls), values, strict=True)
+            )
+        )
+
+    @classmethod
+    def columns(cls) -> list[str]:
+        return [field.name for field in fields(cls)]
+
+
+@dataclass(slots=True)
+class EventRow(Row):
+    event_name: str
+    event_date: date | None
+    event_city: str | None
+    event_state: str | None
+    event_country: str | None
+    event_url: str
+
+
+@dataclass(slots=True)
+class EventFightRow(Row):
+    event_url: str
+    fight_url: str
+
+
+@dataclass(slots=True)
+class FightRow(Row):
+    event_name: str
+    referee: str | None
+    f_1: str
+    f_2: str
+    winner: str | None
+    num_rounds: int | None
+    title_fight: str
+    weight_class: str | None
+    gender: str
+    result: str | None
+    result_details: str | None
+    finish_round: int | None
+    finish_time_sec: Seconds | None
+    f_1_url: str | None
+    f_2_url: str | None
+    winner_url: str | None
+    fight_url: str
+
+
+@dataclass(slots=True)
+class FightStatRow(Row):
+    # Name of fighter, replaced by id when tables are normalised
+    fighter_id: str
+    knockdowns: int | None
+    total_strikes_att: int | None
+    total_strikes_succ: int | None
+    sig_strikes_att: int | None
+    sig_strikes_succ: int | None
+    takedown_att: int | None
+    takedown_succ: int | None
+    submission_att: int | None
+    reversals: int | None
+    ctrl_time_sec: Seconds | None
+    fighter_url: str | None
+    fight_url: str
+
+
+@dataclass(slots=True)
+class FighterRow(Row):
+    fighter_f_name: str | None
+    fighter_l_name: str | None
+    fighter_nickname: str | None
+    fighter_height_cm: float | None
+    fighter_weight_lbs: int | None
+    fighter_reach_cm: float | None
+    fighter_stance: str | None
+    fighter_dob: date | None
+    fighter_w: int | None
+    fighter_l: int | None
+    fighter_d: int | None
+    fighter_nc_dq: int | None
+    fighter_url: str
+
+
+def format_value(value: Any) -> str:
+    """Csv text of value, None is written as 'NULL'"""
+    if value is None:
+        return NULL
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def to_csv_row(row: Row) -> list[str]:
+    return [format_value(getattr(row, field.name)) for field in fields(row)]
+
+
+def get_schema(row_class: type[Row]) -> dict[str, str]:
+    """Pandas dtypes of columns of scraped table, 'NULL' reads as missed value"""
+    return {field.name: DTYPES[field.type] for field in fields(row_class)}
@@ -0,0 +1,132 @@
+import importlib
+from contextlib import ExitStack
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+from scraper import storage
+from scraper.cache import PageCache
+from scraper.constants import (
+    DATABASE_PATH,
+    DELTA,
+    EVENT_URLS,
+    FIGHT_URLS,
+    FIGHTER_URLS,
+    NORMALISED_FORMATS,
+    NORMALISED_OFFSETS,
+    OFFLINE,
+    SCRAPED_FILES_PATH,
+    STAGE_MAX_AGE,
+    STORAGE,
+    URL_PATH,
+)
+from scraper.scheduler import Stage, run_stages
+
+if TYPE_CHECKING:
+    from scraper.client import HttpClient
+
+# Stages fetching pages with the client
+SCRAPING_STAGES = {'events', 'fight_pages', 'fighters'}
+
+
+def load(name: str) -> ModuleType:
+    """
+    Module of stage imported once its stage runs, so pandas, bs4 and
+    requests are loaded only by runs of stages using them
+    """
+    return importlib.import_module(f'scraper.{name}')
+
+
+def get_stages(client: 'HttpClient | None') -> list[Stage]:
+    """
+    Stages of run by files they read and write. Fighters don't depend on
+    events and fights, except for delta run refreshing fighters of new fights
+    """
+    fight_urls: list[str] = []
+    scraped = tuple(spec.file_path for spec in storage.TABLES.values())
+    stages = [
+        Stage(
+            'events',
+            lambda: fight_urls.extend(
+                load('events').scrape_events(client, delta=DELTA)
+            ),
+            outputs=(
+                *storage.get_table_paths('events', 'event_fights'),
+                EVENT_URLS,
+                FIGHT_URLS,
+            ),
+            max_age=STAGE_MAX_AGE,
+        ),
+        Stage(
+            'fight_pages',
+            lambda: load('fightpages').scrape_fight_pages(client),
+            inputs=(FIGHT_URLS,),
+            outputs=storage.get_table_paths('fights', 'fightstats'),
+            max_age=STAGE_MAX_AGE,
+        ),
+        Stage(
+            'fighters',
+            lambda: load('fighters').scrape_fighters(
+                client, fight_urls=fight_urls if DELTA else None
+            ),
+            inputs=storage.get_table_paths('fights') if DELTA else (),
+            outputs=(*storage.get_table_paths('fighters'), FIGHTER_URLS),
+            max_age=STAGE_MAX_AGE,
+        ),
+        Stage(
+            'normalise',
+            lambda: load('normalise_tables').normalise_tables(),
+            inputs=scraped,
+            outputs=(
+                NORMALISED_OFFSETS,
+                *storage.get_output_paths(NORMALISED_FORMATS),
+            ),
+        ),
+    ]
+    if STORAGE == 'sqlite':
+        stages.insert(
+            -1,
+            Stage(
+                'export',
+                storage.export_tables,
+                inputs=(DATABASE_PATH,),
+                outputs=scraped,
+            ),
+        )
+    return stages
+
+
+def scrape(names: list[str] | None = None, force: bool = False) -> None:
+    """Runs stages of given names, or all of them"""
+    # Data folder set by flags may be new
+    for path in (SCRAPED_FILES_PATH, URL_PATH):
+        path.mkdir(parents=True, exist_ok=True)
+    cache = PageCache()
+    with ExitStack() as stack:
+        # Client and requests are left out of runs of export and normalise only
+        client = None
+        if not names or SCRAPING_STAGES & set(names):
+            from scraper.client import HttpClient
+
+            client = stack.enter_context(HttpClient(cache=cache, offline=OFFLINE))
+        stages = get_stages(client)
+        if names:
+            stages = [stage for stage in stages if stage.name in names]
+        print('Scrapes events, fights and fighters from ufcstats.com')
+        # Fighters are scraped while events and fights are, under one rate limit
+        run_stages(stages, force)
+        if client is not None:
+            client.report()
+
+    print(f'{cache.evict()} pages evicted from cache')
+
+
+def watch_fight_night() -> None:
+    from scraper.client import HttpClient
+    from scraper.watch import watch_events
+
+    with HttpClient(cache=PageCache()) as client:
+        print('Watches events in progress on ufcstats.com, stop with Ctrl+C')
+        try:
+            watch_events(client)
+        except KeyboardInterrupt:
+            print('Watch stopped')
@@ -0,0 +1,226 @@
+import json
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from scraper.constants import STAGES_PATH
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Step of run reading inputs and writing outputs. Stage runs after stages
+    writing its inputs. Stage with max age scrapes the site, so it is stale
+    once its last run is older than max age even if its inputs are unchanged
+    """
+
+    name: str
+    run: Callable[[], Any]
+    inputs: tuple[Path, ...] = ()
+    outputs: tuple[Path, ...] = ()
+    max_age: float | None = None
+
+
+@dataclass
+class StageTiming:
+    started: float
+    finished: float
+    after: str | None
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+
+def get_dependencies(stages: list[Stage]) -> dict[str, list[str]]:
+    """Names of stages writing inputs of each stage"""
+    return {
+        stage.name: [
+            other.name
+            for other in stages
+            if other is not stage and set(stage.inputs) & set(other.outputs)
+        ]
+        for stage in stages
+    }
+
+
+def get_mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def is_up_to_date(stage: Stage, finished: float | None, now: float) -> bool:
+    """
+    Stage is up to date when its last run finished after its inputs changed
+    and its outputs exist. Missing inputs count as unchanged
+    """
+    if finished is None or not all(path.exists() for path in stage.outputs):
+        return False
+    if stage.max_age is not None and now - finished > stage.max_age:
+        return False
+    return all(get_mtime(path) <= finished for path in stage.inputs)
+
+
+def load_finished(path: Path = STAGES_PATH) -> dict[str, float]:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_critical_path(timings: dict[str, StageTiming]) -> list[str]:
+    """Chain of stages each waited for by the next, ending with the last one"""
+    if not timings:
+        return []
+    name: str | None = max(timings, key=lambda name: timings[name].finished)
+    path = []
+    while name is not None:
+        path.append(name)
+        name = timings[name].after
+    return path[::-1]
+
+
+class Scheduler:
+    """
+    Runs each stage once its dependencies are done, independent stages run
+    concurrently in threads. Stages sharing one client share its rate limit
+    and connection pool. Up to date stages are skipped unless forced, and
+    their dependents run as if they were done. Stages depending on failed
+    one are not run, and the first error is raised once others are done
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        force: bool = False,
+        path: Path = STAGES_PATH,
+    ) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        self.dependencies = get_dependencies(stages)
+        self.force = force
+        self.path = path
+        self.finished = load_finished(path)
+        self.now = time.time()
+        self.timings: dict[str, StageTiming] = {}
+        self.done: set[str] = set()
+        self.failed: set[str] = set()
+        self.errors: list[Exception] = []
+        self.running: dict[Future, str] = {}
+
+    def get_ready(self) -> list[str]:
+        """Stages not run yet which dependencies are done"""
+        return [
+            name
+            for name, dependencies in self.dependencies.items()
+            if name not in self.done
+            and name not in self.failed
+            and name not in self.running.values()
+            and all(dependency in self.done for dependency in dependencies)
+        ]
+
+    def fail(self, name: str) -> None:
+        """Marks stage and stages depending on it failed"""
+        self.failed.add(name)
+        for other, dependencies in self.dependencies.items():
+            if name in dependencies and other not in self.failed:
+                self.fail(other)
+
+    def start(self, executor: ThreadPoolExecutor, name: str) -> None:
+        stage = self.stages[name]
+        # Stage is run again after any of its dependencies ran
+        if (
+            not self.force
+            and not any(
+                dependency in self.timings for dependency in self.dependencies[name]
+            )
+            and is_up_to_date(stage, self.finished.get(name), self.now)
+        ):
+            self.done.add(name)
+            return
+        # Dependency finished last is the one stage waited for
+        after = max(
+            (
+                dependency
+                for dependency in self.dependencies[name]
+                if dependency in self.timings
+            ),
+            key=lambda dependency: self.timings[dependency].finished,
+            default=None,
+        )
+        self.timings[name] = StageTiming(time.monotonic(), 0.0, after)
+        self.running[executor.submit(run_stage, stage)] = name
+
+    def complete(self, future: Future) -> None:
+        name = self.running.pop(future)
+        try:
+            self.timings[name].finished = future.result()
+        except Exception as e:
+            self.timings.pop(name)
+            self.errors.append(e)
+            self.fail(name)
+            return
+        self.done.add(name)
+        self.finished[name] = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.finished, indent=2))
+
+    def run(self) -> None:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max(len(self.stages), 1)) as executor:
+            while True:
+                while ready := self.get_ready():
+                    for name in ready:
+                        self.start(executor, name)
+                if not self.running:
+                    break
+                completed, _ = wait(self.running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    self.complete(future)
+
+        self.report(started)
+        if self.errors:
+            raise self.errors[0]
+        if len(self.done) < len(self.stages):
+            raise ValueError('Stages depend on each other in a cycle')
+
+    def report(self, started: float) -> None:
+        """Prints time of each stage and critical path of run"""
+        for name in self.stages:
+            timing = self.timings.get(name)
+            if name in self.failed:
+                print(f'{name:<12} failed')
+            elif timing is None:
+                print(f'{name:<12} skipped, up to date')
+            else:
+                print(
+                    f'{name:<12} {timing.elapsed:.2f}s, from'
+                    f' {timing.started - started:.2f}s'
+                    f' to {timing.finished - started:.2f}s'
+                )
+        path = get_critical_path(self.timings)
+        if path:
+            total = self.timings[path[-1]].finished - started
+            chain = ' > '.join(
+                f'{name} {self.timings[name].elapsed:.2f}s' for name in path
+            )
+            print(f'Critical path: {chain}, {total:.2f}s of run')
+
+
+def run_stage(stage: Stage) -> float:
+    """Runs stage, returns time it finished"""
+    stage.run()
+    return time.monotonic()
+
+
+def run_stages(
+    stages: list[Stage],
+    force: bool = False,
+    path: Path = STAGES_PATH,
+) -> None:
+    """Runs stages by their dependencies, see Scheduler"""
+    Scheduler(stages, force, path).run()
@@ -0,0 +1,470 @@
+import csv
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Generic, Literal, TextIO, TypeVar, overload
+
+from scraper.constants import (
+    COLUMNAR_FILES_PATH,
+    DATABASE_PATH,
+    EVENT_DATA_PATH,
+    EVENT_FIELD,
+    EVENT_FIGHT_URLS,
+    FIGHT_DATA_PATH,
+    FIGHT_FIELD,
+    FIGHTER_DATA_PATH,
+    FIGHTER_FIELD,
+    FIGHTSTATS_DATA_PATH,
+    NORMALISED_EVENT_PATH,
+    NORMALISED_OFFSETS,
+    STORAGE,
+    STORAGE_BATCH_SIZE,
+    STORAGE_TIMEOUT,
+)
+from scraper.index import ScrapedIndex
+from scraper.rows import (
+    EventFightRow,
+    EventRow,
+    FighterRow,
+    FightRow,
+    FightStatRow,
+    Row,
+    format_value,
+    get_schema,
+)
+from scraper.utils import create_csv_file, write_csv_file
+
+RowT = TypeVar('RowT', bound=Row)
+
+
+@dataclass(frozen=True)
+class TableSpec(Generic[RowT]):
+    row_class: type[RowT]
+    file_path: Path
+    # Column of url rows are scraped from
+    fieldname: str
+    # Several rows are scraped from one url
+    numbered: bool = False
+    # Tables of urls columns refer to
+    references: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.file_path.stem
+
+
+TABLES: dict[str, TableSpec[Any]] = {
+    'events': TableSpec(EventRow, EVENT_DATA_PATH, EVENT_FIELD),
+    'event_fights': TableSpec(
+        EventFightRow,
+        EVENT_FIGHT_URLS,
+        EVENT_FIELD,
+        numbered=True,
+        references={'event_url': 'events'},
+    ),
+    'fights': TableSpec(
+        FightRow,
+        FIGHT_DATA_PATH,
+        FIGHT_FIELD,
+        references={
+            'f_1_url': 'fighters',
+            'f_2_url': 'fighters',
+            'winner_url': 'fighters',
+        },
+    ),
+    'fightstats': TableSpec(
+        FightStatRow,
+        FIGHTSTATS_DATA_PATH,
+        FIGHT_FIELD,
+        numbered=True,
+        references={'fight_url': 'fights', 'fighter_url': 'fighters'},
+    ),
+    'fighters': TableSpec(FighterRow, FIGHTER_DATA_PATH, FIGHTER_FIELD),
+}
+SQL_TYPES = {
+    'string': 'TEXT',
+    'Int64': 'INTEGER',
+    'Float64': 'REAL',
+    'datetime64[ns]': 'TEXT',
+}
+# Number of row among rows of its url in numbered tables
+ROW_NUM = 'row_num'
+
+
+class Table(ABC, Generic[RowT]):
+    """
+    Scraped table of rows of one row class. Rows of each url are written
+    once by write_rows, so urls already written are not scraped again
+    """
+
+    def __init__(self, spec: TableSpec[RowT]) -> None:
+        self.spec = spec
+
+    def __enter__(self) -> 'Table[RowT]':
+        return self
+
+    @abstractmethod
+    def __exit__(self, *args) -> None:
+        """Writes what is left and closes files of table"""
+
+    @abstractmethod
+    def __contains__(self, url: str) -> bool: ...
+
+    def filter(self, urls: list[str]) -> list[str]:
+        """Ensure each url is only scraped once when script is run multiple times"""
+        return [url for url in urls if url not in self]
+
+    @abstractmethod
+    def write_rows(self, rows: Sequence[RowT], url: str) -> None:
+        """Writes rows scraped from url and marks url as scraped"""
+
+    @abstractmethod
+    def rows(self) -> list[RowT]:
+        """All rows of table in order they were written"""
+
+    @abstractmethod
+    def replace_rows(self, rows: Iterable[RowT]) -> None:
+        """Replaces all rows of table, for tables scraped whole each run"""
+
+
+class CsvTable(Table[RowT]):
+    """Table appended to csv file, urls are indexed by ScrapedIndex"""
+
+    def __init__(self, spec: TableSpec[RowT]) -> None:
+        super().__init__(spec)
+        self.stack = ExitStack()
+        self.index: ScrapedIndex | None = None
+        self.file: TextIO | None = None
+
+    def __enter__(self) -> 'CsvTable':
+        if not self.spec.file_path.exists():
+            # Index of removed csv file is stale, as csv file is created empty
+            ScrapedIndex(self.spec.file_path, self.spec.fieldname).load()
+        create_csv_file(self.spec.file_path, self.spec.row_class.columns())
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stack.close()
+        self.index = None
+        self.file = None
+
+    def get_index(self) -> ScrapedIndex:
+        # Tables replaced whole are never indexed
+        if self.index is None:
+            self.index = self.stack.enter_context(
+                ScrapedIndex(self.spec.file_path, self.spec.fieldname)
+            )
+        return self.index
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.get_index()
+
+    def write_rows(self, rows: Sequence[RowT], url: str) -> None:
+        if self.file is None:
+            self.file = self.stack.enter_context(open(self.spec.file_path, 'a+'))
+        self.get_index().write_rows(self.file, rows, url)
+
+    def rows(self) -> list[RowT]:
+        with open(self.spec.file_path, 'r', newline='', encoding='UTF8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            return [self.spec.row_class.from_values(values) for values in reader]
+
+    def replace_rows(self, rows: Iterable[RowT]) -> None:
+        write_csv_file(self.spec.file_path, self.spec.row_class.columns(), rows)
+
+
+# Connection of each thread, tables opened by thread share its transaction
+LOCAL = threading.local()
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Connection of thread to database. WAL journal lets stages in other
+    threads or processes read while one of them writes
+    """
+    if getattr(LOCAL, 'connection', None) is None:
+        DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            DATABASE_PATH, timeout=STORAGE_TIMEOUT, isolation_level=None
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS storage_meta '
+            '(name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+        )
+        LOCAL.connection = connection
+        LOCAL.tables = 0
+        LOCAL.pending = []
+    LOCAL.tables += 1
+    return LOCAL.connection
+
+
+def commit() -> None:
+    """
+    Writes urls queued since the last commit in one transaction. Write lock
+    is held only while rows are written, never while pages are fetched, so
+    writers of other threads wait for a moment at most
+    """
+    pending, LOCAL.pending = LOCAL.pending, []
+    if not pending:
+        return
+    connection = LOCAL.connection
+    # Write lock is taken at once, so writers of other threads wait for it
+    connection.execute('BEGIN IMMEDIATE')
+    with connection:
+        for table, rows, url, corrected in pending:
+            table.upsert(connection, rows, url, corrected)
+
+
+def disconnect() -> None:
+    """Commits and closes connection once the last table of thread is closed"""
+    commit()
+    LOCAL.tables -= 1
+    if LOCAL.tables == 0:
+        LOCAL.connection.close()
+        LOCAL.connection = None
+
+
+def get_table_sql(spec: TableSpec[Any]) -> list[str]:
+    """
+    Statements creating table with primary key of its url and indexes of
+    its references. References are not enforced, as tables are scraped
+    in any order
+    """
+    schema = get_schema(spec.row_class)
+    columns = [f'{column} {SQL_TYPES[dtype]}' for column, dtype in schema.items()]
+    key = [spec.fieldname]
+    if spec.numbered:
+        columns.append(f'{ROW_NUM} INTEGER NOT NULL')
+        key.append(ROW_NUM)
+    constraints = [f'PRIMARY KEY ({", ".join(key)})']
+    constraints += [
+        f'FOREIGN KEY ({column}) REFERENCES {TABLES[table].name} '
+        f'({TABLES[table].fieldname})'
+        for column, table in spec.references.items()
+    ]
+    statements = [
+        f'CREATE TABLE IF NOT EXISTS {spec.name} ({", ".join(columns + constraints)})'
+    ]
+    statements += [
+        f'CREATE INDEX IF NOT EXISTS {spec.name}_{column} ON {spec.name} ({column})'
+        for column in spec.references
+        if column != spec.fieldname
+    ]
+    return statements
+
+
+def get_upsert_sql(spec: TableSpec[Any]) -> str:
+    columns = spec.row_class.columns()
+    key = [spec.fieldname]
+    if spec.numbered:
+        columns.append(ROW_NUM)
+        key.append(ROW_NUM)
+    updates = [
+        f'{column} = excluded.{column}' for column in columns if column not in key
+    ]
+    return (
+        f'INSERT INTO {spec.name} ({", ".join(columns)}) '
+        f'VALUES ({", ".join("?" * len(columns))}) '
+        f'ON CONFLICT ({", ".join(key)}) DO UPDATE SET {", ".join(updates)}'
+    )
+
+
+def to_sql_values(row: Row) -> list:
+    """Values of row as stored in database, dates in iso format"""
+    return [
+        value.isoformat() if isinstance(value, date) else value
+        for value in (getattr(row, column) for column in row.columns())
+    ]
+
+
+class SqliteTable(Table[RowT]):
+    """
+    Table in sqlite database. Rows are upserted by url, urls are queued in
+    memory and committed in batches of STORAGE_BATCH_SIZE, so broken run
+    may only repeat urls of its last batch
+    """
+
+    def __init__(self, spec: TableSpec[RowT]) -> None:
+        super().__init__(spec)
+        self.urls: set[str] = set()
+        self.opened: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self.opened is None:
+            raise ValueError(f'Table {self.spec.name} is not opened')
+        return self.opened
+
+    def __enter__(self) -> 'SqliteTable':
+        self.opened = connect()
+        columns = [
+            info[1]
+            for info in self.connection.execute(f'PRAGMA table_info({self.spec.name})')
+        ]
+        expected = self.spec.row_class.columns()
+        if self.spec.numbered:
+            expected.append(ROW_NUM)
+        if columns and columns != expected:
+            raise ValueError(
+                f'Columns of {self.spec.name} differ from scraped ones, '
+                'remove database to scrape it again'
+            )
+        for statement in get_table_sql(self.spec):
+            self.connection.execute(statement)
+        self.urls = {
+            url
+            for (url,) in self.connection.execute(
+                f'SELECT DISTINCT {self.spec.fieldname} FROM {self.spec.name}'
+            )
+        }
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.opened is not None:
+            disconnect()
+            self.opened = None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.urls
+
+    def write_rows(self, rows: Sequence[RowT], url: str) -> None:
+        # Rows written before were exported and may be normalised already
+        LOCAL.pending.append((self, rows, url, url in self.urls))
+        self.urls.add(url)
+        if len(LOCAL.pending) >= STORAGE_BATCH_SIZE:
+            commit()
+
+    def upsert(
+        self,
+        connection: sqlite3.Connection,
+        rows: Sequence[RowT],
+        url: str,
+        corrected: bool,
+    ) -> None:
+        """Writes rows of url in transaction of commit"""
+        values = [to_sql_values(row) for row in rows]
+        if self.spec.numbered:
+            values = [[*row, num] for num, row in enumerate(values, 1)]
+            connection.execute(
+                f'DELETE FROM {self.spec.name} '
+                f'WHERE {self.spec.fieldname} = ? AND {ROW_NUM} > ?',
+                (url, len(values)),
+            )
+        connection.executemany(get_upsert_sql(self.spec), values)
+        if corrected:
+            connection.execute(
+                "INSERT OR REPLACE INTO storage_meta VALUES ('corrected', 1)"
+            )
+
+    def rows(self) -> list[RowT]:
+        commit()
+        return [
+            self.spec.row_class.from_values(values)
+            for values in self.connection.execute(
+                f'SELECT {", ".join(self.spec.row_class.columns())} '
+                f'FROM {self.spec.name} ORDER BY rowid'
+            )
+        ]
+
+    def replace_rows(self, rows: Iterable[RowT]) -> None:
+        commit()
+        values = [to_sql_values(row) for row in rows]
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        with connection:
+            connection.execute(f'DELETE FROM {self.spec.name}')
+            connection.executemany(get_upsert_sql(self.spec), values)
+        self.urls = {
+            url
+            for (url,) in connection.execute(
+                f'SELECT DISTINCT {self.spec.fieldname} FROM {self.spec.name}'
+            )
+        }
+
+    def export_csv(self) -> None:
+        """Rewrites csv file of table with its rows, values are not converted"""
+        columns = self.spec.row_class.columns()
+        file_path = self.spec.file_path
+        tmp_path = file_path.with_name(f'{file_path.name}.tmp')
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', newline='', encoding='UTF8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(
+                [format_value(value) for value in values]
+                for values in self.connection.execute(
+                    f'SELECT {", ".join(columns)} FROM {self.spec.name} ORDER BY rowid'
+                )
+            )
+        tmp_path.replace(file_path)
+
+
+@overload
+def open_table(name: Literal['events']) -> Table[EventRow]: ...
+@overload
+def open_table(name: Literal['event_fights']) -> Table[EventFightRow]: ...
+@overload
+def open_table(name: Literal['fights']) -> Table[FightRow]: ...
+@overload
+def open_table(name: Literal['fightstats']) -> Table[FightStatRow]: ...
+@overload
+def open_table(name: Literal['fighters']) -> Table[FighterRow]: ...
+@overload
+def open_table(name: str) -> Table[Any]: ...
+
+
+def open_table(name: str) -> Table[Any]:
+    """Scraped table of storage set by STORAGE, typed by row class of name"""
+    if STORAGE == 'sqlite':
+        return SqliteTable(TABLES[name])
+    return CsvTable(TABLES[name])
+
+
+def get_table_paths(*names: str) -> tuple[Path, ...]:
+    """Files of scraped tables of storage set by STORAGE"""
+    if STORAGE == 'sqlite':
+        return (DATABASE_PATH,)
+    return tuple(TABLES[name].file_path for name in names)
+
+
+def get_output_paths(formats: Sequence[str]) -> list[Path]:
+    """
+    Paths of normalised files or datasets of each format, kept apart from
+    normalise_tables so stages are set up without importing pandas
+    """
+    return [
+        NORMALISED_EVENT_PATH if fmt == 'csv' else COLUMNAR_FILES_PATH / fmt
+        for fmt in formats
+    ]
+
+
+def export_tables(*names: str) -> None:
+    """
+    Exports tables of sqlite storage to csv files normalised tables are
+    made of, only tables of given names if any. Rows corrected since the
+    last export were normalised before, so next normalisation starts from
+    scratch
+    """
+    if STORAGE != 'sqlite' or not DATABASE_PATH.exists():
+        return
+    specs = [TABLES[name] for name in names or TABLES]
+    with ExitStack() as stack:
+        tables = [stack.enter_context(SqliteTable(spec)) for spec in specs]
+        for table in tables:
+            table.export_csv()
+        connection = tables[0].connection
+        corrected = connection.execute(
+            "SELECT value FROM storage_meta WHERE name = 'corrected'"
+        ).fetchone()
+        if corrected is not None and corrected[0]:
+            NORMALISED_OFFSETS.unlink(missing_ok=True)
+            connection.execute("DELETE FROM storage_meta WHERE name = 'corrected'")
+    print(f'{len(specs)} tables exported from {DATABASE_PATH.name}')
@@ -0,0 +1,73 @@
+import lxml.html
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+def collapse_spaces(string: str) -> str:
+    """bs4 keeps a string of ascii spaces only as a single newline or space"""
+    if not string or string.strip(ASCII_SPACES):
+        return string
+    return '\n' if '\n' in string else ' '
+
+
+def text(element: lxml.html.HtmlElement) -> str:
+    """Same text as bs4 .text of element outside of pre and textarea"""
+    return ''.join(map(collapse_spaces, element.itertext()))
+
+
+def parse_tree(html: str) -> lxml.html.HtmlElement:
+    """Parses page with lxml, empty page is parsed into empty document"""
+    if not html.strip():
+        return lxml.html.Element('html')
+    return lxml.html.document_fromstring(html)
+
+
+def has_class(element: lxml.html.HtmlElement, class_name: str) -> bool:
+    """Matches class as bs4 does: a single class or the whole class attribute"""
+    classes = element.get('class', '').split()
+    return class_name in classes or class_name == ' '.join(classes)
+
+
+class Selectors:
+    """
+    Named (tag, class) selectors collected in one walk over the tree.
+    Elements keep document order, as with bs4 select. Class None
+    selects all elements of tag. Optional third item is attribute taken
+    by texts instead of text of element
+    """
+
+    def __init__(
+        self,
+        selectors: dict[str, tuple[str, str | None] | tuple[str, str | None, str]],
+    ) -> None:
+        self.selectors = selectors
+        self.by_tag: dict[str, list[tuple[str, str | None]]] = {}
+        self.attrs: dict[str, str] = {}
+        for name, (tag, class_name, *attr) in selectors.items():
+            self.by_tag.setdefault(tag, []).append((name, class_name))
+            if attr:
+                self.attrs[name] = attr[0]
+
+    def __call__(
+        self,
+        tree: lxml.html.HtmlElement,
+    ) -> dict[str, list[lxml.html.HtmlElement]]:
+        found: dict[str, list[lxml.html.HtmlElement]] = {
+            name: [] for name in self.selectors
+        }
+        for element in tree.iter(*self.by_tag):
+            for name, class_name in self.by_tag[element.tag]:
+                if class_name is None or has_class(element, class_name):
+                    found[name].append(element)
+        return found
+
+    def texts(self, tree: lxml.html.HtmlElement) -> dict[str, list[str]]:
+        """Texts or attributes of selected elements, each text is taken once"""
+        return {
+            name: (
+                [element.get(self.attrs[name], '') for element in elements]
+                if name in self.attrs
+                else [text(element) for element in elements]
+            )
+            for name, elements in self(tree).items()
+        }
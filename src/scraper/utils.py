@@ -1,18 +1,22 @@
 import csv
+import random
 import time
 from collections import Counter
+from collections.abc import Iterable
 from pathlib import Path
 
 from scraper.constants import (
+    BACKOFF_BASE,
     CONNECTION_LOST_TIMOUT,
     CONNECTION_LOST_TRYING,
     TO_MANY_REQUESTS_TIMOUT,
     TO_MANY_REQUESTS_TRYING,
 )
+from scraper.rows import Row, to_csv_row
 
 
 def create_csv_file(file_path: Path, table_rows: list[str]) -> None:
-    """Creates csv file for scraped data"""
+    """Creates csv file for scraped data, existing file must have the same columns"""
     if not file_path.exists():
         with open(
             file_path,
@@ -23,26 +27,46 @@ def create_csv_file(file_path: Path, table_rows: list[str]) -> None:
             writer = csv.writer(f)
             writer.writerow(table_rows)
         print(f'Created {file_path.name}')
-    else:
-        print(f'Scraping to existing file {file_path.name}')
+        return
 
+    with open(file_path, 'r', newline='', encoding='UTF8') as f:
+        header = next(csv.reader(f), [])
+    if header != table_rows:
+        raise ValueError(
+            f'Columns of {file_path.name} differ from scraped ones, '
+            'remove file to scrape it again'
+        )
+    print(f'Scraping to existing file {file_path.name}')
 
-def filter_duplicate_urls(
+
+def write_urls_to_csv(file_path: Path, urls: list[str]) -> None:
+    """Helper function to write URLs to a CSV file"""
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for url in urls:
+            writer.writerow([url])
+
+
+def write_csv_file(
     file_path: Path,
-    urls: list[str],
-    fieldname: str,
-) -> list[str]:
-    """Ensure each url is only scraped once when script is run multiple times"""
-    if file_path.exists():
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            # List of previously scraped urls
-            scraped_urls = [row[fieldname] for row in reader]
-            # Removes scraped urls from event_urls
-            for url in scraped_urls:
-                if url in urls:
-                    urls.remove(url)
-    return urls
+    table_rows: list[str],
+    rows: Iterable[Row],
+) -> None:
+    """Rewrites csv file with all rows through temporary file"""
+    tmp_path = file_path.with_name(f'{file_path.name}.tmp')
+    with open(tmp_path, 'w', newline='', encoding='UTF8') as f:
+        writer = csv.writer(f)
+        writer.writerow(table_rows)
+        writer.writerows(map(to_csv_row, rows))
+    tmp_path.replace(file_path)
+
+
+def get_scraped_urls(file_path: Path, fieldname: str) -> set[str]:
+    """Set of urls already scraped into csv file"""
+    if not file_path.exists():
+        return set()
+    with open(file_path, 'r') as f:
+        return {row[fieldname] for row in csv.DictReader(f)}
 
 
 def get_urls(file_path: Path) -> list[str]:
@@ -60,21 +84,40 @@ class HttpException(Exception):
 
 
 class HttpSolver(Counter):
+    """Counts failed tries of a request and waits exponential backoff with jitter"""
+
     status_492 = 0
     connection_lost = 0
 
+    @staticmethod
+    def backoff(trying: int, cap: float) -> float:
+        return random.uniform(0, min(cap, BACKOFF_BASE * 2**trying))
+
     def is_completely_connection_lost(self) -> bool:
         if self['connection_lost'] == CONNECTION_LOST_TRYING:
             return True
         print('Scraping connection lost timout')
-        time.sleep(CONNECTION_LOST_TIMOUT)
+        time.sleep(self.backoff(self['connection_lost'], CONNECTION_LOST_TIMOUT))
         self['connection_lost'] += 1
         return False
 
-    def is_completely_429(self) -> bool:
+    def is_completely_server_error(self) -> bool:
+        if self['server_error'] == CONNECTION_LOST_TRYING:
+            return True
+        print('Scraping server error timout')
+        time.sleep(self.backoff(self['server_error'], CONNECTION_LOST_TIMOUT))
+        self['server_error'] += 1
+        return False
+
+    def is_completely_429(self, wait: bool = True) -> bool:
+        """
+        Counts a 429 try. Wait is left to rate limiter when server gave
+        Retry-After, as limiter blocks the host until then
+        """
         if self['status_492'] == TO_MANY_REQUESTS_TRYING:
             return True
         print('Scraping 429 timout')
-        time.sleep(TO_MANY_REQUESTS_TIMOUT)
+        if wait:
+            time.sleep(self.backoff(self['status_492'], TO_MANY_REQUESTS_TIMOUT))
         self['status_492'] += 1
         return False
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from datetime import date, timedelta
+
+from scraper import storage
+from scraper.client import HttpClient
+from scraper.constants import (
+    CONCURRENCY,
+    EVENTS_LISTING_URL,
+    EVENTS_UPCOMING_URL,
+    WATCH_DAYS,
+    WATCH_INTERVAL,
+    WATCH_REFRESH,
+)
+from scraper.events import parse_event_fights_page, parse_event_listing
+from scraper.fetch import fetch_page
+from scraper.fightpages import parse_fight_and_stats_page, scrape_fight_urls
+from scraper.rows import FightRow, FightStatRow
+from scraper.storage import open_table
+
+
+def get_watched_urls(client: HttpClient, days: int = WATCH_DAYS) -> list[str]:
+    """
+    Urls of events on today from upcoming events listing, where event in
+    progress stays until it is over, and of events finished since days ago
+    from completed events listing. Newest go first
+    """
+    today = date.today()
+    upcoming, rows = parse_event_listing(fetch_page(client, EVENTS_UPCOMING_URL))
+    dates = {url: row.event_date for url, row in rows.items()}
+    current = [
+        url
+        for url in upcoming
+        if (event_date := dates.get(url)) is not None and event_date <= today
+    ]
+    since = today - timedelta(days=days)
+    completed, _ = parse_event_listing(fetch_page(client, EVENTS_LISTING_URL), since)
+    return list(dict.fromkeys(current + completed))
+
+
+def parse_published_fight_page(
+    url: str,
+    html: str,
+) -> tuple[FightRow | None, list[FightStatRow] | None] | None:
+    """
+    Parses fight page once it is published whole. Page of bout which result
+    has just appeared may miss its details, so it is scraped on next poll
+    """
+    rows = parse_fight_and_stats_page(url, html)
+    if rows is None or rows[0] is None:
+        print(f'Fight page is not published yet: {url}')
+        return None
+    return rows
+
+
+class EventWatcher:
+    """
+    Polls pages of events in progress. Fight page of a bout is scraped as
+    soon as its result appears on event page, and again each poll until
+    both fight and fightstats rows are written. Pages are revalidated by
+    cache of client, unchanged event pages are not parsed again
+    """
+
+    def __init__(
+        self,
+        client: HttpClient,
+        urls: list[str],
+        concurrency: int = CONCURRENCY,
+    ) -> None:
+        self.client = client
+        self.urls = urls
+        self.concurrency = concurrency
+        self.digests: dict[str, str] = {}
+        self.fight_urls: dict[str, list[str]] = {}
+
+    def poll_events(self) -> None:
+        """Takes fight urls of bouts with results from changed event pages"""
+        for url in self.urls:
+            html = fetch_page(self.client, url)
+            digest = hashlib.sha256(html.encode()).hexdigest()
+            if self.digests.get(url) == digest:
+                continue
+            self.digests[url] = digest
+            _, _, self.fight_urls[url] = parse_event_fights_page(url, html)
+
+    def poll(self) -> tuple[int, int]:
+        """Polls events once, returns numbers of written fights and fightstats"""
+        self.poll_events()
+        # Tables are closed each poll, so written rows are flushed at once
+        with (
+            open_table('fights') as fights_scraped,
+            open_table('fightstats') as fightstats_scraped,
+        ):
+            urls = [
+                fight_url
+                for fight_urls in self.fight_urls.values()
+                for fight_url in fight_urls
+                if fight_url not in fights_scraped
+                or fight_url not in fightstats_scraped
+            ]
+            if len(urls) == 0:
+                return 0, 0
+            return scrape_fight_urls(
+                self.client,
+                urls,
+                fights_scraped,
+                fightstats_scraped,
+                self.concurrency,
+                parse_published_fight_page,
+            )
+
+
+def watch_events(
+    client: HttpClient,
+    urls: list[str] | None = None,
+    interval: float = WATCH_INTERVAL,
+    stop: threading.Event | None = None,
+    concurrency: int = CONCURRENCY,
+    refresh: float = WATCH_REFRESH,
+) -> None:
+    """
+    Polls events every interval seconds until stop is set or interrupted,
+    and appends fight and fightstats rows of bouts as their results appear.
+    Events are taken from events listing every refresh seconds unless urls
+    are given. Failed poll is logged and tried again on the next one
+    """
+    stop = stop if stop is not None else threading.Event()
+    watcher = EventWatcher(client, urls or [], concurrency)
+    refreshed: float | None = None
+    if urls is not None:
+        print(f'Watching {len(urls)} events every {interval} seconds')
+
+    while True:
+        started = time.monotonic()
+        try:
+            if urls is None and (refreshed is None or started - refreshed >= refresh):
+                watcher.urls = get_watched_urls(client)
+                refreshed = started
+                print(f'Watching {len(watcher.urls)} events every {interval} seconds')
+            fights, fightstats = watcher.poll()
+        except Exception as e:
+            print(f'Error polling events: {e!r}')
+        else:
+            if fights or fightstats:
+                # Only tables written by watch are exported
+                storage.export_tables('fights', 'fightstats')
+                print(
+                    f'{time.strftime("%H:%M:%S")} {fights} fights and'
+                    f' {fightstats} fightstats scraped'
+                )
+        if stop.wait(max(interval - (time.monotonic() - started), 0)):
+            return
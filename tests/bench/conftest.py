@@ -0,0 +1,152 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+import tomllib
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import pytest
+from server import MockServer
+from synthetic import SyntheticPages, SyntheticSite
+
+from scraper import utils
+from scraper.client import HttpClient
+from scraper.constants import DIST_PATH, SCRAPED_FILES_PATH, URL_PATH
+from scraper.ratelimit import RateLimiter
+
+ROOT_PATH = Path(__file__).parents[2]
+
+
+class Bench:
+    """Timings of benchmarks by name"""
+
+    def __init__(self) -> None:
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def __call__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        rounds: int = 5,
+        setup: Callable[[], Any] | None = None,
+        **extra: Any,
+    ) -> Any:
+        """Runs func rounds times after untimed setup, returns last result"""
+        timings = []
+        result = None
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        self.results[name] = {
+            'rounds': rounds,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings),
+            'max': max(timings),
+            **extra,
+        }
+        return result
+
+    def report(self) -> dict[str, Any]:
+        """Results with version of project and environment"""
+        pyproject = tomllib.loads((ROOT_PATH / 'pyproject.toml').read_text())
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=ROOT_PATH,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'version': pyproject['tool']['poetry']['version'],
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'results': self.results,
+        }
+
+
+BENCH = Bench()
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    path = session.config.getoption('--bench-json')
+    if path and BENCH.results:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(BENCH.report(), indent=2))
+
+
+def pytest_generate_tests(metafunc) -> None:
+    if 'scale' in metafunc.fixturenames:
+        scales = metafunc.config.getoption('--bench-scales').split(',')
+        metafunc.parametrize('scale', [int(scale) for scale in scales])
+
+
+@pytest.fixture
+def bench() -> Bench:
+    return BENCH
+
+
+@pytest.fixture(scope='session')
+def server():
+    port = urlparse(os.environ['UFC_BASE_URL']).port
+    with MockServer(port) as mock_server:
+        yield mock_server
+
+
+@pytest.fixture
+def faults(server: MockServer, monkeypatch: pytest.MonkeyPatch):
+    """Injects faults into server, retries of scraper are not waited out"""
+    monkeypatch.setattr(utils, 'BACKOFF_BASE', 0.001)
+    yield server.inject
+    server.inject()
+
+
+@pytest.fixture
+def synthetic(server: MockServer):
+    """Serves synthetic site instead of saved corpus while test runs"""
+    corpus = server.pages
+
+    def serve(site: SyntheticSite) -> SyntheticPages:
+        server.pages = site.pages(server.base_url)
+        return server.pages
+
+    yield serve
+    server.pages = corpus
+
+
+def clean_dist() -> None:
+    """Empty data folder as before the first run of scraper"""
+    shutil.rmtree(DIST_PATH, ignore_errors=True)
+    SCRAPED_FILES_PATH.mkdir(parents=True)
+    URL_PATH.mkdir(parents=True)
+
+
+@pytest.fixture
+def dist() -> Callable[[], None]:
+    clean_dist()
+    return clean_dist
+
+
+@pytest.fixture
+def client(server: MockServer):
+    # Rate limit is out of benchmarks of scraper itself, injected 429s
+    # don't depend on rate and would slow limiter down to its min rate
+    limiter = RateLimiter(rate=10_000, burst=100, min_rate=10_000, max_rate=10_000)
+    with HttpClient(limiter=limiter) as http_client:
+        yield http_client
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+CORPUS_PATH = Path(__file__).parent / 'corpus'
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> tuple[dict, dict[str, str]]:
+    """Manifest of saved pages and html of each page by its url"""
+    manifest = json.loads((path / 'manifest.json').read_text())
+    pages = {
+        url: (path / file_name).read_text()
+        for url, file_name in manifest['pages'].items()
+    }
+    return manifest, pages
+
+
+def page_key(url: str) -> str:
+    """Path with query of url, the same for ufcstats.com and its mirror"""
+    parsed = urlparse(url)
+    return f'{parsed.path}?{parsed.query}' if parsed.query else parsed.path
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'MockServer'
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        fault = self.server.next_fault()
+        self.server.requests[self.path] += 1
+        if fault == 'drop':
+            # Closes connection without response, as lost connection
+            self.close_connection = True
+            return
+        if fault == 'throttle':
+            self.send(429, b'', {'Retry-After': self.server.retry_after})
+            return
+
+        body = self.server.pages.get(self.path)
+        if body is None:
+            self.send(404, b'')
+            return
+        # Pages changed over time get new ETag, unchanged ones are revalidated
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server.revalidated += 1
+            self.send(304, b'', {'ETag': etag})
+            return
+        self.send(
+            200, body, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag}
+        )
+
+    def send(self, status: int, body: bytes, headers: dict | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Local http server mimicking ufcstats.com urls with saved pages.
+    Every throttle_every request is answered with 429 and every
+    drop_every request loses connection
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        corpus_path: Path = CORPUS_PATH,
+        retry_after: str = '0',
+    ) -> None:
+        super().__init__(('127.0.0.1', port), MockHandler)
+        self.base_url = f'http://127.0.0.1:{self.server_address[1]}'
+        manifest, pages = load_corpus(corpus_path)
+        self.pages: Mapping[str, bytes] = {
+            page_key(url): html.replace(manifest['base_url'], self.base_url).encode()
+            for url, html in pages.items()
+        }
+        self.retry_after = retry_after
+        self.throttle_every = 0
+        self.drop_every = 0
+        self.requests: Counter = Counter()
+        self.faults: Counter = Counter()
+        self.revalidated = 0
+        self.served = 0
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    def next_fault(self) -> str | None:
+        with self.lock:
+            self.served += 1
+            fault = None
+            if self.throttle_every and self.served % self.throttle_every == 0:
+                fault = 'throttle'
+            elif self.drop_every and self.served % self.drop_every == 0:
+                fault = 'drop'
+            if fault is not None:
+                self.faults[fault] += 1
+            return fault
+
+    def inject(self, throttle_every: int = 0, drop_every: int = 0) -> None:
+        """Sets faults of next requests and resets counters"""
+        with self.lock:
+            self.throttle_every = throttle_every
+            self.drop_every = drop_every
+            self.served = 0
+            self.requests.clear()
+            self.faults.clear()
+            self.revalidated = 0
+
+    def start(self) -> 'MockServer':
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
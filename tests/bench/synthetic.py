@@ -0,0 +1,781 @@
+import argparse
+import csv
+import hashlib
+import json
+import random
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from string import ascii_lowercase
+
+from server import page_key
+
+from scraper.constants import (
+    EVENT_DATA_PATH,
+    EVENT_FIGHT_TABLE_ROWS,
+    EVENT_FIGHT_URLS,
+    EVENT_TABLE_ROWS,
+    EVENT_URLS,
+    FIGHT_DATA_PATH,
+    FIGHT_TABLE_ROWS,
+    FIGHT_URLS,
+    FIGHTER_DATA_PATH,
+    FIGHTER_TABLE_ROWS,
+    FIGHTER_URLS,
+    FIGHTSTATS_DATA_PATH,
+    FIGHTSTATS_TABLE_ROWS,
+)
+from scraper.events import parse_event_fights_page, parse_event_listing
+from scraper.fighters import parse_fighter_listing, parse_fighter_page
+from scraper.fightpages import parse_fight_and_stats_page
+from scraper.rows import FighterRow, FightRow, FightStatRow
+from scraper.utils import write_csv_file, write_urls_to_csv
+
+SITE_URL = 'http://ufcstats.com'
+EVENTS_LISTING_KEY = '/statistics/events/completed?page=all'
+
+FIRST_NAMES = [
+    'Alex', 'Jamahal', 'Zhang', 'Jack', 'Joe', 'Edgar', 'Daniel', 'Royce',
+    'Ken', 'Patrick', 'Tom', 'Danny', 'Islam', 'Sean', 'Max', 'Dustin',
+    'Justin', 'Charles', 'Leon', 'Kamaru', 'Belal', 'Amanda', 'Valentina',
+    'Rose', 'Tatiana', 'Marlon', 'Ilia', 'Brandon', 'Deiveson', 'Jiri',
+]  # fmt: skip
+SYLLABLES = [
+    'ka', 'ro', 'mi', 'sha', 'ten', 'vo', 'lu', 'dre', 'ba', 'ne', 'zu', 'gor',
+    'pa', 'li', 'hel', 'an', 'cor', 'yev', 'ste', 'wo', 'ix', 'tam', 'fe', 'qui',
+]  # fmt: skip
+NICKNAMES = [
+    'The Joker', 'Poatan', 'Sweet Dreams', 'Magnum', 'Fury', 'Bodybagz',
+    'Golden Boy', 'The Assassin', 'Bullet', 'The Eagle', 'Blessed',
+    'Do Bronx', 'Rocky', 'Thug Rose', 'Bullet Train', 'Chito', 'Lionheart',
+]  # fmt: skip
+REFEREES = [
+    'Herb Dean', 'Marc Goddard', 'Jason Herzog', 'Mike Beltran', 'Keith Peterson',
+    'Dan Miragliotta', 'Kerry Hatley', 'Chris Tognoni', 'Mark Smith',
+]  # fmt: skip
+JUDGES = ["Sal D'amato", 'Derek Cleary', 'Ron McCarthy', 'Mike Bell', 'Chris Lee']
+LOCATIONS = [
+    'Las Vegas, Nevada, USA',
+    'Abu Dhabi, Abu Dhabi, United Arab Emirates',
+    'Mexico City, Distrito Federal, Mexico',
+    'Denver, Colorado, USA',
+    'London, England, United Kingdom',
+    'Sydney, New South Wales, Australia',
+    'Paris, Ile-de-France, France',
+    'Singapore, Singapore',
+]
+# Weight classes with weight limit in lbs, women compete up to featherweight
+WEIGHT_CLASSES = [
+    ('Strawweight', 115),
+    ('Flyweight', 125),
+    ('Bantamweight', 135),
+    ('Featherweight', 145),
+    ('Lightweight', 155),
+    ('Welterweight', 170),
+    ('Middleweight', 185),
+    ('Light Heavyweight', 205),
+    ('Heavyweight', 265),
+]
+FINISHES = {
+    'KO/TKO': ['Punch to Head At Distance', 'Kick to Head At Distance', 'Elbows'],
+    'Submission': ['Rear Naked Choke', 'Guillotine Choke', 'Armbar', 'Heel Hook'],
+}
+DECISIONS = ['Decision - Unanimous', 'Decision - Split', 'Decision - Majority']
+
+HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <title>UFC Stats</title>
+</head>
+<body class="b-page">
+<header class="b-statistics__header">
+  <div class="b-statistics__inner">
+    <ul class="b-statistics__nav-items">
+      <li class="b-statistics__nav-item">
+        <a class="b-statistics__nav-link" href="{base_url}/statistics/events/completed">Events</a>
+      </li>
+      <li class="b-statistics__nav-item">
+        <a class="b-statistics__nav-link" href="{base_url}/statistics/fighters">Fighters</a>
+      </li>
+      <li class="b-statistics__nav-item">
+        <a class="b-statistics__nav-link" href="{base_url}/statistics/leaders">Stat Leaders</a>
+      </li>
+    </ul>
+  </div>
+</header>
+"""  # noqa: E501
+FOOTER = """</body>
+</html>
+"""
+EVENTS_LISTING = """<section class="b-statistics__section_list">
+<div class="l-page__container">
+<table class="b-statistics__table-events">
+  <thead class="b-statistics__table-caption">
+    <tr class="b-statistics__table-row">
+      <th class="b-statistics__table-col">Name/date</th>
+      <th class="b-statistics__table-col">Location</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr class="b-statistics__table-row">
+      <td class="b-statistics__table-col b-statistics__table-col_type_clear"></td>
+    </tr>
+{rows}  </tbody>
+</table>
+</div>
+</section>
+"""
+EVENTS_LISTING_ROW = """    <tr class="b-statistics__table-row">
+      <td class="b-statistics__table-col">
+        <i class="b-statistics__table-content">
+          <a href="{url}" class="b-link b-link_style_black">
+            {name}
+          </a>
+          <span class="b-statistics__date">
+            {date}
+          </span>
+        </i>
+      </td>
+      <td class="b-statistics__table-col b-statistics__table-col_style_big-top-padding">
+        {location}
+      </td>
+    </tr>
+"""  # noqa: E501
+EVENT = """<section class="b-statistics__section_details">
+  <div class="l-page__container">
+    <h2 class="b-content__title">
+      <span class="b-content__title-highlight">
+        {name}
+      </span>
+    </h2>
+    <div class="b-fight-details">
+      <div class="b-list__info-box b-list__info-box_style_large-width">
+        <ul class="b-list__box-list">
+          <li class="b-list__box-list-item">
+            <i class="b-list__box-item-title">
+              Date:
+            </i>
+            {date}
+          </li>
+          <li class="b-list__box-list-item">
+            <i class="b-list__box-item-title">
+              Location:
+            </i>
+            {location}
+          </li>
+        </ul>
+      </div>
+      <table class="b-fight-details__table b-fight-details__table_style_margin-top b-fight-details__table_type_event-details js-fight-table">
+        <tbody class="b-fight-details__table-body">
+{rows}        </tbody>
+      </table>
+    </div>
+  </div>
+</section>
+"""  # noqa: E501
+EVENT_ROW = """          <tr class="b-fight-details__table-row b-fight-details__table-row__hover js-fight-details-click" data-link="{url}">
+            <td class="b-fight-details__table-col">
+              <p class="b-fight-details__table-text">
+                <a href="{url}" class="b-flag b-flag_style_green"><i class="b-flag__inner"><i class="b-flag__text">win</i></i></a>
+              </p>
+            </td>
+            <td class="b-fight-details__table-col l-page_align_left">
+              <p class="b-fight-details__table-text"><a href="{f_1_url}" class="b-link b-link_style_black">{f_1}</a></p>
+              <p class="b-fight-details__table-text"><a href="{f_2_url}" class="b-link b-link_style_black">{f_2}</a></p>
+            </td>
+          </tr>
+"""  # noqa: E501
+FIGHT = """<section class="b-statistics__section_details">
+  <div class="l-page__container">
+    <h2 class="b-content__title">
+      <a class="b-link" href="{event_url}">
+        {event_name}
+      </a>
+    </h2>
+    <div class="b-fight-details">
+      <div class="b-fight-details__persons clearfix">
+{persons}      </div>
+      <div class="b-fight-details__fight">
+        <div class="b-fight-details__fight-head">
+          <i class="b-fight-details__fight-title">
+            {title}
+          </i>
+        </div>
+        <div class="b-fight-details__content">
+          <p class="b-fight-details__text">
+            <i class="b-fight-details__text-item_first">
+              <i class="b-fight-details__label">Method:</i>
+              <i style="font-style: normal">
+                {method}
+              </i>
+            </i>
+            <i class="b-fight-details__text-item">
+              <i class="b-fight-details__label">Round:</i>
+              {finish_round}
+            </i>
+            <i class="b-fight-details__text-item">
+              <i class="b-fight-details__label">Time:</i>
+              {finish_time}
+            </i>
+            <i class="b-fight-details__text-item">
+              <i class="b-fight-details__label">Time format:</i>
+              {time_format}
+            </i>
+            <i class="b-fight-details__text-item">
+              <i class="b-fight-details__label">Referee:</i>
+              <span>
+                {referee}
+              </span>
+            </i>
+          </p>
+          <p class="b-fight-details__text">
+            <i class="b-fight-details__label">Details:</i>
+{details}          </p>
+        </div>
+      </div>
+{totals}    </div>
+  </div>
+</section>
+"""
+PERSON = """        <div class="b-fight-details__person">
+          <i class="b-fight-details__person-status b-fight-details__person-status_style_gray">
+            {status}
+          </i>
+          <div class="b-fight-details__person-text">
+            <h3 class="b-fight-details__person-name">
+              <a class="b-link b-fight-details__person-link" href="{url}">{name}</a>
+            </h3>
+            <p class="b-fight-details__person-title"></p>
+          </div>
+        </div>
+"""  # noqa: E501
+JUDGE = """            <i class="b-fight-details__text-item">
+              {judge}
+              <span>{score}.</span>
+            </i>
+"""
+TOTALS = """      <section class="b-fight-details__section js-fight-section">
+        <p class="b-fight-details__collapse-link_tot">Totals</p>
+      </section>
+      <section class="b-fight-details__section js-fight-section">
+        <table style="width: 745px">
+          <tbody class="b-fight-details__table-body">
+            <tr class="b-fight-details__table-row">
+{cols}            </tr>
+          </tbody>
+        </table>
+      </section>
+"""
+TOTALS_COL = """          <td class="b-fight-details__table-col">
+            <p class="b-fight-details__table-text">
+              {}
+            </p>
+            <p class="b-fight-details__table-text">
+              {}
+            </p>
+          </td>
+"""
+FIGHTER = """<section class="b-statistics__section_details">
+  <div class="l-page__container">
+    <h2 class="b-content__title">
+      <span class="b-content__title-highlight">
+        {name}
+      </span>
+      <span class="b-content__title-record">
+        Record: {record}
+      </span>
+    </h2>
+    <p class="b-content__Nickname">
+      {nickname}
+    </p>
+    <div class="b-list__info-box b-list__info-box_style_small-width js-guide">
+      <ul class="b-list__box-list">
+{items}      </ul>
+    </div>
+  </div>
+</section>
+"""
+FIGHTER_ITEM = """        <li class="b-list__box-list-item b-list__box-list-item_type_block">
+          <i class="b-list__box-item-title b-list__box-item-title_type_width">
+            {}:
+          </i>
+          {}
+        </li>
+"""  # noqa: E501
+FIGHTERS_LISTING = """<section class="b-statistics__section_list">
+<div class="l-page__container">
+<table class="b-statistics__table">
+  <thead class="b-statistics__table-caption">
+    <tr class="b-statistics__table-row"><th class="b-statistics__table-col">First</th><th class="b-statistics__table-col">Last</th><th class="b-statistics__table-col">Nickname</th><th class="b-statistics__table-col">Ht.</th><th class="b-statistics__table-col">Wt.</th><th class="b-statistics__table-col">Reach</th><th class="b-statistics__table-col">Stance</th><th class="b-statistics__table-col">W</th><th class="b-statistics__table-col">L</th><th class="b-statistics__table-col">D</th><th class="b-statistics__table-col">Belt</th></tr>
+  </thead>
+  <tbody>
+    <tr class="b-statistics__table-row">
+      <td class="b-statistics__table-col b-statistics__table-col_type_clear"></td>
+    </tr>
+{rows}  </tbody>
+</table>
+</div>
+</section>
+"""  # noqa: E501
+FIGHTERS_LISTING_ROW = """    <tr class="b-statistics__table-row">
+      <td class="b-statistics__table-col">
+        <a href="{url}" class="b-link b-link_style_black">{first}</a>
+      </td>
+      <td class="b-statistics__table-col">
+        <a href="{url}" class="b-link b-link_style_black">{last}</a>
+      </td>
+      <td class="b-statistics__table-col">
+        <a href="{url}" class="b-link b-link_style_black">{nickname}</a>
+      </td>
+{cols}      <td class="b-statistics__table-col">
+      </td>
+    </tr>
+"""
+FIGHTERS_LISTING_COL = """      <td class="b-statistics__table-col">
+        {}
+      </td>
+"""
+
+
+@dataclass(frozen=True)
+class Fighter:
+    first: str
+    last: str
+    nickname: str
+    height: str
+    weight: str
+    reach: str
+    stance: str
+    dob: str
+    record: tuple[int, int, int, int]
+
+    @property
+    def name(self) -> str:
+        return f'{self.first} {self.last}'
+
+
+@dataclass(frozen=True)
+class Event:
+    name: str
+    date: str
+    location: str
+    fights: range
+
+
+@dataclass(frozen=True)
+class Fight:
+    event: int
+    fighters: tuple[int, int]
+    statuses: tuple[str, str]
+    title: str
+    method: str
+    details: str
+    judges: list[tuple[str, str]]
+    finish_round: int
+    finish_time: str
+    rounds: int
+    referee: str
+    totals: list[tuple[str, str]] | None
+
+
+def unique_name(i: int) -> str:
+    """Last name made of syllables of i, so names of fighters are unique"""
+    i += len(SYLLABLES)
+    syllables = []
+    while i:
+        i, syllable = divmod(i, len(SYLLABLES))
+        syllables.append(SYLLABLES[syllable])
+    return ''.join(syllables).capitalize()
+
+
+class SyntheticSite:
+    """
+    Consistent ufcstats.com of given size: events hold fights of fighters
+    of fighters listing. Entities are generated from seed by their number,
+    so pages are rendered lazily in any order and are the same every run
+    """
+
+    def __init__(
+        self,
+        fights: int,
+        fighters: int,
+        fights_per_event: int = 12,
+        seed: int = 0,
+    ) -> None:
+        if fighters < 2:
+            raise ValueError('Fights need at least 2 fighters')
+        self.fights = fights
+        self.fighters = fighters
+        self.fights_per_event = fights_per_event
+        self.seed = seed
+        self.events = -(-fights // fights_per_event)
+        self.ids = {
+            kind: {self.uid(kind, i): i for i in range(count)}
+            for kind, count in (
+                ('event', self.events),
+                ('fight', fights),
+                ('fighter', fighters),
+            )
+        }
+        self.by_letter: dict[str, list[int]] = {}
+        for i in range(fighters):
+            self.by_letter.setdefault(unique_name(i)[0].lower(), []).append(i)
+
+    def uid(self, kind: str, i: int) -> str:
+        return hashlib.md5(f'{self.seed}:{kind}:{i}'.encode()).hexdigest()[:16]
+
+    def rng(self, kind: str, i: int) -> random.Random:
+        return random.Random(f'{self.seed}:{kind}:{i}')
+
+    def url(self, kind: str, i: int, base_url: str = SITE_URL) -> str:
+        return f'{base_url}/{kind}-details/{self.uid(kind, i)}'
+
+    def fighter(self, i: int) -> Fighter:
+        rng = self.rng('fighter', i)
+        height = rng.randint(62, 80)
+        # Taller fighters compete in heavier weight classes
+        weight_class = min(max(height - 64, 0) // 2, len(WEIGHT_CLASSES) - 1)
+        weight = WEIGHT_CLASSES[weight_class][1]
+        dob = date(1960, 1, 1) + timedelta(days=rng.randint(0, 16000))
+        return Fighter(
+            first=rng.choice(FIRST_NAMES),
+            last=unique_name(i),
+            nickname=rng.choice(NICKNAMES) if rng.random() < 0.6 else '',
+            height='--' if rng.random() < 0.03 else f'{height // 12}\' {height % 12}"',
+            weight=f'{weight} lbs.',
+            reach='--' if rng.random() < 0.2 else f'{height + rng.randint(-2, 5)}"',
+            stance=rng.choice(['Orthodox'] * 6 + ['Southpaw'] * 3 + ['Switch', '']),
+            dob='--' if rng.random() < 0.1 else dob.strftime('%b %d, %Y'),
+            record=(
+                rng.randint(0, 30),
+                rng.randint(0, 15),
+                rng.randint(0, 2) if rng.random() < 0.1 else 0,
+                1 if rng.random() < 0.1 else 0,
+            ),
+        )
+
+    def event(self, i: int) -> Event:
+        rng = self.rng('event', i)
+        fights = range(
+            i * self.fights_per_event,
+            min((i + 1) * self.fights_per_event, self.fights),
+        )
+        main_event = self.fight(fights[0])
+        f_1, f_2 = (self.fighter(f).last for f in main_event.fighters)
+        # Newest event goes first, numbered events every fourth week
+        name = f'{f_1} vs. {f_2}'
+        if i % 4 == 0:
+            name = f'UFC {(self.events - i) // 4 + 1}: {name}'
+        else:
+            name = f'UFC Fight Night: {name}'
+        return Event(
+            name=name,
+            date=(date(2024, 12, 14) - timedelta(weeks=i)).strftime('%B %d, %Y'),
+            location=rng.choice(LOCATIONS),
+            fights=fights,
+        )
+
+    def fight(self, i: int) -> Fight:
+        rng = self.rng('fight', i)
+        event = i // self.fights_per_event
+        main_event = i % self.fights_per_event == 0
+        first, second = rng.sample(range(self.fighters), 2)
+        fighters = (first, second)
+
+        weight_class = rng.choice(WEIGHT_CLASSES)[0]
+        women = weight_class in ('Strawweight', 'Flyweight', 'Bantamweight')
+        women = women and rng.random() < 0.3
+        title = f"Women's {weight_class}" if women else weight_class
+        if rng.random() < 0.02:
+            title = 'Catch Weight Bout'
+        elif main_event and rng.random() < 0.5:
+            title = f'UFC {title} Title Bout'
+        else:
+            title = f'{title} Bout'
+        rounds = 5 if main_event else 3
+
+        method = rng.choice(DECISIONS + list(FINISHES) * 2)
+        statuses = ('W', 'L')
+        details, judges = '', []
+        if method in FINISHES:
+            details = rng.choice(FINISHES[method])
+            finish_round = rng.randint(1, rounds)
+            finish_time = f'{rng.randint(0, 4)}:{rng.randint(0, 59):02}'
+        else:
+            judges = [
+                (judge, f'{rng.randint(28, 30)} - {rng.randint(26, 28)}')
+                for judge in rng.sample(JUDGES, 3)
+            ]
+            finish_round, finish_time = rounds, '5:00'
+            if method == 'Decision - Majority' and rng.random() < 0.3:
+                statuses = ('D', 'D')
+        if rng.random() < 0.5:
+            statuses = statuses[::-1]
+
+        # Older fights lack totals, as early events on ufcstats.com
+        totals = None
+        if event < self.events * 0.9 or rng.random() < 0.5:
+            totals = [self.totals(rng, finish_round) for _ in fighters]
+        return Fight(
+            event=event,
+            fighters=fighters,
+            statuses=statuses,
+            title=title,
+            method=method,
+            details=details,
+            judges=judges,
+            finish_round=finish_round,
+            finish_time=finish_time,
+            rounds=rounds,
+            referee=rng.choice(REFEREES),
+            totals=list(zip(*totals)) if totals else None,
+        )
+
+    @staticmethod
+    def totals(rng: random.Random, rounds: int) -> list[str]:
+        """Totals columns of fighter: KD, sig. str., %, total str., td, %, ..."""
+        sig_att = rng.randint(0, 60 * rounds)
+        sig_succ = rng.randint(0, sig_att)
+        total_att = sig_att + rng.randint(0, 20 * rounds)
+        total_succ = sig_succ + rng.randint(0, total_att - sig_att)
+        td_att = rng.randint(0, 4 * rounds)
+        td_succ = rng.randint(0, td_att)
+        return [
+            str(rng.randint(0, 2)),
+            f'{sig_succ} of {sig_att}',
+            f'{100 * sig_succ // sig_att}%' if sig_att else '---',
+            f'{total_succ} of {total_att}',
+            f'{td_succ} of {td_att}',
+            f'{100 * td_succ // td_att}%' if td_att else '---',
+            str(rng.randint(0, 3)),
+            str(rng.randint(0, 1)),
+            f'{rng.randint(0, 5 * rounds)}:{rng.randint(0, 59):02}',
+        ]
+
+    def pages(self, base_url: str = SITE_URL) -> 'SyntheticPages':
+        return SyntheticPages(self, base_url)
+
+
+class SyntheticPages(Mapping):
+    """Html of synthetic site by path with query of url, as MockServer serves"""
+
+    def __init__(self, site: SyntheticSite, base_url: str = SITE_URL) -> None:
+        self.site = site
+        self.base_url = base_url
+
+    def __getitem__(self, key: str) -> bytes:
+        return self.render(key).encode()
+
+    def __iter__(self) -> Iterator[str]:
+        yield EVENTS_LISTING_KEY
+        for letter in ascii_lowercase:
+            yield f'/statistics/fighters?char={letter}&page=all'
+        for kind, ids in self.site.ids.items():
+            for uid in ids:
+                yield f'/{kind}-details/{uid}'
+
+    def __len__(self) -> int:
+        return 1 + len(ascii_lowercase) + sum(map(len, self.site.ids.values()))
+
+    def url(self, kind: str, i: int) -> str:
+        return self.site.url(kind, i, self.base_url)
+
+    def render(self, key: str) -> str:
+        if key == EVENTS_LISTING_KEY:
+            body = self.events_listing()
+        elif key.startswith('/statistics/fighters?char='):
+            letter = key.split('=')[1].split('&')[0]
+            body = self.fighters_listing(letter)
+        else:
+            kind, _, uid = key.strip('/').partition('/')
+            kind = kind.removesuffix('-details')
+            i = self.site.ids.get(kind, {}).get(uid)
+            if i is None:
+                raise KeyError(key)
+            body = getattr(self, f'{kind}_page')(i)
+        return HEADER.format(base_url=self.base_url) + body + FOOTER
+
+    def events_listing(self) -> str:
+        rows = []
+        for i in range(self.site.events):
+            event = self.site.event(i)
+            rows.append(
+                EVENTS_LISTING_ROW.format(
+                    url=self.url('event', i),
+                    name=event.name,
+                    date=event.date,
+                    location=event.location,
+                )
+            )
+        return EVENTS_LISTING.format(rows=''.join(rows))
+
+    def event_page(self, i: int) -> str:
+        event = self.site.event(i)
+        rows = []
+        for f in event.fights:
+            fight = self.site.fight(f)
+            f_1, f_2 = fight.fighters
+            rows.append(
+                EVENT_ROW.format(
+                    url=self.url('fight', f),
+                    f_1_url=self.url('fighter', f_1),
+                    f_1=self.site.fighter(f_1).name,
+                    f_2_url=self.url('fighter', f_2),
+                    f_2=self.site.fighter(f_2).name,
+                )
+            )
+        return EVENT.format(
+            name=event.name,
+            date=event.date,
+            location=event.location,
+            rows=''.join(rows),
+        )
+
+    def fight_page(self, i: int) -> str:
+        fight = self.site.fight(i)
+        fighters = [self.site.fighter(f) for f in fight.fighters]
+        persons = ''.join(
+            PERSON.format(status=status, url=self.url('fighter', f), name=fighter.name)
+            for f, fighter, status in zip(fight.fighters, fighters, fight.statuses)
+        )
+        details = f'            {fight.details}\n' if fight.details else ''
+        details += ''.join(
+            JUDGE.format(judge=judge, score=score) for judge, score in fight.judges
+        )
+        totals = ''
+        if fight.totals is not None:
+            names = TOTALS_COL.format(*(fighter.name for fighter in fighters))
+            totals = TOTALS.format(
+                cols=names + ''.join(TOTALS_COL.format(*col) for col in fight.totals)
+            )
+        return FIGHT.format(
+            event_url=self.url('event', fight.event),
+            event_name=self.site.event(fight.event).name,
+            persons=persons,
+            title=fight.title,
+            method=fight.method,
+            finish_round=fight.finish_round,
+            finish_time=fight.finish_time,
+            time_format=f'{fight.rounds} Rnd ({"-".join("5" * fight.rounds)})',
+            referee=fight.referee,
+            details=details,
+            totals=totals,
+        )
+
+    def fighter_page(self, i: int) -> str:
+        fighter = self.site.fighter(i)
+        wins, losses, draws, nc = fighter.record
+        items = [
+            ('Height', fighter.height),
+            ('Weight', fighter.weight),
+            ('Reach', fighter.reach),
+            ('STANCE', fighter.stance),
+            ('DOB', fighter.dob),
+        ]
+        return FIGHTER.format(
+            name=fighter.name,
+            record=f'{wins}-{losses}-{draws}' + (f' ({nc} NC)' if nc else ''),
+            nickname=fighter.nickname,
+            items=''.join(FIGHTER_ITEM.format(*item) for item in items),
+        )
+
+    def fighters_listing(self, letter: str) -> str:
+        rows = []
+        fighters = self.site.by_letter.get(letter, [])
+        for i in sorted(fighters, key=unique_name):
+            fighter = self.site.fighter(i)
+            reach = fighter.reach.replace('"', '.0"')
+            cols = [fighter.height, fighter.weight, reach, fighter.stance]
+            cols.extend(map(str, fighter.record[:3]))
+            rows.append(
+                FIGHTERS_LISTING_ROW.format(
+                    url=self.url('fighter', i),
+                    first=fighter.first,
+                    last=fighter.last,
+                    nickname=fighter.nickname,
+                    cols=''.join(FIGHTERS_LISTING_COL.format(col) for col in cols),
+                )
+            )
+        return FIGHTERS_LISTING.format(rows=''.join(rows))
+
+
+def write_corpus(pages: SyntheticPages, path: Path, version: int = 1) -> None:
+    """Writes pages as saved corpus with manifest, served by MockServer"""
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for key in pages:
+        file_name = key.strip('/').replace('/', '_').replace('?', '_') + '.html'
+        file_name = file_name.replace('=', '_').replace('&', '_')
+        (path / file_name).write_text(pages.render(key))
+        manifest[pages.base_url + key] = file_name
+    (path / 'manifest.json').write_text(
+        json.dumps(
+            {'version': version, 'base_url': pages.base_url, 'pages': manifest},
+            indent=2,
+        )
+    )
+
+
+def write_tables(pages: SyntheticPages) -> None:
+    """
+    Writes scraped tables and urls of site as full scrape does, pages are
+    parsed by parsers of scraper, so rows are the same as scraped ones
+    """
+    event_urls, event_rows = parse_event_listing(pages.render(EVENTS_LISTING_KEY))
+    write_urls_to_csv(EVENT_URLS, event_urls)
+    write_csv_file(EVENT_DATA_PATH, EVENT_TABLE_ROWS, event_rows.values())
+
+    event_fights: list[list[str]] = []
+    for url in event_urls:
+        _, _, fight_urls = parse_event_fights_page(url, pages.render(page_key(url)))
+        event_fights.extend([url, fight_url] for fight_url in fight_urls)
+    with open(EVENT_FIGHT_URLS, 'w', newline='') as event_fights_file:
+        writer = csv.writer(event_fights_file)
+        writer.writerow(EVENT_FIGHT_TABLE_ROWS)
+        writer.writerows(event_fights)
+    write_urls_to_csv(FIGHT_URLS, [fight_url for _, fight_url in event_fights])
+
+    fights: list[FightRow] = []
+    fightstats: list[FightStatRow] = []
+    for _, url in event_fights:
+        rows = parse_fight_and_stats_page(url, pages.render(page_key(url)))
+        if rows is None:
+            continue
+        fight, stats = rows
+        if fight is not None:
+            fights.append(fight)
+        if stats is not None:
+            fightstats.extend(stats)
+    write_csv_file(FIGHT_DATA_PATH, FIGHT_TABLE_ROWS, fights)
+    write_csv_file(FIGHTSTATS_DATA_PATH, FIGHTSTATS_TABLE_ROWS, fightstats)
+
+    fighters: list[FighterRow] = []
+    for letter in ascii_lowercase:
+        key = f'/statistics/fighters?char={letter}&page=all'
+        fighters.extend(parse_fighter_listing(key, pages.render(key)) or [])
+    write_urls_to_csv(FIGHTER_URLS, [row.fighter_url for row in fighters])
+    for row in fighters:
+        html = pages.render(page_key(row.fighter_url))
+        profile = parse_fighter_page(row.fighter_url, html)
+        if profile is not None:
+            row.fighter_dob = profile.fighter_dob
+            row.fighter_nc_dq = profile.fighter_nc_dq
+    write_csv_file(FIGHTER_DATA_PATH, FIGHTER_TABLE_ROWS, fighters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generates synthetic ufcstats.com')
+    parser.add_argument('path', type=Path, help='Folder of saved corpus')
+    parser.add_argument('--fights', type=int, default=100_000)
+    parser.add_argument('--fighters', type=int, default=50_000)
+    parser.add_argument('--fights-per-event', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    site = SyntheticSite(args.fights, args.fighters, args.fights_per_event, args.seed)
+    write_corpus(site.pages(), args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+
+from scraper import events, fighters, fightpages, normalise_tables
+from scraper.constants import (
+    EVENT_DATA_PATH,
+    FIGHT_DATA_PATH,
+    FIGHTER_DATA_PATH,
+    FIGHTER_TABLE_ROWS,
+    FIGHTSTATS_DATA_PATH,
+    NORMALISED_EVENT_PATH,
+    NORMALISED_FIGHT_PATH,
+    NORMALISED_FIGHTER_PATH,
+    NORMALISED_FIGHTSTATS_PATH,
+    NORMALISED_FILES_PATH,
+)
+
+ROUNDS = 5
+
+
+def test_normalise_tables(bench, client, dist) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client)
+    bench(
+        'normalise_tables',
+        lambda: normalise_tables.normalise_tables(incremental=False),
+        ROUNDS,
+    )
+    assert pd.read_csv(NORMALISED_EVENT_PATH)['event_id'].is_unique
+    assert pd.read_csv(NORMALISED_FIGHT_PATH)['event_id'].notna().all()
+    assert pd.read_csv(NORMALISED_FIGHTSTATS_PATH)['fight_id'].notna().all()
+    assert pd.read_csv(NORMALISED_FIGHTER_PATH)['fighter_id'].is_unique
+
+
+def test_broken_run_repeats_no_rows(client, dist, monkeypatch) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client)
+    normalise_tables.normalise_tables(incremental=False)
+    expected = read_normalised()
+
+    lines = FIGHT_DATA_PATH.read_text().splitlines(keepends=True)
+    FIGHT_DATA_PATH.write_text(''.join(lines[:-2]))
+    normalise_tables.normalise_tables()
+    with open(FIGHT_DATA_PATH, 'a') as f:
+        f.writelines(lines[-2:])
+
+    def crash(offsets: dict[str, int]) -> None:
+        raise KeyboardInterrupt
+
+    # Run is broken after rows are appended, but before offsets are saved
+    with monkeypatch.context() as patch:
+        patch.setattr(normalise_tables, 'save_offsets', crash)
+        with pytest.raises(KeyboardInterrupt):
+            normalise_tables.normalise_tables()
+    normalise_tables.normalise_tables()
+
+    assert read_normalised() == expected
+    assert pd.read_csv(NORMALISED_FIGHT_PATH)['fight_id'].is_unique
+
+
+def read_normalised() -> dict[str, str]:
+    return {path.name: path.read_text() for path in NORMALISED_FILES_PATH.glob('*.csv')}
+
+
+def test_stats_of_fight_appended_apart_keep_their_ids(client, dist) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client)
+    normalise_tables.normalise_tables(incremental=False)
+    expected = read_normalised()
+
+    # The last stats row was being written while the last run read the file
+    lines = FIGHTSTATS_DATA_PATH.read_text().splitlines(keepends=True)
+    FIGHTSTATS_DATA_PATH.write_text(''.join(lines[:-1]))
+    normalise_tables.normalise_tables(incremental=False)
+    with open(FIGHTSTATS_DATA_PATH, 'a') as f:
+        f.write(lines[-1])
+    normalise_tables.normalise_tables()
+
+    assert read_normalised() == expected
+    assert pd.read_csv(NORMALISED_FIGHTSTATS_PATH)['fight_stat_id'].is_unique
+
+
+def test_file_scraped_again_is_normalised_from_scratch(client, dist) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client)
+    lines = EVENT_DATA_PATH.read_text().splitlines(keepends=True)
+    EVENT_DATA_PATH.write_text(''.join(lines[:-1]))
+    normalise_tables.normalise_tables(incremental=False)
+
+    # Scraped again from scratch in other order, the file is longer than before
+    EVENT_DATA_PATH.write_text(lines[0] + ''.join(reversed(lines[1:])))
+    normalise_tables.normalise_tables()
+    incremental = read_normalised()
+    normalise_tables.normalise_tables(incremental=False)
+
+    assert incremental == read_normalised()
+    assert pd.read_csv(NORMALISED_EVENT_PATH)['event_id'].notna().all()
+
+
+def test_fighters_not_scraped_get_ids(client, dist, capsys) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    FIGHTER_DATA_PATH.write_text(','.join(FIGHTER_TABLE_ROWS) + '\n')
+    capsys.readouterr()
+    normalise_tables.normalise_tables(incremental=False)
+
+    # Ids missing in fighters table are counted unresolved
+    output = capsys.readouterr().out
+    assert 'unresolved keys of fights.f_1' in output
+    assert 'unresolved keys of fight_stats.fighter_id' in output
+
+    ufc_fights = pd.read_csv(NORMALISED_FIGHT_PATH)
+    assert ufc_fights['f_1'].notna().all() and ufc_fights['f_2'].notna().all()
+    ufc_fight_stats = pd.read_csv(NORMALISED_FIGHTSTATS_PATH)
+    assert ufc_fight_stats['fighter_id'].notna().all()
@@ -0,0 +1,59 @@
+from collections.abc import Callable
+
+import pytest
+from server import load_corpus
+
+from scraper.events import (
+    parse_event_fights_page,
+    parse_event_listing,
+    parse_event_page,
+)
+from scraper.fighters import parse_fighter_listing, parse_fighter_page
+from scraper.fightpages import parse_fight_and_stats_page
+from scraper.fights import parse_fight_page
+from scraper.fightstats import parse_fightstats_page
+
+MANIFEST, PAGES = load_corpus()
+
+# Parser and part of url of pages it parses
+PARSERS = [
+    (parse_event_page, '/event-details/'),
+    (parse_event_fights_page, '/event-details/'),
+    (parse_fight_page, '/fight-details/'),
+    (parse_fightstats_page, '/fight-details/'),
+    (parse_fight_and_stats_page, '/fight-details/'),
+    (parse_fighter_page, '/fighter-details/'),
+    (parse_fighter_listing, '/statistics/fighters'),
+]
+
+
+def corpus_pages(url_part: str) -> list[tuple[str, str]]:
+    return [(url, html) for url, html in PAGES.items() if url_part in url]
+
+
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+@pytest.mark.parametrize(
+    'parser, url_part',
+    PARSERS,
+    ids=[parser.__name__ for parser, _ in PARSERS],
+)
+def test_parser(bench, parser: Callable, url_part: str, backend: str) -> None:
+    pages = corpus_pages(url_part)
+    results = bench(
+        f'parse.{parser.__name__}.{backend}',
+        lambda: [parser(url, html, backend=backend) for url, html in pages],
+        rounds=20,
+        pages=len(pages),
+    )
+    assert len(results) == len(pages) > 0
+
+
+def test_event_listing_parser(bench) -> None:
+    (html,) = [html for _, html in corpus_pages('/statistics/events/')]
+    urls, rows = bench(
+        'parse.parse_event_listing',
+        lambda: parse_event_listing(html),
+        rounds=20,
+        pages=1,
+    )
+    assert len(urls) == len(rows) > 0
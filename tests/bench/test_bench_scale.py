@@ -0,0 +1,200 @@
+import contextlib
+import io
+import shutil
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from synthetic import SyntheticSite, write_tables
+from test_bench_stages import count_rows, read_files, scrape_all
+
+from scraper import columnar, normalise_tables
+from scraper.constants import (
+    DIST_PATH,
+    EVENT_DATA_PATH,
+    EVENT_FIGHT_URLS,
+    FIGHT_DATA_PATH,
+    FIGHTER_DATA_PATH,
+    FIGHTSTATS_DATA_PATH,
+    NORMALISED_FIGHT_PATH,
+    NORMALISED_FILES_PATH,
+)
+
+# Sizes of synthetic site at scale 1, scales are set with --bench-scales.
+# Tables are of production size, scrape is smaller to run in seconds
+TABLES_FIGHTS = 8_000
+TABLES_FIGHTERS = 4_000
+# Rows appended to scraped tables since last run of incremental normalisation
+DELTA_FIGHTS = 12
+FIGHTS = 600
+FIGHTERS = 300
+ROUNDS = 3
+FORMATS = ['csv', 'parquet', 'arrow']
+
+
+def peak_memory(func) -> int:
+    """Peak of memory allocated by func in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope='session')
+def scraped_tables(tmp_path_factory) -> Callable[[SyntheticSite], Path]:
+    """Snapshot of scraped tables of synthetic site, written once per size"""
+    snapshots: dict[tuple[int, int], Path] = {}
+
+    def get(site: SyntheticSite) -> Path:
+        size = (site.fights, site.fighters)
+        if size not in snapshots:
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_tables(site.pages())
+            snapshots[size] = tmp_path_factory.mktemp('scraped') / 'dist'
+            shutil.copytree(DIST_PATH, snapshots[size])
+        return snapshots[size]
+
+    return get
+
+
+def restore(snapshot: Path) -> None:
+    """Restores scraped tables without normalised ones"""
+    shutil.rmtree(DIST_PATH)
+    shutil.copytree(snapshot, DIST_PATH)
+
+
+def test_add_foreign_key_scale(bench, dist, scraped_tables, scale: int) -> None:
+    site = SyntheticSite(TABLES_FIGHTS * scale, TABLES_FIGHTERS * scale)
+    restore(scraped_tables(site))
+    tables: list[pd.DataFrame] = []
+
+    def setup() -> None:
+        tables[:] = [
+            pd.read_csv(path)
+            for path in (
+                EVENT_DATA_PATH,
+                FIGHT_DATA_PATH,
+                FIGHTSTATS_DATA_PATH,
+                FIGHTER_DATA_PATH,
+            )
+        ]
+        normalise_tables.add_primary_keys(*tables)
+        tables.append(pd.read_csv(EVENT_FIGHT_URLS))
+
+    name = f'scale.add_foreign_key.fights_{site.fights}'
+    unresolved = bench(
+        name,
+        lambda: normalise_tables.add_foreign_key(*tables),
+        ROUNDS,
+        setup,
+    )
+    bench.results[name]['unresolved'] = unresolved
+    assert not any(unresolved.values())
+    assert tables[1]['event_id'].notna().all()
+
+
+def test_normalise_tables_scale(bench, dist, scraped_tables, scale: int) -> None:
+    site = SyntheticSite(TABLES_FIGHTS * scale, TABLES_FIGHTERS * scale)
+    snapshot = scraped_tables(site)
+    restore(snapshot)
+    assert count_rows(EVENT_DATA_PATH) == site.events
+    assert count_rows(FIGHT_DATA_PATH) == site.fights
+    assert count_rows(FIGHTER_DATA_PATH) == site.fighters
+
+    def setup() -> None:
+        restore(snapshot)
+
+    name = f'scale.normalise_tables.fights_{site.fights}'
+    bench(name, normalise_tables.normalise_tables, ROUNDS, setup)
+    assert count_rows(NORMALISED_FIGHT_PATH) == site.fights
+    setup()
+    bench.results[name]['peak_memory'] = peak_memory(normalise_tables.normalise_tables)
+
+
+def split_rows(file_path: Path, rows: int) -> list[str]:
+    """Cuts last rows off scraped file and returns them"""
+    lines = file_path.read_text().splitlines(keepends=True)
+    file_path.write_text(''.join(lines[:-rows]))
+    return lines[-rows:]
+
+
+def test_normalise_tables_incremental_scale(
+    bench,
+    dist,
+    scraped_tables,
+    scale: int,
+) -> None:
+    site = SyntheticSite(TABLES_FIGHTS * scale, TABLES_FIGHTERS * scale)
+    snapshot = scraped_tables(site)
+    restore(snapshot)
+    normalise_tables.normalise_tables(incremental=False)
+    expected = read_files(*NORMALISED_FILES_PATH.glob('*.csv'))
+
+    def setup() -> None:
+        restore(snapshot)
+        # History is normalised before rows of the last event are appended
+        appended = {
+            FIGHT_DATA_PATH: split_rows(FIGHT_DATA_PATH, DELTA_FIGHTS),
+            FIGHTSTATS_DATA_PATH: split_rows(FIGHTSTATS_DATA_PATH, 2 * DELTA_FIGHTS),
+        }
+        normalise_tables.normalise_tables()
+        for file_path, lines in appended.items():
+            with open(file_path, 'a') as f:
+                f.writelines(lines)
+
+    name = f'scale.normalise_tables_incremental.fights_{site.fights}'
+    bench(name, normalise_tables.normalise_tables, ROUNDS, setup)
+    assert read_files(*NORMALISED_FILES_PATH.glob('*.csv')) == expected
+
+
+def test_normalise_tables_columnar_scale(
+    bench,
+    dist,
+    scraped_tables,
+    scale: int,
+) -> None:
+    pytest.importorskip('pyarrow')
+    site = SyntheticSite(TABLES_FIGHTS * scale, TABLES_FIGHTERS * scale)
+    snapshot = scraped_tables(site)
+    restore(snapshot)
+
+    name = f'scale.normalise_tables_columnar.fights_{site.fights}'
+    bench(
+        name,
+        lambda: normalise_tables.normalise_tables(incremental=False, formats=FORMATS),
+        ROUNDS,
+        lambda: restore(snapshot),
+    )
+
+    # Readers take a few columns, columnar formats don't parse the rest
+    columns = ['fight_id', 'weight_class', 'finish_time_sec']
+    fights = NORMALISED_FIGHT_PATH.stem
+    reads = {
+        'csv': lambda: pd.read_csv(NORMALISED_FIGHT_PATH, usecols=columns),
+        'parquet': lambda: columnar.read_table(fights, 'parquet', columns),
+        'arrow': lambda: columnar.read_table(fights, 'arrow', columns),
+    }
+    for fmt, read in reads.items():
+        table = bench(f'scale.read_fights_{fmt}.fights_{site.fights}', read, ROUNDS)
+        assert len(table) == site.fights
+
+    years = columnar.read_table(fights, 'arrow', ['event_year'])['event_year']
+    year = years[0].as_py()
+    assert len(columnar.read_table(fights, 'parquet', columns, [year])) == sum(
+        1 for value in years.to_pylist() if value == year
+    )
+
+
+def test_scrape_all_scale(bench, client, dist, synthetic, scale: int) -> None:
+    site = SyntheticSite(FIGHTS * scale, FIGHTERS * scale)
+    synthetic(site)
+    name = f'scale.scrape_all.fights_{site.fights}'
+    bench(name, lambda: scrape_all(client), 1, dist)
+    assert count_rows(EVENT_DATA_PATH) == site.events
+    assert count_rows(FIGHT_DATA_PATH) == site.fights
+    assert count_rows(FIGHTSTATS_DATA_PATH) == 2 * site.fights
+    assert count_rows(FIGHTER_DATA_PATH) == site.fighters
@@ -0,0 +1,285 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from scraper import events, fighters, fightpages, fights, fightstats, storage
+from scraper.cache import PageCache
+from scraper.client import HttpClient
+from scraper.constants import (
+    EVENT_DATA_PATH,
+    EVENT_FIGHT_URLS,
+    FIGHT_DATA_PATH,
+    FIGHT_URLS,
+    FIGHTER_DATA_PATH,
+    FIGHTER_FAILED_URLS,
+    FIGHTSTATS_DATA_PATH,
+)
+from scraper.run import get_stages
+from scraper.scheduler import run_stages
+from scraper.utils import get_urls
+
+ROUNDS = 3
+# Rows of corpus scraped from scratch
+EVENTS = 4
+FIGHTS = 6
+FIGHTERS = 14
+# Newest event with fights, left out of tables of last week's run, and
+# requests of delta run: listing, its and upcoming event pages, its two
+# fight pages and profiles of their four fighters
+LAST_EVENT = 'event-details/c3c6ee9dd9c6a1b2'
+DELTA_REQUESTS = 9
+# Fighter with DOB in profile
+FIGHTER_PROFILE = '/fighter-details/e5549c82bfb5582d'
+
+
+def count_rows(path: Path) -> int:
+    with open(path, 'r') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def read_files(*paths: Path) -> dict[str, str]:
+    return {path.name: path.read_text() for path in paths}
+
+
+def test_scrape_events(bench, client, dist) -> None:
+    bench('stage.scrape_events', lambda: events.scrape_events(client), ROUNDS, dist)
+    assert count_rows(EVENT_DATA_PATH) == EVENTS
+    assert len(get_urls(FIGHT_URLS)) == FIGHTS
+
+
+def test_scrape_fight_pages(bench, client, dist) -> None:
+    def setup() -> None:
+        dist()
+        events.scrape_events(client)
+
+    bench(
+        'stage.scrape_fight_pages',
+        lambda: fightpages.scrape_fight_pages(client),
+        ROUNDS,
+        setup,
+    )
+    assert count_rows(FIGHT_DATA_PATH) == FIGHTS
+    assert count_rows(FIGHTSTATS_DATA_PATH) == 2 * FIGHTS
+
+
+def test_scrape_fights(bench, client, dist) -> None:
+    def setup() -> None:
+        dist()
+        events.scrape_events(client)
+
+    bench('stage.scrape_fights', lambda: fights.scrape_fights(client), ROUNDS, setup)
+    assert count_rows(FIGHT_DATA_PATH) == FIGHTS
+
+
+def test_scrape_fightstats(bench, client, dist) -> None:
+    def setup() -> None:
+        dist()
+        events.scrape_events(client)
+
+    bench(
+        'stage.scrape_fightstats',
+        lambda: fightstats.scrape_fightstats(client),
+        ROUNDS,
+        setup,
+    )
+    assert count_rows(FIGHTSTATS_DATA_PATH) == 2 * FIGHTS
+
+
+def test_scrape_fighters(bench, client, dist) -> None:
+    bench(
+        'stage.scrape_fighters',
+        lambda: fighters.scrape_fighters(client),
+        ROUNDS,
+        dist,
+    )
+    assert count_rows(FIGHTER_DATA_PATH) == FIGHTERS
+
+
+def test_scrape_fighters_failed_profile(client, dist, server, monkeypatch) -> None:
+    fighters.scrape_fighters(client)
+    expected = FIGHTER_DATA_PATH.read_text()
+    url = f'{server.base_url}{FIGHTER_PROFILE}'
+
+    # Profile fails to parse, fighter is saved from listing without DOB
+    dist()
+    monkeypatch.setattr(server, 'pages', dict(server.pages))
+    profile = server.pages[FIGHTER_PROFILE]
+    server.pages[FIGHTER_PROFILE] = b'<html><body></body></html>'
+    fighters.scrape_fighters(client)
+    assert get_urls(FIGHTER_FAILED_URLS) == [url]
+    with storage.open_table('fighters') as table:
+        row = next(row for row in table.rows() if row.fighter_url == url)
+    assert row.fighter_dob is None
+
+    # Record is unchanged, failed profile is fetched again by next run
+    server.pages[FIGHTER_PROFILE] = profile
+    server.inject()
+    fighters.scrape_fighters(client)
+    assert server.requests[FIGHTER_PROFILE] == 1
+    assert get_urls(FIGHTER_FAILED_URLS) == []
+    assert FIGHTER_DATA_PATH.read_text() == expected
+
+
+def test_new_fighters_of_delta_are_rows_of_listing(
+    client, dist, server, monkeypatch
+) -> None:
+    scrape_all(client)
+    expected = FIGHTER_DATA_PATH.read_text()
+    url = f'{server.base_url}{FIGHTER_PROFILE}'
+
+    # Profile name tells last name apart from listing one
+    monkeypatch.setattr(server, 'pages', dict(server.pages))
+    server.pages[FIGHTER_PROFILE] = server.pages[FIGHTER_PROFILE].replace(
+        b'Alex Pereira', b'Alex da Silva Pereira'
+    )
+    lines = expected.splitlines(keepends=True)
+    FIGHTER_DATA_PATH.write_text(''.join(line for line in lines if url not in line))
+    fighters.scrape_fighters(client, fight_urls=[])
+
+    assert sorted(FIGHTER_DATA_PATH.read_text().splitlines()) == sorted(
+        expected.splitlines()
+    )
+
+
+def scrape_all(client) -> None:
+    events.scrape_events(client)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client)
+
+
+def scrape_delta(client) -> None:
+    fight_urls = events.scrape_events(client, delta=True)
+    fightpages.scrape_fight_pages(client)
+    fighters.scrape_fighters(client, fight_urls=fight_urls)
+
+
+@pytest.mark.parametrize(
+    'throttle_every, drop_every',
+    [(0, 0), (5, 0), (0, 7), (4, 9)],
+    ids=['clean', 'throttled', 'dropped', 'throttled_and_dropped'],
+)
+def test_scrape_all(
+    bench,
+    client,
+    dist,
+    server,
+    faults,
+    throttle_every: int,
+    drop_every: int,
+) -> None:
+    paths = [EVENT_DATA_PATH, FIGHT_DATA_PATH, FIGHTSTATS_DATA_PATH, FIGHTER_DATA_PATH]
+    scrape_all(client)
+    expected = read_files(*paths)
+
+    def setup() -> None:
+        dist()
+        faults(throttle_every, drop_every)
+
+    name = f'stage.scrape_all.throttle_{throttle_every}.drop_{drop_every}'
+    bench(name, lambda: scrape_all(client), ROUNDS, setup)
+    # Requests and faults of the last round
+    bench.results[name]['requests'] = sum(server.requests.values())
+    bench.results[name]['faults'] = dict(server.faults)
+    assert read_files(*paths) == expected
+
+
+def test_scrape_all_scheduled(bench, client, dist, server) -> None:
+    paths = [EVENT_DATA_PATH, FIGHT_DATA_PATH, FIGHTSTATS_DATA_PATH, FIGHTER_DATA_PATH]
+    scrape_all(client)
+    expected = read_files(*paths)
+
+    # Fighters are scraped while events and fights are
+    bench(
+        'stage.scrape_all.scheduled',
+        lambda: run_stages(
+            [stage for stage in get_stages(client) if stage.name != 'normalise']
+        ),
+        ROUNDS,
+        dist,
+    )
+    assert read_files(*paths) == expected
+
+    # Stages are skipped by next run until their outputs get old
+    run_stages(get_stages(client))
+    server.inject()
+    run_stages(get_stages(client))
+    assert sum(server.requests.values()) == 0
+    assert read_files(*paths) == expected
+
+
+def test_scrape_all_cached(bench, client, dist, server, tmp_path) -> None:
+    paths = [EVENT_DATA_PATH, FIGHT_DATA_PATH, FIGHTSTATS_DATA_PATH, FIGHTER_DATA_PATH]
+    cache = PageCache(tmp_path / 'cache')
+    with HttpClient(limiter=client.limiter, cache=cache) as cached:
+        scrape_all(cached)
+        expected = read_files(*paths)
+
+        # Unchanged pages are answered by 304 and read from cache
+        dist()
+        server.inject()
+        scrape_all(cached)
+        assert server.revalidated == sum(server.requests.values()) > 0
+        assert cached.cache_stats['revalidated'] == server.revalidated
+        assert read_files(*paths) == expected
+
+    # Offline run reparses cached pages without a single request
+    with HttpClient(limiter=client.limiter, cache=cache, offline=True) as offline:
+        server.inject()
+        bench('stage.scrape_all.offline', lambda: scrape_all(offline), ROUNDS, dist)
+        assert sum(server.requests.values()) == 0
+        assert read_files(*paths) == expected
+
+
+def test_scrape_all_sqlite(bench, client, dist, monkeypatch) -> None:
+    paths = [EVENT_DATA_PATH, FIGHT_DATA_PATH, FIGHTSTATS_DATA_PATH, FIGHTER_DATA_PATH]
+    scrape_all(client)
+    expected = read_files(*paths)
+    # Fights of events are written as events are parsed, in any order
+    expected_event_fights = sorted(EVENT_FIGHT_URLS.read_text().splitlines())
+
+    monkeypatch.setattr(storage, 'STORAGE', 'sqlite')
+    bench('stage.scrape_all.sqlite', lambda: scrape_all(client), ROUNDS, dist)
+    bench('stage.export_tables.sqlite', storage.export_tables, ROUNDS)
+    # Exported files are the same as files appended by scrapers
+    assert read_files(*paths) == expected
+    assert sorted(EVENT_FIGHT_URLS.read_text().splitlines()) == expected_event_fights
+
+
+def test_scrape_delta(bench, client, dist, server, faults) -> None:
+    paths = [
+        EVENT_DATA_PATH,
+        EVENT_FIGHT_URLS,
+        FIGHT_DATA_PATH,
+        FIGHTSTATS_DATA_PATH,
+        FIGHTER_DATA_PATH,
+    ]
+    scrape_all(client)
+    files = read_files(*paths)
+    keys = [LAST_EVENT] + [
+        line.split(',')[1].split('/', 3)[-1]
+        for line in files[EVENT_FIGHT_URLS.name].splitlines()
+        if LAST_EVENT in line
+    ]
+    # Tables of last week's run, before last event was scraped
+    last_week = {
+        name: ''.join(
+            line
+            for line in text.splitlines(keepends=True)
+            if not any(key in line for key in keys)
+        )
+        for name, text in files.items()
+    }
+
+    def setup() -> None:
+        dist()
+        for path in paths:
+            path.write_text(last_week[path.name])
+        faults()
+
+    bench('stage.scrape_delta', lambda: scrape_delta(client), ROUNDS, setup)
+    assert sum(server.requests.values()) == DELTA_REQUESTS
+    # Rows of last event are appended after rows of last week's run
+    assert {
+        name: sorted(text.splitlines()) for name, text in read_files(*paths).items()
+    } == {name: sorted(text.splitlines()) for name, text in files.items()}
@@ -0,0 +1,187 @@
+import re
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+
+import pytest
+from server import MockServer
+from test_bench_stages import count_rows
+
+from scraper.cache import PageCache
+from scraper.client import HttpClient
+from scraper.constants import FIGHT_DATA_PATH, FIGHTSTATS_DATA_PATH
+from scraper.ratelimit import RateLimiter
+from scraper.watch import get_watched_urls, watch_events
+
+ROUNDS = 3
+# Event in progress and its bouts in order of their results
+LIVE_EVENT = '/event-details/c3c6ee9dd9c6a1b2'
+BOUTS = ['0a1b2c3d4e5f6071', '1b2c3d4e5f607182']
+INTERVAL = 0.05
+# Fight page of bout which result has just appeared, details are not there yet
+UNPUBLISHED_FIGHT = b'<html><body><h2 class="b-content__title">UFC</h2></body></html>'
+TIMEOUT = 10.0
+UPCOMING_LISTING = '/statistics/events/upcoming?page=all'
+NEXT_EVENT = '/event-details/6420efac0578988b'
+
+
+def hide_results(page: bytes, bouts: list[str]) -> bytes:
+    """Event page before results of bouts are announced"""
+    for bout in bouts:
+        page = re.sub(
+            rb'<a href="[^"]*/fight-details/' + bout.encode() + rb'" '
+            rb'class="b-flag b-flag_style_green">.*?</a>',
+            b'',
+            page,
+        )
+    return page
+
+
+def wait_rows(fights: int) -> float:
+    """Waits until fights and their fightstats are appended, returns the wait"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < TIMEOUT:
+        if (
+            FIGHT_DATA_PATH.exists()
+            and FIGHTSTATS_DATA_PATH.exists()
+            and count_rows(FIGHT_DATA_PATH) == fights
+            and count_rows(FIGHTSTATS_DATA_PATH) == 2 * fights
+        ):
+            return time.perf_counter() - started
+        time.sleep(INTERVAL / 10)
+    raise TimeoutError(f'{fights} fights are not scraped in {TIMEOUT} seconds')
+
+
+@pytest.fixture
+def live(server: MockServer):
+    """Pages of server changed while test runs"""
+    corpus = server.pages
+    server.pages = dict(corpus)
+    yield server.pages
+    server.pages = corpus
+
+
+@pytest.fixture
+def watch(dist: Callable[[], None], tmp_path):
+    """
+    Watches events in thread from empty data folder, watch started before
+    is stopped
+    """
+    watching: list[tuple[threading.Event, threading.Thread]] = []
+    limiter = RateLimiter(rate=10_000, burst=100, min_rate=10_000, max_rate=10_000)
+    client = HttpClient(limiter=limiter, cache=PageCache(tmp_path / 'cache'))
+
+    def stop() -> None:
+        while watching:
+            event, thread = watching.pop()
+            event.set()
+            thread.join()
+
+    def start(urls: list[str]) -> None:
+        stop()
+        dist()
+        event = threading.Event()
+        thread = threading.Thread(
+            target=watch_events,
+            args=(client, urls, INTERVAL, event),
+            daemon=True,
+        )
+        thread.start()
+        watching.append((event, thread))
+
+    yield start
+    stop()
+    client.close()
+
+
+def test_watch_event(
+    bench,
+    server: MockServer,
+    live: dict[str, bytes],
+    watch,
+) -> None:
+    results = live[LIVE_EVENT]
+    latencies: dict[str, list[float]] = {bout: [] for bout in BOUTS}
+
+    for _ in range(ROUNDS):
+        live[LIVE_EVENT] = hide_results(results, BOUTS)
+        watch([f'{server.base_url}{LIVE_EVENT}'])
+        server.inject()
+        # Nothing is scraped until results appear
+        time.sleep(5 * INTERVAL)
+        assert not FIGHT_DATA_PATH.exists() or count_rows(FIGHT_DATA_PATH) == 0
+
+        for i, bout in enumerate(BOUTS):
+            live[LIVE_EVENT] = hide_results(results, BOUTS[i + 1:])
+            latencies[bout].append(wait_rows(i + 1))
+
+        # Unchanged event page is revalidated, scraped fights are not fetched
+        time.sleep(5 * INTERVAL)
+        assert server.revalidated > 0
+        for bout in BOUTS:
+            assert server.requests[f'/fight-details/{bout}'] == 1
+
+    # Seconds from result on event page to its rows in tables
+    for i, bout in enumerate(BOUTS):
+        bench.results[f'watch.result_latency.bout_{i + 1}'] = {
+            'rounds': ROUNDS,
+            'min': min(latencies[bout]),
+            'median': statistics.median(latencies[bout]),
+            'max': max(latencies[bout]),
+        }
+
+
+def test_watch_fight_page_published_after_result(
+    server: MockServer,
+    live: dict[str, bytes],
+    watch,
+) -> None:
+    fight_path = f'/fight-details/{BOUTS[0]}'
+    fight_page = live[fight_path]
+    live[fight_path] = UNPUBLISHED_FIGHT
+    live[LIVE_EVENT] = hide_results(live[LIVE_EVENT], BOUTS[1:])
+    watch([f'{server.base_url}{LIVE_EVENT}'])
+    server.inject()
+
+    # Unpublished page is fetched again each poll, watcher keeps running
+    started = time.perf_counter()
+    while server.requests[fight_path] < 3:
+        assert time.perf_counter() - started < TIMEOUT
+        time.sleep(INTERVAL / 10)
+    assert not FIGHT_DATA_PATH.exists() or count_rows(FIGHT_DATA_PATH) == 0
+
+    live[fight_path] = fight_page
+    wait_rows(1)
+
+
+def upcoming_listing(base_url: str, events: dict[str, date]) -> bytes:
+    """Upcoming events listing of events by their dates"""
+    rows = ''.join(
+        f'''
+    <tr class="b-statistics__table-row">
+      <td class="b-statistics__table-col">
+        <i class="b-statistics__table-content">
+          <a href="{base_url}{path}" class="b-link b-link_style_black">UFC</a>
+          <span class="b-statistics__date">{day.strftime('%B %d, %Y')}</span>
+        </i>
+      </td>
+      <td class="b-statistics__table-col">Las Vegas, Nevada, USA</td>
+    </tr>'''
+        for path, day in events.items()
+    )
+    return f'<html><body><table>{rows}</table></body></html>'.encode()
+
+
+def test_event_in_progress_is_watched_from_upcoming_listing(
+    client,
+    server: MockServer,
+    live: dict[str, bytes],
+) -> None:
+    today = date.today()
+    live[UPCOMING_LISTING] = upcoming_listing(
+        server.base_url,
+        {LIVE_EVENT: today, NEXT_EVENT: today + timedelta(days=7)},
+    )
+    assert get_watched_urls(client) == [f'{server.base_url}{LIVE_EVENT}']
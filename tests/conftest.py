@@ -0,0 +1,34 @@
+import os
+import shutil
+import socket
+import tempfile
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# Scraper constants are read on import, so data folder and site mirror
+# of tests are set before any test imports scraper
+os.environ['UFC_DIST_PATH'] = tempfile.mkdtemp(prefix='ufc-dist-')
+os.environ['UFC_BASE_URL'] = f'http://127.0.0.1:{free_port()}'
+
+
+def pytest_addoption(parser) -> None:
+    # Registered here, so option is known when benchmarks run with all tests
+    parser.addoption(
+        '--bench-json',
+        default=None,
+        help='Writes benchmark results to json file',
+    )
+    parser.addoption(
+        '--bench-scales',
+        default='1',
+        help='Comma separated sizes of synthetic site relative to base size',
+    )
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    shutil.rmtree(os.environ['UFC_DIST_PATH'], ignore_errors=True)
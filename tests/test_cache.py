@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scraper import cache as cache_module
+from scraper.cache import PageCache
+from scraper.client import CacheMiss, HttpClient
+
+URL = 'http://ufcstats.com/event-details/{}'
+
+
+class Clock:
+    """Wall time of tests"""
+
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+
+def test_entries_are_stored_and_touched(tmp_path, clock) -> None:
+    cache = PageCache(tmp_path)
+    assert cache.get(URL.format(1)) is None
+
+    cache.put(URL.format(1), b'<html></html>', 'utf-8', '"abc"', 'Mon, 01 Jan 2024')
+    entry = cache.get(URL.format(1))
+    assert entry is not None
+    assert (entry.url, entry.body, entry.encoding) == (
+        URL.format(1),
+        b'<html></html>',
+        'utf-8',
+    )
+    assert entry.conditional_headers() == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024',
+    }
+
+    clock.now += 60
+    cache.touch(URL.format(1))
+    cache.touch(URL.format(2))
+    entry = cache.get(URL.format(1))
+    assert entry is not None and entry.fetched_at == clock.now
+    assert cache.get(URL.format(2)) is None
+
+
+def test_threads_write_the_same_url(tmp_path) -> None:
+    cache = PageCache(tmp_path)
+    bodies = [f'<html>{index}</html>'.encode() for index in range(8)]
+    with ThreadPoolExecutor(len(bodies)) as pool:
+        list(pool.map(lambda body: cache.put(URL.format(1), body), bodies * 20))
+
+    entry = cache.get(URL.format(1))
+    assert entry is not None and entry.body in bodies
+    assert not list(tmp_path.glob('*/*.tmp'))
+
+
+def test_old_entries_are_evicted(tmp_path, clock) -> None:
+    cache = PageCache(tmp_path, max_age=100)
+    cache.put(URL.format(1), b'old')
+    clock.now += 60
+    cache.put(URL.format(2), b'new')
+    clock.now += 60
+
+    assert cache.evict() == 1
+    assert cache.get(URL.format(1)) is None
+    assert cache.get(URL.format(2)) is not None
+
+
+def test_oldest_entries_are_evicted_to_fit_size(tmp_path, clock) -> None:
+    cache = PageCache(tmp_path)
+    for num in range(4):
+        cache.put(URL.format(num), bytes(1000))
+        clock.now += 1
+    size = sum(path.stat().st_size for path in tmp_path.glob('*/*'))
+
+    cache.max_bytes = size // 2
+    assert cache.evict() == 2
+    assert [num for num in range(4) if cache.get(URL.format(num))] == [2, 3]
+
+
+def test_offline_client_reads_cache_only(tmp_path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put(URL.format(1), '<html>Île</html>'.encode(), 'utf-8')
+    # Offline client never sends requests
+    with HttpClient(cache=cache, offline=True) as client:
+        assert client.get(URL.format(1)).text == '<html>Île</html>'
+        with pytest.raises(CacheMiss):
+            client.get(URL.format(2))
+        assert client.cache_stats['hit'] == 1
+        assert client.stats()['requests'] == 0
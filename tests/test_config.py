@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from scraper import config, run
+
+
+@pytest.fixture
+def environ(monkeypatch) -> dict[str, str]:
+    environ = {'UFC_RATE': '3'}
+    monkeypatch.setattr(os, 'environ', environ)
+    return environ
+
+
+def test_flags_override_environment_and_config(tmp_path, environ) -> None:
+    path = tmp_path / 'ufc.toml'
+    path.write_text(
+        'concurrency = 4\n'
+        'rate = 2.5\n'
+        'timeout = 10\n'
+        'throttle_wait = 5\n'
+        'formats = ["csv", "parquet"]\n'
+        'delta = true\n'
+    )
+    args = config.configure(
+        ['--config', str(path), '--concurrency', '16', 'events', 'fighters']
+    )
+    assert args.stages == ['events', 'fighters']
+    settings = {name: value for name, value in environ.items() if 'UFC' in name}
+    assert settings == {
+        'UFC_CONCURRENCY': '16',
+        'UFC_RATE': '3',
+        'UFC_TIMEOUT': '10',
+        'UFC_THROTTLE_WAIT': '5',
+        'UFC_NORMALISED_FORMATS': 'csv,parquet',
+        'UFC_DELTA': '1',
+    }
+
+
+def test_unknown_settings_are_rejected(tmp_path, environ) -> None:
+    path = tmp_path / 'ufc.toml'
+    path.write_text('short_timeout = 5\n')
+    with pytest.raises(ValueError, match='short_timeout'):
+        config.configure(['--config', str(path)])
+
+
+@pytest.mark.parametrize(
+    'argv',
+    [['--storage', 'sqllite'], ['--parser', 'lmxl'], ['--formats', 'csv,parket']],
+)
+def test_settings_take_known_values(environ, argv: list[str]) -> None:
+    with pytest.raises(SystemExit):
+        config.configure(argv)
+    assert config.configure(['--storage', 'sqlite', '--formats', 'csv,arrow'])
+    assert environ['UFC_STORAGE'] == 'sqlite'
+
+
+def test_settings_of_config_take_known_values(tmp_path, environ) -> None:
+    path = tmp_path / 'ufc.toml'
+    path.write_text('formats = ["csv", "parket"]\n')
+    with pytest.raises(ValueError, match='parket'):
+        config.configure(['--config', str(path)])
+
+
+@pytest.mark.parametrize('value', ['"no"', '0', '"1"'])
+def test_switches_of_config_are_booleans(tmp_path, environ, value: str) -> None:
+    path = tmp_path / 'ufc.toml'
+    path.write_text(f'offline = {value}\n')
+    with pytest.raises(ValueError, match='offline'):
+        config.configure(['--config', str(path)])
+    assert 'UFC_OFFLINE' not in environ
+
+
+def test_watch_runs_alone(environ) -> None:
+    with pytest.raises(SystemExit):
+        config.configure(['watch', 'events'])
+
+
+def test_stages_of_cli_are_stages_of_run(monkeypatch) -> None:
+    monkeypatch.setattr(run, 'STORAGE', 'sqlite')
+    assert [stage.name for stage in run.get_stages(None)] == config.STAGES
@@ -0,0 +1,92 @@
+from typing import cast
+
+import pytest
+import requests
+
+from scraper import utils
+from scraper.client import HttpClient
+from scraper.fetch import PageError, fetch_page
+from scraper.fightpages import parse_fight_and_stats_page
+from scraper.utils import HttpException
+
+URL = 'http://ufcstats.com/fight-details/0a1b2c3d4e5f6071'
+
+
+class Client:
+    """Client answering requests with given statuses in turn"""
+
+    def __init__(self, *statuses: int, headers: dict[str, str] | None = None) -> None:
+        self.statuses = list(statuses)
+        self.headers = headers or {}
+        self.requests = 0
+
+    def get(self, url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.statuses[min(self.requests, len(self.statuses) - 1)]
+        response._content = f'<html><body>{response.status_code}</body></html>'.encode()
+        response.encoding = 'utf-8'
+        if response.status_code != 200:
+            response.headers.update(self.headers)
+        self.requests += 1
+        return response
+
+
+def fetch(client: Client) -> str:
+    return fetch_page(cast(HttpClient, client), URL)
+
+
+class Clock:
+    """Time of HttpSolver, sleeps are recorded instead of waited"""
+
+    def __init__(self) -> None:
+        self.slept: list[float] = []
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+
+
+@pytest.fixture(autouse=True)
+def slept(monkeypatch) -> list[float]:
+    clock = Clock()
+    monkeypatch.setattr(utils, 'time', clock)
+    return clock.slept
+
+
+def test_server_errors_are_retried() -> None:
+    client = Client(503, 502, 200)
+    assert fetch(client) == '<html><body>200</body></html>'
+    assert client.requests == 3
+
+
+def test_429_with_retry_after_is_waited_by_limiter_only(slept) -> None:
+    client = Client(429, 429, 200, headers={'Retry-After': '5'})
+    assert fetch(client) == '<html><body>200</body></html>'
+    assert slept == []
+
+
+def test_429_without_retry_after_is_backed_off(slept) -> None:
+    client = Client(429, 200)
+    fetch(client)
+    assert len(slept) == 1
+
+
+def test_server_errors_raise_once_tries_run_out() -> None:
+    client = Client(503)
+    with pytest.raises(HttpException):
+        fetch(client)
+
+
+def test_missing_page_is_not_retried() -> None:
+    client = Client(404)
+    with pytest.raises(PageError) as error:
+        fetch(client)
+    assert error.value.status_code == 404
+    assert client.requests == 1
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4'])
+@pytest.mark.parametrize(
+    'html', ['', '<html><body><h1>503 Service Unavailable</h1></body></html>']
+)
+def test_error_page_gives_no_fight_rows(html: str, backend: str) -> None:
+    assert parse_fight_and_stats_page(URL, html, backend=backend) is None
@@ -0,0 +1,67 @@
+import io
+
+from scraper.index import ScrapedIndex
+from scraper.rows import EventFightRow
+
+EVENT_URL = 'http://ufcstats.com/event-details/{}'
+FIGHT_URL = 'http://ufcstats.com/fight-details/{}'
+
+
+def write_csv(path, *events: int) -> None:
+    lines = ['event_url,fight_url']
+    lines += [f'{EVENT_URL.format(num)},{FIGHT_URL.format(num)}' for num in events]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def test_index_is_built_once_from_csv(tmp_path) -> None:
+    csv_path = tmp_path / 'event_fight_urls.csv'
+    write_csv(csv_path, 1, 2)
+    with ScrapedIndex(csv_path, 'event_url') as index:
+        assert len(index) == 2
+        assert index.filter([EVENT_URL.format(num) for num in (1, 3)]) == [
+            EVENT_URL.format(3)
+        ]
+    assert (tmp_path / 'event_fight_urls.idx').exists()
+
+    # Next run reads key file, not csv file
+    write_csv(csv_path, 1, 2, 3)
+    with ScrapedIndex(csv_path, 'event_url') as index:
+        assert len(index) == 2
+
+
+def test_index_of_removed_csv_is_dropped(tmp_path) -> None:
+    csv_path = tmp_path / 'event_fight_urls.csv'
+    write_csv(csv_path, 1)
+    with ScrapedIndex(csv_path, 'event_url'):
+        pass
+    csv_path.unlink()
+
+    with ScrapedIndex(csv_path, 'event_url') as index:
+        assert len(index) == 0
+    assert (tmp_path / 'event_fight_urls.idx').read_text() == ''
+
+
+def test_url_is_added_after_its_rows_are_flushed(tmp_path) -> None:
+    csv_path = tmp_path / 'event_fight_urls.csv'
+    index_path = tmp_path / 'event_fight_urls.idx'
+    write_csv(csv_path)
+    url = EVENT_URL.format(1)
+    indexed_on_flush: list[bool] = []
+
+    class CsvFile(io.StringIO):
+        def flush(self) -> None:
+            indexed_on_flush.append(url in index_path.read_text().splitlines())
+            super().flush()
+
+    csv_file = CsvFile()
+    with ScrapedIndex(csv_path, 'event_url') as index:
+        index.write_rows(csv_file, [EventFightRow(url, FIGHT_URL.format(1))], url)
+        assert url in index
+    assert csv_file.getvalue().splitlines() == [f'{url},{FIGHT_URL.format(1)}']
+    assert indexed_on_flush == [False]
+    assert index_path.read_text().splitlines() == [url]
+
+    # Url is written once
+    with ScrapedIndex(csv_path, 'event_url') as index:
+        index.add(url)
+    assert index_path.read_text().splitlines() == [url]
@@ -0,0 +1,76 @@
+import contextlib
+import csv
+import io
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from scraper.events import parse_event_fights_page, parse_event_page
+from scraper.fighters import parse_fighter_listing, parse_fighter_page
+from scraper.fightpages import parse_fight_and_stats_page
+from scraper.fights import parse_fight_page
+from scraper.fightstats import parse_fightstats_page
+from scraper.rows import Row, to_csv_row
+
+PAGES_PATH = Path(__file__).parent / 'pages'
+PAGES = sorted(PAGES_PATH.glob('*.html'))
+PARSERS = [
+    parse_event_page,
+    parse_event_fights_page,
+    parse_fight_page,
+    parse_fightstats_page,
+    parse_fight_and_stats_page,
+    parse_fighter_page,
+    parse_fighter_listing,
+]
+
+
+def to_csv(result) -> str:
+    """Writes every row of parse result as csv writer of scraper does"""
+    f = io.StringIO()
+    writer = csv.writer(f)
+    if result is None:
+        return ''
+    for part in result if isinstance(result, tuple) else [result]:
+        if part and isinstance(part, list) and isinstance(part[0], Row):
+            writer.writerows(map(to_csv_row, part))
+        elif isinstance(part, Row):
+            writer.writerow(to_csv_row(part))
+        elif isinstance(part, list):
+            writer.writerow(part)
+        else:
+            writer.writerow([part])
+    return f.getvalue()
+
+
+def parse(parser: Callable, path: Path, backend: str) -> tuple[str, str, str]:
+    """Csv of parsed page or name of raised exception, and printed errors"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            result = parser(path.name, path.read_text(), backend=backend)
+        except Exception as e:
+            return 'error', type(e).__name__, output.getvalue()
+    return 'ok', to_csv(result), output.getvalue()
+
+
+@pytest.mark.parametrize('parser', PARSERS, ids=lambda parser: parser.__name__)
+@pytest.mark.parametrize('path', PAGES, ids=lambda path: path.stem)
+def test_lxml_backend_gives_same_rows(parser: Callable, path: Path) -> None:
+    expected = parse(parser, path, 'bs4')
+    result = parse(parser, path, 'lxml')
+    # Pages without parsed rows may fail with a different exception
+    assert result[0] == expected[0]
+    if expected[0] == 'ok':
+        assert result == expected
+
+
+def test_pages_are_parsed() -> None:
+    assert len(PAGES) > 0
+    parsed = [
+        parse_fight_page(path.name, path.read_text())
+        for path in PAGES
+        if path.stem.startswith('fight_')
+    ]
+    assert all(row is not None for row in parsed)
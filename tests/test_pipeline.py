@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import cast
+
+import requests
+
+from scraper.client import HttpClient
+from scraper.pipeline import Pipeline
+
+URLS = [f'http://ufcstats.com/fight-details/{index:016x}' for index in range(40)]
+WINDOW = 4
+
+
+class StalledClient:
+    """Client answering at once, except for the first url which stalls"""
+
+    def __init__(self) -> None:
+        self.fetched: list[str] = []
+        self.fetched_while_stalled = 0
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> requests.Response:
+        if url == URLS[0]:
+            time.sleep(0.3)
+            with self.lock:
+                self.fetched_while_stalled = len(self.fetched)
+        with self.lock:
+            self.fetched.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = url.encode()
+        response.encoding = 'utf-8'
+        return response
+
+
+def parse(url: str, html: str) -> str:
+    return html
+
+
+def run(ordered: bool) -> tuple[StalledClient, list[str]]:
+    client = StalledClient()
+    written: list[str] = []
+    pipeline: Pipeline[str] = Pipeline(
+        cast(HttpClient, client),
+        parse,
+        written.append,
+        concurrency=3,
+        parse_workers=0,
+        queue_size=WINDOW,
+    )
+    assert pipeline.run(URLS, ordered) == len(URLS)
+    return client, written
+
+
+def test_stalled_url_holds_fetch_within_reorder_window() -> None:
+    client, written = run(ordered=True)
+    assert written == URLS
+    assert client.fetched_while_stalled < WINDOW
+
+
+def test_unordered_results_are_not_held() -> None:
+    client, written = run(ordered=False)
+    assert sorted(written) == URLS
+    assert client.fetched_while_stalled == len(URLS) - 1
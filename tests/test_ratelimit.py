@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from scraper import ratelimit, utils
+from scraper.constants import TO_MANY_REQUESTS_TIMOUT, TO_MANY_REQUESTS_TRYING
+from scraper.ratelimit import RateLimiter, TokenBucket, parse_retry_after
+from scraper.utils import HttpSolver
+
+
+class Clock:
+    """Monotonic time of tests, sleep moves it on at once"""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.slept: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    return clock
+
+
+def test_rate_grows_additively_and_shrinks_multiplicatively(clock) -> None:
+    bucket = TokenBucket(rate=1.0, min_rate=0.2, max_rate=2.0, increase=0.5)
+    bucket.on_success()
+    assert bucket.rate == 1.5
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == 2.0
+
+    bucket.on_throttle()
+    assert bucket.rate == 1.0
+    for _ in range(5):
+        bucket.on_throttle()
+    assert bucket.rate == 0.2
+
+
+def test_rate_settles_below_rate_of_server(clock) -> None:
+    # Server answers 429 to requests above 6 req/s
+    limit = 6.0
+    bucket = TokenBucket(rate=1.0, increase=0.05, decrease=0.5, max_rate=20.0)
+    rates = []
+    for _ in range(2000):
+        if bucket.rate > limit:
+            bucket.on_throttle()
+        else:
+            bucket.on_success()
+        rates.append(bucket.rate)
+
+    settled = rates[500:]
+    assert max(settled) <= limit + bucket.increase
+    assert limit / 2 < sum(settled) / len(settled) < limit
+
+
+def test_requests_wait_for_tokens(clock) -> None:
+    bucket = TokenBucket(rate=2.0, burst=2.0)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [0.5]
+    assert bucket.state()['granted'] == 3
+
+
+def test_retry_after_blocks_host(clock) -> None:
+    limiter = RateLimiter(rate=10.0, burst=1.0)
+    url = 'http://ufcstats.com/statistics/events/completed'
+    limiter.on_throttle(url, retry_after=30.0)
+    assert limiter.state() == {
+        'ufcstats.com': {
+            'rate': 5.0,
+            'tokens': 0.0,
+            'blocked_for': 30.0,
+            'granted': 0,
+            'throttled': 1,
+        }
+    }
+
+    limiter.acquire(url)
+    assert sum(clock.slept) >= 30.0
+    # Other hosts are not blocked
+    limiter.acquire('http://127.0.0.1/statistics/events/completed')
+    assert limiter.state()['127.0.0.1']['granted'] == 1
+
+
+def test_retry_after_in_seconds_and_http_date() -> None:
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == (
+        pytest.approx(60, abs=2)
+    )
+    retry_at = datetime.now(timezone.utc) - timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == 0.0
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch) -> None:
+    bounds: list[tuple[float, float]] = []
+
+    def uniform(low: float, high: float) -> float:
+        bounds.append((low, high))
+        return high
+
+    monkeypatch.setattr(utils.random, 'uniform', uniform)
+    backoffs = [HttpSolver.backoff(trying, 30) for trying in range(6)]
+    assert backoffs == [2, 4, 8, 16, 30, 30]
+    assert all(low == 0 for low, _ in bounds)
+
+
+def test_429_is_retried_until_tries_run_out(monkeypatch) -> None:
+    clock = Clock()
+    monkeypatch.setattr(utils, 'time', clock)
+    monkeypatch.setattr(utils.random, 'uniform', lambda low, high: high)
+
+    solver = HttpSolver()
+    tries = 0
+    while not solver.is_completely_429():
+        tries += 1
+    assert tries == TO_MANY_REQUESTS_TRYING
+    assert clock.slept == [
+        HttpSolver.backoff(trying, TO_MANY_REQUESTS_TIMOUT) for trying in range(tries)
+    ]
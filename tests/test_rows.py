@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from scraper.constants import (
+    EVENT_TABLE_ROWS,
+    FIGHT_TABLE_ROWS,
+    FIGHTER_TABLE_ROWS,
+    FIGHTSTATS_TABLE_ROWS,
+)
+from scraper.rows import (
+    EventRow,
+    FighterRow,
+    FightRow,
+    FightStatRow,
+    get_schema,
+    to_csv_row,
+)
+
+
+@pytest.mark.parametrize(
+    ('row_class', 'table_rows'),
+    [
+        (EventRow, EVENT_TABLE_ROWS),
+        (FightRow, FIGHT_TABLE_ROWS),
+        (FightStatRow, FIGHTSTATS_TABLE_ROWS),
+        (FighterRow, FIGHTER_TABLE_ROWS),
+    ],
+)
+def test_rows_have_columns_of_tables(row_class, table_rows) -> None:
+    assert row_class.columns() == table_rows
+    assert list(get_schema(row_class)) == table_rows
+
+
+def test_values_are_converted_once_parsed() -> None:
+    texts = ['Name', '5', '50', '20', '30', '10', '2', '1', '0', '--', '4:05']
+    row = FightStatRow.from_values([*texts, 'NULL', 'http://ufcstats.com/f'])
+    assert row.knockdowns == 5
+    assert row.reversals is None
+    assert row.ctrl_time_sec == 245
+    assert row.fighter_url is None
+    csv_row = to_csv_row(row)
+    assert csv_row[-4:] == ['NULL', '245', 'NULL', 'http://ufcstats.com/f']
+    # Rows read back from csv file are the same
+    assert FightStatRow.from_values(csv_row) == row
+
+
+def test_dates_are_written_in_iso_format() -> None:
+    row = EventRow.from_values(['UFC 1', date(1993, 11, 12), 'Denver', '', 'USA', 'u'])
+    assert to_csv_row(row) == ['UFC 1', '1993-11-12', 'Denver', 'NULL', 'USA', 'u']
+    assert EventRow.from_values(to_csv_row(row)) == row
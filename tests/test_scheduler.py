@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from scraper.scheduler import (
+    Stage,
+    StageTiming,
+    get_critical_path,
+    get_dependencies,
+    run_stages,
+)
+
+
+class Stages:
+    """Stub stages writing their outputs, names of run stages in order"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.runs: list[str] = []
+        self.lock = threading.Lock()
+
+    def __call__(
+        self,
+        name: str,
+        inputs: tuple[str, ...] = (),
+        outputs: tuple[str, ...] = (),
+        max_age: float | None = None,
+        error: Exception | None = None,
+    ) -> Stage:
+        def run() -> None:
+            with self.lock:
+                self.runs.append(name)
+            if error is not None:
+                raise error
+            for output in outputs:
+                (self.path / output).write_text(name)
+
+        return Stage(
+            name,
+            run,
+            tuple(self.path / path for path in inputs),
+            tuple(self.path / path for path in outputs),
+            max_age,
+        )
+
+
+@pytest.fixture
+def stages(tmp_path) -> Stages:
+    return Stages(tmp_path)
+
+
+@pytest.fixture
+def finished_path(tmp_path) -> Path:
+    return tmp_path / 'stages.json'
+
+
+def test_stages_run_after_stages_writing_their_inputs(stages, finished_path) -> None:
+    run = [
+        stages('normalise', inputs=('fights.csv', 'fighters.csv'), outputs=('n.csv',)),
+        stages('fight_pages', inputs=('fight_urls.csv',), outputs=('fights.csv',)),
+        stages('events', outputs=('fight_urls.csv',)),
+        stages('fighters', outputs=('fighters.csv',)),
+    ]
+    assert get_dependencies(run) == {
+        'normalise': ['fight_pages', 'fighters'],
+        'fight_pages': ['events'],
+        'events': [],
+        'fighters': [],
+    }
+
+    run_stages(run, path=finished_path)
+    assert stages.runs.index('events') < stages.runs.index('fight_pages')
+    assert stages.runs[-1] == 'normalise'
+    assert set(json.loads(finished_path.read_text())) == {
+        'events',
+        'fight_pages',
+        'fighters',
+        'normalise',
+    }
+
+
+def test_failed_stage_stops_its_dependents(stages, finished_path) -> None:
+    error = ValueError('Listing is empty')
+    run = [
+        stages('events', outputs=('fight_urls.csv',), error=error),
+        stages('fight_pages', inputs=('fight_urls.csv',), outputs=('fights.csv',)),
+        stages('normalise', inputs=('fights.csv',), outputs=('n.csv',)),
+        stages('fighters', outputs=('fighters.csv',)),
+    ]
+    with pytest.raises(ValueError, match='Listing is empty'):
+        run_stages(run, path=finished_path)
+    assert sorted(stages.runs) == ['events', 'fighters']
+    assert list(json.loads(finished_path.read_text())) == ['fighters']
+
+
+def test_stages_in_cycle_are_not_run(stages, finished_path) -> None:
+    run = [
+        stages('first', inputs=('b.csv',), outputs=('a.csv',)),
+        stages('second', inputs=('a.csv',), outputs=('b.csv',)),
+    ]
+    with pytest.raises(ValueError, match='cycle'):
+        run_stages(run, path=finished_path)
+    assert stages.runs == []
+
+
+def test_up_to_date_stages_are_skipped(stages, finished_path, tmp_path) -> None:
+    def get_run() -> list[Stage]:
+        return [
+            stages('events', outputs=('fight_urls.csv',), max_age=3600),
+            stages('fight_pages', inputs=('fight_urls.csv',), outputs=('f.csv',)),
+        ]
+
+    run_stages(get_run(), path=finished_path)
+    stages.runs.clear()
+    run_stages(get_run(), path=finished_path)
+    assert stages.runs == []
+
+    # Changed input runs its stage again
+    finished = json.loads(finished_path.read_text())
+    os.utime(tmp_path / 'fight_urls.csv', (0, finished['fight_pages'] + 1))
+    run_stages(get_run(), path=finished_path)
+    assert stages.runs == ['fight_pages']
+
+    # Stage older than max age runs again, and so do its dependents
+    stages.runs.clear()
+    finished = json.loads(finished_path.read_text())
+    finished['events'] -= 3601
+    finished_path.write_text(json.dumps(finished))
+    run_stages(get_run(), path=finished_path)
+    assert stages.runs == ['events', 'fight_pages']
+
+    stages.runs.clear()
+    run_stages(get_run(), force=True, path=finished_path)
+    assert stages.runs == ['events', 'fight_pages']
+
+
+def test_critical_path_follows_waited_for_stages() -> None:
+    timings = {
+        'events': StageTiming(0.0, 2.0, None),
+        'fighters': StageTiming(0.0, 5.0, None),
+        'fight_pages': StageTiming(2.0, 4.0, 'events'),
+        'normalise': StageTiming(5.0, 6.0, 'fighters'),
+    }
+    assert get_critical_path(timings) == ['fighters', 'normalise']
+    assert get_critical_path({}) == []
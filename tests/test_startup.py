@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parents[1] / 'src'
+# Times of bare interpreter startup main.py and scraper.run may take before
+# the first stage runs, measured on same machine so load of it cancels out.
+# They take about as long as bare startup, while importing pandas, bs4 and
+# requests eagerly takes about 10 times of it
+STARTUP_FACTOR = 3
+ROUNDS = 3
+# Loaded only by stages using them
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'bs4', 'lxml', 'requests']
+
+
+def import_times(statement: str, nested: bool = True) -> dict[str, float]:
+    """
+    Cumulative seconds of each module imported by statement, by -X importtime.
+    Modules imported by other modules are left out unless nested
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=SRC_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.removeprefix('import time:').split('|')
+        # Nested imports are indented under modules importing them
+        if nested or not module.startswith('  '):
+            times[module.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+@pytest.mark.parametrize('statement', ['import main', 'from scraper import run'])
+def test_heavy_modules_are_not_imported_on_start(statement: str) -> None:
+    times = import_times(statement)
+    assert not [module for module in HEAVY_MODULES if module in times]
+
+
+def test_startup_budget() -> None:
+    bare_startups = []
+    startups = []
+    for _ in range(ROUNDS):
+        bare_startups.append(sum(import_times('pass', nested=False).values()))
+        # main imports scraper only once settings are read, see main.py
+        times = import_times('import main; from scraper import run')
+        startups.append(times['main'] + times['scraper.run'])
+    assert min(startups) < STARTUP_FACTOR * min(bare_startups)
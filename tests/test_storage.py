@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from scraper import storage
+from scraper.rows import EventFightRow, EventRow
+
+EVENT_URL = 'http://ufcstats.com/event-details/{}'
+FIGHT_URL = 'http://ufcstats.com/fight-details/{}'
+
+
+@pytest.fixture
+def sqlite(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(storage, 'STORAGE', 'sqlite')
+    monkeypatch.setattr(storage, 'DATABASE_PATH', tmp_path / 'ufc_data.sqlite')
+    # Writer waiting for lock held by batch being fetched fails at once
+    monkeypatch.setattr(storage, 'STORAGE_TIMEOUT', 0.2)
+
+
+def event_row(num: int) -> EventRow:
+    return EventRow(
+        f'UFC {num}', date(2024, 1, num), None, None, 'USA', EVENT_URL.format(num)
+    )
+
+
+def test_stages_write_concurrently(sqlite) -> None:
+    errors: list[Exception] = []
+    fights = 20
+
+    def write_fights() -> None:
+        try:
+            with storage.open_table('event_fights') as table:
+                # Pages are fetched between urls of one batch
+                for num in range(fights):
+                    url = EVENT_URL.format(num)
+                    table.write_rows([EventFightRow(url, FIGHT_URL.format(num))], url)
+                    time.sleep(0.02)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=write_fights)
+    thread.start()
+    time.sleep(0.1)
+    with storage.open_table('events') as table:
+        table.replace_rows([event_row(num) for num in range(1, 4)])
+    thread.join()
+
+    assert not errors
+    with storage.open_table('event_fights') as event_fights:
+        assert len(event_fights.rows()) == fights
+    with storage.open_table('events') as table:
+        assert [row.event_name for row in table.rows()] == ['UFC 1', 'UFC 2', 'UFC 3']
+
+
+def test_queued_rows_are_read_and_committed_on_close(sqlite) -> None:
+    url = EVENT_URL.format(1)
+    with storage.open_table('event_fights') as table:
+        table.write_rows(
+            [EventFightRow(url, FIGHT_URL.format(num)) for num in (1, 2)], url
+        )
+        assert url in table
+        assert len(table.rows()) == 2
+        table.write_rows([EventFightRow(url, FIGHT_URL.format(3))], url)
+
+    with storage.open_table('event_fights') as table:
+        assert [row.fight_url for row in table.rows()] == [FIGHT_URL.format(3)]
+
+
+def test_urls_of_removed_csv_file_are_scraped_again(tmp_path) -> None:
+    spec = storage.TableSpec(
+        EventFightRow, tmp_path / 'event_fight_urls.csv', 'event_url', numbered=True
+    )
+    url = EVENT_URL.format(1)
+    with storage.CsvTable(spec) as table:
+        table.write_rows([EventFightRow(url, FIGHT_URL.format(1))], url)
+    spec.file_path.unlink()
+
+    with storage.CsvTable(spec) as table:
+        assert table.rows() == []
+        assert url not in table
+
+
+def test_only_given_tables_are_exported(sqlite) -> None:
+    url = EVENT_URL.format(1)
+    with storage.open_table('event_fights') as event_fights:
+        event_fights.write_rows([EventFightRow(url, FIGHT_URL.format(1))], url)
+    with storage.open_table('events') as table:
+        table.replace_rows([event_row(1)])
+    for spec in storage.TABLES.values():
+        spec.file_path.unlink(missing_ok=True)
+
+    storage.export_tables('event_fights')
+    assert storage.TABLES['event_fights'].file_path.read_text().splitlines() == [
+        'event_url,fight_url',
+        f'{url},{FIGHT_URL.format(1)}',
+    ]
+    assert not storage.TABLES['events'].file_path.exists()